@@ -0,0 +1,41 @@
+"""Utilidades compartidas por los benchmarks: servidor uvicorn de la app real y percentiles."""
+import asyncio
+import os
+import subprocess
+import sys
+
+import httpx
+
+# Usuarios que crea benchmarks.datos_sinteticos: sint_0, sint_1, ... con esta contraseña
+PREFIJO_USUARIO = "sint_"
+CONTRASENA_SINTETICA = "sintetico"
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def iniciar_servidor(puerto: int, **entorno_extra) -> subprocess.Popen:
+    """Aplica las migraciones y levanta src.main:app con uvicorn; las variables extra sobreescriben el entorno."""
+    entorno = dict(os.environ, **entorno_extra)
+    subprocess.run([sys.executable, "-m", "src.config.migraciones"], env=entorno, stdout=subprocess.DEVNULL, check=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(puerto), "--log-level", "warning"],
+        env=entorno,
+        stdout=subprocess.DEVNULL
+    )
+
+
+async def esperar_servidor(cliente: httpx.AsyncClient, intentos: int = 100) -> None:
+    for _ in range(intentos):
+        try:
+            if (await cliente.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("El servidor no respondió a /health")
@@ -0,0 +1,210 @@
+"""
+Prueba de carga con escenarios de uso reales sobre los datos de benchmarks.datos_sinteticos.
+
+Cada trabajador toma un usuario sintético al azar y ejecuta escenarios con estos pesos:
+login, carga del dashboard, listado de gastos e inversiones, alta de gasto y análisis con
+filtro de periodo. Reporta por escenario p50/p95/p99 y throughput; con --salida guarda el
+resultado en JSON y con --comparar muestra la diferencia contra una corrida anterior.
+
+Uso:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.datos_sinteticos --usuarios 1000 --gastos 200000
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.escenarios --duracion 30 --salida base.json
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.escenarios --duracion 30 --comparar base.json
+    python -m benchmarks.escenarios --base-url http://127.0.0.1:8000   # servidor ya levantado
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import date
+
+import httpx
+
+from benchmarks.comun import percentil, iniciar_servidor, esperar_servidor, PREFIJO_USUARIO, CONTRASENA_SINTETICA
+
+# nombre -> peso relativo
+PESOS = {
+    "login": 1,
+    "dashboard": 4,
+    "listar_gastos": 3,
+    "listar_inversiones": 2,
+    "crear_gasto": 1,
+    "analisis_periodo": 3,
+}
+
+
+class Escenarios:
+    """
+    Peticiones de cada escenario. Antes de medir se abren `sesiones` sesiones (el login
+    cuesta un hash PBKDF2); los demás escenarios reutilizan esos tokens.
+    """
+
+    def __init__(self, cliente: httpx.AsyncClient, usuarios: int, rng: random.Random):
+        self.cliente = cliente
+        self.usuarios = usuarios
+        self.rng = rng
+        self.tokens = {}
+
+    def _usuario(self) -> str:
+        return f"{PREFIJO_USUARIO}{self.rng.randrange(self.usuarios)}"
+
+    async def preparar(self, sesiones: int, concurrencia: int) -> None:
+        nombres = iter({self._usuario() for _ in range(sesiones)})
+
+        async def trabajador():
+            for nombre in nombres:
+                await self._login(nombre)
+
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        if not self.tokens:
+            raise RuntimeError("Ningún login funcionó: ¿se cargaron los datos con benchmarks.datos_sinteticos?")
+
+    async def _login(self, nombre: str) -> httpx.Response:
+        respuesta = await self.cliente.post("/token", data={"username": nombre, "password": CONTRASENA_SINTETICA})
+        if respuesta.status_code == 200:
+            self.tokens[nombre] = {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+        return respuesta
+
+    async def ejecutar(self, escenario: str, medir):
+        """medir(corrutina) devuelve la respuesta y registra su latencia."""
+        if escenario == "login":
+            return await medir(self._login(self._usuario()))
+
+        headers = self.tokens[self.rng.choice(list(self.tokens))]
+        if escenario == "dashboard":
+            return await medir(self.cliente.get("/analisis/dashboard?meses=1", headers=headers))
+        if escenario == "listar_gastos":
+            return await medir(self.cliente.get("/gastos/?limit=50", headers=headers))
+        if escenario == "listar_inversiones":
+            return await medir(self.cliente.get("/inversiones/?limit=50", headers=headers))
+        if escenario == "crear_gasto":
+            cuerpo = {"tipo_gasto": "benchmark", "cantidad_gasto": round(self.rng.uniform(1, 200), 2)}
+            return await medir(self.cliente.post("/gastos/", json=cuerpo, headers=headers))
+        if escenario == "analisis_periodo":
+            hoy = date.today()
+            anio, mes = divmod(hoy.year * 12 + hoy.month - 1 - self.rng.randrange(12), 12)
+            ruta = self.rng.choice(("resumen-mensual", "gastos-por-tipo", "inversiones-por-tipo"))
+            return await medir(self.cliente.get(f"/analisis/{ruta}?mes={mes + 1}&anio={anio}", headers=headers))
+        raise ValueError(escenario)
+
+
+async def _correr(cliente: httpx.AsyncClient, args) -> dict:
+    rng = random.Random(args.semilla)
+    escenarios = Escenarios(cliente, args.usuarios, rng)
+    await escenarios.preparar(args.sesiones, args.concurrencia)
+    nombres = list(PESOS)
+    pesos = list(PESOS.values())
+    latencias = {nombre: [] for nombre in nombres}
+    errores = {nombre: 0 for nombre in nombres}
+
+    limite = time.perf_counter() + args.duracion
+
+    async def trabajador():
+        while time.perf_counter() < limite:
+            escenario = rng.choices(nombres, weights=pesos)[0]
+
+            async def medir(corrutina):
+                inicio = time.perf_counter()
+                respuesta = await corrutina
+                latencias[escenario].append((time.perf_counter() - inicio) * 1000)
+                if respuesta.status_code >= 400:
+                    errores[escenario] += 1
+                return respuesta
+
+            try:
+                await escenarios.ejecutar(escenario, medir)
+            except httpx.HTTPError:
+                errores[escenario] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(args.concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    resultado = {"duracion_segundos": round(duracion, 2), "concurrencia": args.concurrencia, "escenarios": {}}
+    for nombre in nombres:
+        valores = latencias[nombre]
+        if not valores:
+            continue
+        resultado["escenarios"][nombre] = {
+            "peticiones": len(valores),
+            "errores": errores[nombre],
+            "por_segundo": round(len(valores) / duracion, 1),
+            "p50_ms": round(statistics.median(valores), 2),
+            "p95_ms": round(percentil(valores, 95), 2),
+            "p99_ms": round(percentil(valores, 99), 2),
+        }
+    total = sum(len(v) for v in latencias.values())
+    resultado["total"] = {"peticiones": total, "por_segundo": round(total / duracion, 1)}
+    return resultado
+
+
+def _imprimir(resultado: dict, base: dict = None) -> None:
+    print(f"{'escenario':<20}{'n':>8}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}", end="")
+    print(f"{'Δ p95':>10}{'Δ req/s':>10}" if base else "")
+    for nombre, datos in resultado["escenarios"].items():
+        linea = (
+            f"{nombre:<20}{datos['peticiones']:>8}{datos['errores']:>6}{datos['por_segundo']:>9.1f}"
+            f"{datos['p50_ms']:>10.1f}{datos['p95_ms']:>10.1f}{datos['p99_ms']:>10.1f}"
+        )
+        previo = (base or {}).get("escenarios", {}).get(nombre)
+        if previo:
+            delta_p95 = (datos["p95_ms"] / previo["p95_ms"] - 1) * 100 if previo["p95_ms"] else 0.0
+            delta_rps = (datos["por_segundo"] / previo["por_segundo"] - 1) * 100 if previo["por_segundo"] else 0.0
+            linea += f"{delta_p95:>+9.1f}%{delta_rps:>+9.1f}%"
+        print(linea)
+    print(f"total: {resultado['total']['peticiones']} peticiones, {resultado['total']['por_segundo']} req/s "
+          f"en {resultado['duracion_segundos']} s con concurrencia {resultado['concurrencia']}")
+
+
+async def _medir(args) -> dict:
+    servidor = None
+    base_url = args.base_url
+    if base_url is None:
+        servidor = iniciar_servidor(args.puerto)
+        base_url = f"http://127.0.0.1:{args.puerto}"
+
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60) as cliente:
+            await esperar_servidor(cliente)
+            return await _correr(cliente, args)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga por escenarios sobre datos sintéticos.")
+    parser.add_argument("--usuarios", type=int, default=1000, help="Usuarios sintéticos a usar (sint_0 .. sint_N-1)")
+    parser.add_argument("--sesiones", type=int, default=100, help="Usuarios con sesión abierta antes de medir")
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--puerto", type=int, default=8767)
+    parser.add_argument("--base-url", default=None, help="Usar un servidor ya levantado en lugar de iniciar uno")
+    parser.add_argument("--salida", default=None, help="Guardar el resultado en este JSON")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    if args.base_url is None and not os.getenv("DATABASE_URL"):
+        print("Aviso: sin DATABASE_URL el servidor usa la base MySQL del .env")
+
+    resultado = asyncio.run(_medir(args))
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+    _imprimir(resultado, base)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Throughput y latencia de POST /token con logins concurrentes.
+
+Levanta la app real con uvicorn, registra usuarios (las contraseñas se guardan con hash) y
+lanza logins en paralelo. Al mismo tiempo mide /health para comprobar que una ráfaga
+de logins no bloquea al resto de las rutas.
+
+Uso:
+    python -m benchmarks.login
+    python -m benchmarks.login --concurrencia 64 --logins 500 --iteraciones 600000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.comun import percentil, iniciar_servidor, esperar_servidor
+
+
+async def _registrar(cliente: httpx.AsyncClient, usuarios: int) -> list:
+    prefijo = uuid.uuid4().hex[:6]
+    nombres = [f"login_{prefijo}_{i}" for i in range(usuarios)]
+    for nombre in nombres:
+        respuesta = await cliente.post("/items/", json={"nombre": nombre, "correo": f"{nombre}@bench.local", "contraseña": f"clave-{nombre}"})
+        respuesta.raise_for_status()
+    return nombres
+
+
+async def _logins(cliente: httpx.AsyncClient, nombres: list, concurrencia: int, total: int):
+    latencias = []
+    errores = 0
+    siguiente = iter(range(total))
+
+    async def trabajador():
+        nonlocal errores
+        for i in siguiente:
+            nombre = nombres[i % len(nombres)]
+            inicio = time.perf_counter()
+            respuesta = await cliente.post("/token", data={"username": nombre, "password": f"clave-{nombre}"})
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if respuesta.status_code != 200:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return time.perf_counter() - inicio, latencias, errores
+
+
+async def _sondear_health(cliente: httpx.AsyncClient, fin: asyncio.Event) -> list:
+    """Mide /health cada 50 ms mientras dura la ráfaga."""
+    latencias = []
+    while not fin.is_set():
+        inicio = time.perf_counter()
+        await cliente.get("/health")
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        await asyncio.sleep(0.05)
+    return latencias
+
+
+async def _medir(args, database_url: str) -> None:
+    entorno = {"DATABASE_URL": database_url}
+    if args.iteraciones:
+        entorno["PASSWORD_ITERACIONES"] = str(args.iteraciones)
+    servidor = iniciar_servidor(args.puerto, **entorno)
+
+    limites = httpx.Limits(max_connections=args.concurrencia + 1, max_keepalive_connections=args.concurrencia + 1)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.puerto}", limits=limites, timeout=120) as cliente:
+            await esperar_servidor(cliente)
+            nombres = await _registrar(cliente, args.usuarios)
+
+            fin = asyncio.Event()
+            sondeo = asyncio.create_task(_sondear_health(cliente, fin))
+            duracion, latencias, errores = await _logins(cliente, nombres, args.concurrencia, args.logins)
+            fin.set()
+            latencias_health = await sondeo
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    print(f"logins: {args.logins}  concurrencia: {args.concurrencia}  errores: {errores}")
+    print(f"throughput: {args.logins / duracion:.1f} logins/s")
+    print(f"/token   p50 {statistics.median(latencias):8.1f} ms  p95 {percentil(latencias, 95):8.1f} ms  p99 {percentil(latencias, 99):8.1f} ms")
+    if latencias_health:
+        print(f"/health  p50 {statistics.median(latencias_health):8.1f} ms  p99 {percentil(latencias_health, 99):8.1f} ms  (durante la ráfaga)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de login con contraseñas hasheadas.")
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--iteraciones", type=int, default=None, help="PASSWORD_ITERACIONES del servidor")
+    parser.add_argument("--puerto", type=int, default=8766)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_login.db')}"
+    asyncio.run(_medir(args, database_url))
+
+
+if __name__ == "__main__":
+    main()
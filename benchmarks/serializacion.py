@@ -0,0 +1,107 @@
+"""
+Compara la serialización actual de los listados (objetos ORM validados con response_model=List[GastoRead])
+con la ruta rápida de SERIALIZACION_RAPIDA (tuplas de un select de columnas codificadas con orjson).
+
+No levanta servidor: crea una base SQLite temporal con N gastos y una app FastAPI mínima con una
+ruta por variante, sin paginar, y las llama con TestClient. Mide consulta + serialización + HTTP
+en proceso, y verifica que ambas devuelvan el mismo JSON.
+
+Uso:
+    python -m benchmarks.serializacion
+    python -m benchmarks.serializacion --filas 1000 10000 100000 --repeticiones 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlmodel import SQLModel, Session, select
+
+from src.models.gasto import Gasto, GastoRead
+from src.models.item import Item
+from src.utils.serializacion import RespuestaJSONRapida, columnas_de, orjson
+
+COLUMNAS = columnas_de(Gasto, GastoRead)
+CAMPOS = tuple(columna.key for columna in COLUMNAS)
+
+
+def _crear_base(ruta: str, filas: int):
+    engine = create_engine(f"sqlite:///{ruta}")
+    SQLModel.metadata.create_all(engine, tables=[Item.__table__, Gasto.__table__])
+    hoy = date.today()
+    with engine.begin() as conexion:
+        conexion.execute(insert(Item.__table__), [{"id": 1, "nombre": "bench", "correo": "bench@bench.local", "contraseña": "x", "rol": "user"}])
+        for inicio in range(0, filas, 10000):
+            conexion.execute(insert(Gasto.__table__), [
+                {
+                    "usuario_id": 1,
+                    "tipo_gasto": f"tipo_{i % 12}",
+                    "cantidad_gasto": round(5 + (i * 7.31) % 400, 2),
+                    "fecha_gasto": hoy - timedelta(days=i % 730),
+                    "descripcion": None if i % 3 else f"gasto {i}",
+                }
+                for i in range(inicio, min(inicio + 10000, filas))
+            ])
+    return engine
+
+
+def _app(engine) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/actual", response_model=List[GastoRead])
+    def actual():
+        with Session(engine) as db:
+            return db.exec(select(Gasto).where(Gasto.usuario_id == 1).order_by(Gasto.id)).all()
+
+    @app.get("/rapida", response_model=List[GastoRead])
+    def rapida():
+        with Session(engine) as db:
+            filas = db.exec(select(*COLUMNAS).where(Gasto.usuario_id == 1).order_by(Gasto.id)).all()
+        return RespuestaJSONRapida([dict(zip(CAMPOS, fila)) for fila in filas])
+
+    return app
+
+
+def _medir(cliente: TestClient, ruta: str, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(ruta)
+        tiempos.append(time.perf_counter() - inicio)
+        respuesta.raise_for_status()
+    return statistics.median(tiempos), respuesta.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización actual vs. rápida de los listados.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"codificador: {'orjson ' + orjson.__version__ if orjson else 'json (orjson no instalado)'}")
+    print(f"{'filas':>8} {'actual ms':>10} {'rápida ms':>10} {'aceleración':>12} {'KB':>8}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.filas:
+            engine = _crear_base(os.path.join(directorio, f"bench_{filas}.db"), filas)
+            with TestClient(_app(engine)) as cliente:
+                # Una llamada de calentamiento por variante
+                cliente.get("/actual")
+                cliente.get("/rapida")
+                t_actual, cuerpo_actual = _medir(cliente, "/actual", args.repeticiones)
+                t_rapida, cuerpo_rapida = _medir(cliente, "/rapida", args.repeticiones)
+            engine.dispose()
+
+            if json.loads(cuerpo_actual) != json.loads(cuerpo_rapida):
+                raise SystemExit(f"Las respuestas difieren con {filas} filas")
+            print(f"{filas:>8} {t_actual * 1000:>10.1f} {t_rapida * 1000:>10.1f} {t_actual / t_rapida:>11.1f}x {len(cuerpo_rapida) / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
+import logging
 import os
 from sqlmodel import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
+from src.utils.metricas import QueuePoolMedido, AsyncQueuePoolMedido, instrumentar_engine
 
 load_dotenv()
 
@@ -10,6 +14,97 @@ MYSQL_SERVER = os.getenv("MYSQL_SERVER")
 MYSQL_PORT = os.getenv("MYSQL_PORT")
 MYSQL_DB = os.getenv("MYSQL_DB")
 
-url = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_SERVER}:{MYSQL_PORT}/{MYSQL_DB}"
+# DATABASE_URL reemplaza la URL armada con las variables MYSQL_* (p. ej. sqlite:///./finanzas.db)
+url = os.getenv("DATABASE_URL") or f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_SERVER}:{MYSQL_PORT}/{MYSQL_DB}"
 
-engine = create_engine(url, echo=True)
\ No newline at end of file
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+
+
+# --- CONFIGURACIÓN DEL POOL ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# MySQL cierra conexiones inactivas (wait_timeout); se reciclan antes de que eso ocurra
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+# echo=True de SQLAlchemy agrega su propio handler a stdout; aquí las sentencias pasan por
+# el logging de la app (src/config/logs.py) y se pueden apagar con LOG_NIVELES
+if DB_ECHO:
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+
+def opciones_engine(url: str, asincrono: bool = False) -> dict:
+    """Opciones de create_engine según el entorno; también las usa el engine async."""
+    opciones = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    url_parseada = make_url(url)
+    if url_parseada.get_backend_name() == "sqlite":
+        # Las rutas sync corren en un threadpool: la conexión se usa desde varios hilos
+        opciones["connect_args"] = {"check_same_thread": False}
+        if url_parseada.database in (None, "", ":memory:"):
+            # En memoria cada conexión es una base distinta: todos los hilos comparten una sola
+            opciones["poolclass"] = StaticPool
+            return opciones
+
+    opciones.update(
+        # Igual que el pool por defecto, pero mide la espera por conexión (GET /metrics)
+        poolclass=AsyncQueuePoolMedido if asincrono else QueuePoolMedido,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE
+    )
+    return opciones
+
+
+engine = create_engine(url, **opciones_engine(url))
+instrumentar_engine(engine)
+
+
+# --- ENGINE ASYNC (opcional) ---
+# Con DB_ASYNC=true las rutas CRUD y de análisis usan AsyncSession (ver src/config/db_async.py).
+# El driver async se deduce de la URL: sqlite -> aiosqlite, mysql -> DB_ASYNC_DRIVER (aiomysql o asyncmy).
+DB_ASYNC = _env_bool("DB_ASYNC", False)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
+
+
+def _url_async(url: str) -> str:
+    url_parseada = make_url(url)
+    if url_parseada.get_backend_name() == "sqlite":
+        driver = "sqlite+aiosqlite"
+    else:
+        driver = f"{url_parseada.get_backend_name()}+{DB_ASYNC_DRIVER}"
+    return url_parseada.set(drivername=driver).render_as_string(hide_password=False)
+
+
+url_async = os.getenv("DATABASE_URL_ASYNC") or _url_async(url)
+
+
+def estadisticas_pool(motor=None) -> dict:
+    """Estado actual del pool de conexiones de un engine (por defecto el sync)."""
+    motor = motor if motor is not None else engine
+    pool = motor.pool
+    datos = {
+        "dialecto": motor.dialect.name,
+        "pool": type(pool).__name__,
+        "estado": pool.status()
+    }
+
+    if isinstance(pool, QueuePool):
+        datos.update(
+            tamano=pool.size(),
+            max_overflow=DB_MAX_OVERFLOW,
+            timeout_segundos=pool.timeout(),
+            conexiones_libres=pool.checkedin(),
+            conexiones_en_uso=pool.checkedout(),
+            overflow=pool.overflow()
+        )
+
+    return datos
@@ -0,0 +1,9 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.db import url_async, opciones_engine
+from src.utils.metricas import instrumentar_engine
+
+# Solo se importa con DB_ASYNC=true: requiere greenlet y el driver async
+# (aiomysql o asyncmy para MySQL, aiosqlite para SQLite).
+# Usa las mismas variables DB_POOL_* y DB_ECHO que el engine sync.
+async_engine = create_async_engine(url_async, **opciones_engine(url_async, asincrono=True))
+instrumentar_engine(async_engine)
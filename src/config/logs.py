@@ -0,0 +1,106 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+# Niveles por módulo: "src.auth=WARNING,sqlalchemy.engine=INFO"
+LOG_NIVELES = os.getenv("LOG_NIVELES", "")
+# Fracción de los mensajes DEBUG/INFO de autenticación que se registran (1 = todos).
+# WARNING y superiores nunca se descartan.
+LOG_MUESTREO_AUTH = float(os.getenv("LOG_MUESTREO_AUTH", "1"))
+
+# Logger de login y verificación de tokens: es el de más volumen (uno o más mensajes por request)
+LOGGER_AUTH = "src.auth"
+
+# Atributos propios de LogRecord; el resto viene de extra={...} y se agrega al JSON
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por mensaje: ts, nivel, logger, mensaje, campos extra y traza si la hay."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info:
+            datos["traza"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar una fracción de los mensajes por debajo de WARNING."""
+
+    def __init__(self, tasa: float):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.tasa
+
+
+class _QueueHandlerSinFormato(QueueHandler):
+    """
+    QueueHandler.prepare() arma el mensaje en el hilo que llama; aquí se encola el
+    record tal cual y todo el formateo ocurre en el hilo del QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _parsear_niveles(texto: str) -> Dict[str, str]:
+    niveles = {}
+    for parte in texto.split(","):
+        if "=" in parte:
+            nombre, nivel = parte.split("=", 1)
+            niveles[nombre.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def configurar_logging() -> None:
+    """
+    Instala en el logger raíz un handler que solo encola; un hilo aparte formatea a JSON
+    y escribe en stdout. Idempotente: llamarla varias veces no duplica handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(FormateadorJSON())
+
+    raiz = logging.getLogger()
+    raiz.setLevel(LOG_NIVEL)
+    raiz.addHandler(_QueueHandlerSinFormato(cola))
+
+    for nombre, nivel in _parsear_niveles(LOG_NIVELES).items():
+        logging.getLogger(nombre).setLevel(nivel)
+
+    if LOG_MUESTREO_AUTH < 1:
+        logging.getLogger(LOGGER_AUTH).addFilter(FiltroMuestreo(LOG_MUESTREO_AUTH))
+
+    _listener = QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    # Vacía la cola al terminar el proceso
+    atexit.register(_listener.stop)
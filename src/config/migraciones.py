@@ -0,0 +1,145 @@
+import logging
+from typing import List, Tuple
+from sqlalchemy import Index, UniqueConstraint, func, inspect, select
+from sqlmodel import SQLModel
+from src import models  # registra todas las tablas en SQLModel.metadata
+
+log = logging.getLogger(__name__)
+
+# El esquema ya no se crea al importar la app: se aplica con
+#     python -m src.config.migraciones
+# antes de arrancar (o en cada deploy). Solo agrega lo que falta; nunca borra ni modifica columnas.
+
+# Valores repetidos que se muestran por restricción única bloqueada
+_MAX_DUPLICADOS = 20
+
+
+def tablas_faltantes(engine) -> List[str]:
+    """Tablas del modelo que no existen en la base de datos (una sola consulta al catálogo)."""
+    existentes = set(inspect(engine).get_table_names())
+    return [tabla.name for tabla in SQLModel.metadata.sorted_tables if tabla.name not in existentes]
+
+
+def indices_faltantes(engine) -> List[Index]:
+    """Índices declarados en los modelos que faltan en tablas ya existentes."""
+    inspector = inspect(engine)
+    existentes = set(inspector.get_table_names())
+    faltantes = []
+    for tabla in SQLModel.metadata.sorted_tables:
+        if tabla.name not in existentes:
+            continue
+        nombres = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+        faltantes.extend(indice for indice in tabla.indexes if indice.name not in nombres)
+    return faltantes
+
+
+def restricciones_faltantes(engine) -> List[UniqueConstraint]:
+    """
+    Restricciones únicas declaradas en los modelos (p. ej. uq_item_nombre) que faltan en tablas
+    ya existentes. Se buscan también entre los índices únicos: así las crea migrar() y así
+    las reporta MySQL.
+    """
+    inspector = inspect(engine)
+    existentes = set(inspector.get_table_names())
+    faltantes = []
+    for tabla in SQLModel.metadata.sorted_tables:
+        if tabla.name not in existentes:
+            continue
+        nombres = {restriccion["name"] for restriccion in inspector.get_unique_constraints(tabla.name)}
+        nombres |= {indice["name"] for indice in inspector.get_indexes(tabla.name) if indice.get("unique")}
+        faltantes.extend(sorted(
+            (restriccion for restriccion in tabla.constraints
+             if isinstance(restriccion, UniqueConstraint) and restriccion.name not in nombres),
+            key=lambda restriccion: restriccion.name
+        ))
+    return faltantes
+
+
+def valores_duplicados(engine, restriccion: UniqueConstraint) -> List[Tuple[tuple, int]]:
+    """Valores que ya se repiten en las columnas de la restricción (impiden crearla), con cuántas filas tiene cada uno."""
+    columnas = list(restriccion.columns)
+    statement = (
+        select(*columnas, func.count())
+        .group_by(*columnas)
+        .having(func.count() > 1)
+        .order_by(func.count().desc())
+        .limit(_MAX_DUPLICADOS)
+    )
+    with engine.connect() as conexion:
+        return [(tuple(fila[:-1]), fila[-1]) for fila in conexion.execute(statement)]
+
+
+def _describir_restriccion(restriccion: UniqueConstraint, duplicados: List[Tuple[tuple, int]]) -> str:
+    columnas = ", ".join(columna.name for columna in restriccion.columns)
+    texto = f"restricción {restriccion.name} ({restriccion.table.name}: {columnas})"
+    if duplicados:
+        valores = "; ".join(f"{', '.join(map(repr, valores))} x{filas}" for valores, filas in duplicados)
+        texto += f" bloqueada por valores repetidos: {valores}"
+    return texto
+
+
+def pendientes(engine) -> List[str]:
+    """Todo lo que migrar() crearía, con los duplicados que impiden crear cada restricción única."""
+    return (
+        [f"tabla {nombre}" for nombre in tablas_faltantes(engine)]
+        + [f"índice {indice.name}" for indice in indices_faltantes(engine)]
+        + [_describir_restriccion(r, valores_duplicados(engine, r)) for r in restricciones_faltantes(engine)]
+    )
+
+
+def migrar(engine) -> List[str]:
+    """
+    Crea las tablas (con sus índices), los índices y las restricciones únicas que falten.
+    Devuelve lo que creó. Una restricción con valores repetidos no se crea: queda en el log
+    y en `--verificar` hasta que se corrijan los datos.
+    """
+    tablas = tablas_faltantes(engine)
+    indices = indices_faltantes(engine)
+    restricciones = restricciones_faltantes(engine)
+
+    SQLModel.metadata.create_all(engine, tables=[SQLModel.metadata.tables[nombre] for nombre in tablas])
+    for indice in indices:
+        indice.create(engine)
+
+    creadas = []
+    for restriccion in restricciones:
+        duplicados = valores_duplicados(engine, restriccion)
+        if duplicados:
+            log.warning("Restricción única sin crear", extra={"objeto": _describir_restriccion(restriccion, duplicados)})
+            continue
+        # Como índice único: SQLite no admite ALTER TABLE ... ADD CONSTRAINT y en MySQL es lo mismo
+        Index(restriccion.name, *restriccion.columns, unique=True).create(engine)
+        creadas.append(restriccion)
+
+    creados = (
+        [f"tabla {nombre}" for nombre in tablas]
+        + [f"índice {indice.name}" for indice in indices]
+        + [f"restricción {restriccion.name}" for restriccion in creadas]
+    )
+    for creado in creados:
+        log.info("Migración aplicada", extra={"objeto": creado})
+    return creados
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.config.migraciones [--verificar]
+    import argparse
+    import sys
+    from src.config.db import engine
+
+    parser = argparse.ArgumentParser(description="Crea las tablas, índices y restricciones únicas que falten en la base de datos.")
+    parser.add_argument("--verificar", action="store_true", help="Solo informar lo pendiente; sale con código 1 si hay algo")
+    args = parser.parse_args()
+
+    if args.verificar:
+        faltante = pendientes(engine)
+        print("\n".join(faltante) if faltante else "Esquema al día")
+        sys.exit(1 if faltante else 0)
+
+    creados = migrar(engine)
+    print("\n".join(creados) if creados else "Esquema al día: nada que crear")
+    # Lo que quedó sin crear (restricciones con valores repetidos)
+    faltante = pendientes(engine)
+    if faltante:
+        print("Pendiente:\n" + "\n".join(faltante))
+        sys.exit(1)
@@ -1,7 +1,16 @@
-from typing import Annotated
+import hashlib
+import logging
+import os
+import time
+from typing import Annotated, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from dotenv import load_dotenv
+from src.utils.cache import CacheLRU
+from src.config.logs import LOGGER_AUTH
+
+load_dotenv()
 
 # --- CONFIGURACIÓN ---
 ADMIN_USERNAME = "admin_master"
@@ -11,14 +20,23 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Login y tokens; admite muestreo con LOG_MUESTREO_AUTH
+log_auth = logging.getLogger(LOGGER_AUTH)
 
-def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
-    """
-    Decodifica el JWT y retorna los datos del usuario.
-    NO valida contra la base de datos, solo decodifica el token.
-    """
+# Vigencia de los tokens emitidos por /token
+TOKEN_EXPIRA_MINUTOS = int(os.getenv("TOKEN_EXPIRA_MINUTOS", "720"))
+
+# Tokens ya verificados: sha256(token) -> usuario
+cache_tokens = CacheLRU(
+    max_entradas=int(os.getenv("TOKEN_CACHE_MAX", "4096")),
+    ttl_segundos=float(os.getenv("TOKEN_CACHE_TTL", "300"))
+)
+
+
+def _decodificar(token: str) -> Tuple[dict, Optional[int]]:
+    """Verifica la firma y arma el usuario. Devuelve (usuario, exp del token o None)."""
     try:
-        # Decodificar el token
+        # Decodificar el token (jwt.decode también rechaza tokens con exp vencido)
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         
         username: str = payload.get("username")
@@ -27,7 +45,7 @@ def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
         rol: str = payload.get("rol")
         
         if username is None:
-            print("❌ Token sin username")
+            log_auth.warning("Token sin username")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido: falta username",
@@ -38,7 +56,7 @@ def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
         try:
             user_id = int(user_id_str) if user_id_str is not None else 0
         except (ValueError, TypeError):
-            print(f"❌ Error convirtiendo user_id: {user_id_str}")
+            log_auth.warning("Error convirtiendo user_id: %s", user_id_str)
             user_id = 0
         
         user_dict = {
@@ -48,18 +66,19 @@ def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
             "rol": rol if rol is not None else "user"
         }
         
-        print(f"✅ Token decodificado exitosamente para usuario: {username} (ID: {user_id})")
-        return user_dict
+        return user_dict, payload.get("exp")
         
+    except HTTPException:
+        raise
     except JWTError as e:
-        print(f"❌ Error JWTError al decodificar token: {e}")
+        log_auth.warning("Token inválido o expirado: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
             headers={"WWW-Authenticate": "Bearer"}
         )
     except Exception as e:
-        print(f"❌ Error inesperado al decodificar token: {e}")
+        log_auth.exception("Error inesperado al decodificar token")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Error procesando token",
@@ -67,14 +86,42 @@ def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
         )
 
 
+def decode_token(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    """
+    Decodifica el JWT y retorna los datos del usuario.
+    NO valida contra la base de datos, solo decodifica el token.
+    Los tokens ya verificados se guardan en cache_tokens hasta su exp (como máximo
+    TOKEN_CACHE_TTL), así que cada token se decodifica una vez y no en cada request.
+    """
+    clave = hashlib.sha256(token.encode()).digest()
+    usuario = cache_tokens.get(clave)
+    
+    if usuario is None:
+        usuario, exp = _decodificar(token)
+        ttl = None if exp is None else exp - time.time()
+        cache_tokens.set(clave, usuario, ttl_segundos=ttl)
+    
+    # Copia: una ruta que modifique el dict no altera lo cacheado
+    return dict(usuario)
+
+
+def encode_token(payload: dict) -> str:
+    """Codifica un payload en un token JWT con emisión (iat) y vencimiento (exp)."""
+    ahora = int(time.time())
+    claims = {**payload, "iat": ahora, "exp": ahora + TOKEN_EXPIRA_MINUTOS * 60}
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
 def verify_admin_role(user: Annotated[dict, Depends(decode_token)]) -> bool:
     """Verifica si el usuario tiene rol de administrador."""
     if user.get("rol") != ADMIN_ROL:
-        print(f"❌ Acceso denegado: usuario '{user.get('username')}' tiene rol '{user.get('rol')}', se requiere '{ADMIN_ROL}'")
+        log_auth.warning(
+            "Acceso denegado: se requiere rol %s", ADMIN_ROL,
+            extra={"usuario": user.get("username"), "rol": user.get("rol")}
+        )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permiso denegado: Se requiere rol de administrador"
         )
     
-    print(f"✅ Acceso admin verificado para: {user.get('username')}")
     return True
\ No newline at end of file
@@ -1,146 +1,244 @@
+import time
+
+# Antes de cualquier otro import: la fase "importacion" del arranque se mide desde aquí
+_INICIO_IMPORTACION = time.perf_counter()
+
+import hmac
+import logging
 import os
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
-from jose import jwt
-from sqlmodel import SQLModel, select
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import select
 from src.routes.db_session import SessionDep
-from src.config.db import engine
+from src.config.logs import configurar_logging
+from src.config.db import engine, estadisticas_pool, DB_ASYNC
+from src.config.migraciones import tablas_faltantes
 from src import models
+from src.utils.passwords import verificar_async, hashear_async
+from src.utils.metricas import MiddlewareMetricas, exportar_prometheus, arranque_segundos
+from src.utils.presupuesto_consultas import configurar_detector
+from src.utils.agregador_plataforma import agregador
+from src.utils.recursos_estaticos import RecursosEstaticos
 from src.routes.item_router import items_router
 from src.routes.inversion_router import inversion_router
 from src.routes.gasto_router import gasto_router
 from src.routes.analisis_router import analisis_router
+from src.routes.importacion_router import importacion_router
+from src.routes.exportacion_router import exportacion_router
+from src.routes.chat_router import chat_router
+from src.routes.admin_router import admin_router
 
 # Seguridad
-from src.dependencies import oauth2_scheme, decode_token, verify_admin_role, ADMIN_USERNAME, ADMIN_ROL
+from src.dependencies import oauth2_scheme, decode_token, encode_token, verify_admin_role, log_auth, ADMIN_USERNAME, ADMIN_ROL
 
-# Gemini
-import google.generativeai as genai
 from dotenv import load_dotenv
-from pydantic import BaseModel
 
 load_dotenv()
 
-# Configurar Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
 # --- CONFIGURACIÓN DE RUTAS ---
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 
+# --- COMPRESIÓN DE RESPUESTAS ---
+# Las respuestas de la API a partir de este tamaño se comprimen con gzip si el cliente lo acepta
+GZIP_MINIMO_BYTES = int(os.getenv("GZIP_MINIMO_BYTES", "1024"))
+GZIP_NIVEL = int(os.getenv("GZIP_NIVEL", "6"))
+
 # --- CONFIGURACIÓN DEL ADMIN ---
 ADMIN_PASSWORD = "super_secure_admin_password"
 
-# --- CONFIGURACIÓN INICIAL ---
-SQLModel.metadata.create_all(engine)
+# --- ARRANQUE ---
+# Al arrancar se comprueba que existan las tablas (una consulta); el esquema se crea con
+# `python -m src.config.migraciones`, no al importar la app
+DB_VERIFICAR_ESQUEMA = os.getenv("DB_VERIFICAR_ESQUEMA", "true").lower() in ("1", "true", "yes")
+
+log = logging.getLogger(__name__)
+
+# Plantillas y estáticos en memoria, con variantes gzip/brotli y nombres con hash (se cargan en el arranque)
+estaticos = RecursosEstaticos(STATIC_DIR, TEMPLATES_DIR)
+
+
+@contextmanager
+def _fase(tiempos: dict, nombre: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[nombre] = time.perf_counter() - inicio
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque y apagado de cada worker. Importar src.main no toca la base de datos ni arranca hilos:
+    todo eso ocurre aquí, y la duración de cada fase queda en el log y en /metrics.
+    """
+    tiempos = {"importacion": time.perf_counter() - _INICIO_IMPORTACION}
+    inicio = time.perf_counter()
+
+    with _fase(tiempos, "logging"):
+        configurar_logging()
+    with _fase(tiempos, "detector_n1"):
+        configurar_detector()
+    if DB_VERIFICAR_ESQUEMA:
+        with _fase(tiempos, "esquema"):
+            faltantes = await run_in_threadpool(tablas_faltantes, engine)
+        if faltantes:
+            log.warning("Faltan tablas: ejecutar python -m src.config.migraciones", extra={"tablas": faltantes})
+    with _fase(tiempos, "estaticos"):
+        await run_in_threadpool(estaticos.cargar)
+    with _fase(tiempos, "agregador"):
+        # Analítica de plataforma para /admin/plataforma (AGREGADOR_INTERVALO_SEGUNDOS=0 lo desactiva)
+        agregador.iniciar()
+
+    tiempos["total"] = tiempos["importacion"] + time.perf_counter() - inicio
+    for nombre, segundos in tiempos.items():
+        arranque_segundos.establecer(segundos, (nombre,))
+    log.info("Arranque completo", extra={f"{nombre}_ms": round(segundos * 1000, 1) for nombre, segundos in tiempos.items()})
+
+    yield
+
+    agregador.detener()
+    engine.dispose()
+    if DB_ASYNC:
+        await async_engine.dispose()
+
 
 # Crear instancia
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Latencia, códigos de estado y consultas por ruta (ver GET /metrics)
+app.add_middleware(MiddlewareMetricas)
+
+# JSON y CSV grandes comprimidos; los estáticos ya llegan comprimidos y el middleware los deja pasar
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMO_BYTES, compresslevel=GZIP_NIVEL)
 
-# Montar archivos estáticos (CSS, JS, imágenes)
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# Con DB_ASYNC=true las rutas CRUD y de análisis se sirven con AsyncSession.
+# Se registran primero para que tengan prioridad; lotes, importación y exportación
+# siguen en los routers sync.
+if DB_ASYNC:
+    from src.config.db_async import async_engine
+    from src.routes.item_async_router import items_async_router
+    from src.routes.gasto_async_router import gasto_async_router
+    from src.routes.inversion_async_router import inversion_async_router
+    from src.routes.analisis_async_router import analisis_async_router
+
+    app.include_router(items_async_router)
+    app.include_router(gasto_async_router)
+    app.include_router(inversion_async_router)
+    app.include_router(analisis_async_router)
 
 # Incluir routers de API
 app.include_router(items_router)
 app.include_router(inversion_router)
 app.include_router(gasto_router)
 app.include_router(analisis_router)
+app.include_router(importacion_router)
+app.include_router(exportacion_router)
+app.include_router(chat_router)
+app.include_router(admin_router)
 
 
 
 # RUTAS PARA SERVIR ARCHIVOS HTML
 
 
+def _pagina(nombre: str, request: Request, detalle: str):
+    respuesta = estaticos.pagina(nombre, request.headers)
+    if respuesta is None:
+        raise HTTPException(status_code=404, detail=detalle)
+    return respuesta
+
+
+@app.api_route("/static/{ruta:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(ruta: str, request: Request):
+    """Sirve CSS y JS desde memoria; las rutas con hash se cachean como immutable"""
+    respuesta = estaticos.archivo(ruta, request.headers)
+    if respuesta is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return respuesta
+
+
+
 @app.get("/", include_in_schema=False)
-async def serve_login():
+async def serve_login(request: Request):
     """Sirve la página de login"""
-    login_path = TEMPLATES_DIR / "login.html"
-    if login_path.is_file():
-        return FileResponse(login_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Login page not found")
+    return _pagina("login.html", request, "Login page not found")
 
 
 @app.get("/register", include_in_schema=False)
-async def serve_register():
+async def serve_register(request: Request):
     """Sirve la página de registro"""
-    register_path = TEMPLATES_DIR / "register.html"
-    if register_path.is_file():
-        return FileResponse(register_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Register page not found")
+    return _pagina("register.html", request, "Register page not found")
 
 
 @app.get("/dashboard", include_in_schema=False)
-async def serve_dashboard():
+async def serve_dashboard(request: Request):
     """Sirve el dashboard principal"""
-    dashboard_path = TEMPLATES_DIR / "dashboard.html"
-    if dashboard_path.is_file():
-        return FileResponse(dashboard_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Dashboard not found")
+    return _pagina("dashboard.html", request, "Dashboard not found")
 
 
 @app.get("/inversiones", include_in_schema=False)
-async def serve_inversiones():
+async def serve_inversiones(request: Request):
     """Sirve la página de inversiones"""
-    inversiones_path = TEMPLATES_DIR / "inversiones.html"
-    if inversiones_path.is_file():
-        return FileResponse(inversiones_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Inversiones page not found")
+    return _pagina("inversiones.html", request, "Inversiones page not found")
 
 
 @app.get("/gastos", include_in_schema=False)
-async def serve_gastos():
+async def serve_gastos(request: Request):
     """Sirve la página de gastos"""
-    gastos_path = TEMPLATES_DIR / "gastos.html"
-    if gastos_path.is_file():
-        return FileResponse(gastos_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Gastos page not found")
+    return _pagina("gastos.html", request, "Gastos page not found")
 
 
 @app.get("/analisis", include_in_schema=False)
-async def serve_analisis():
+async def serve_analisis(request: Request):
     """Sirve la página de análisis"""
-    analisis_path = TEMPLATES_DIR / "analisis.html"
-    if analisis_path.is_file():
-        return FileResponse(analisis_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Analisis page not found")
+    return _pagina("analisis.html", request, "Analisis page not found")
 
 @app.get("/admin-dashboard", include_in_schema=False)
-async def serve_admin_dashboard():
+async def serve_admin_dashboard(request: Request):
     """Sirve el panel de administración"""
-    admin_path = TEMPLATES_DIR / "admin-dashboard.html"
-    if admin_path.is_file():
-        return FileResponse(admin_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Admin dashboard not found")
+    return _pagina("admin-dashboard.html", request, "Admin dashboard not found")
 
 
 # LOGIN Y AUTENTICACIÓN
 
 
-def encode_token(payload: dict) -> str:
-    """Codifica un payload en un token JWT"""
-    return jwt.encode(payload, "my-secret", algorithm="HS256")
+def _buscar_usuario(db, nombre: str):
+    statement = select(models.Item).where(models.Item.nombre == nombre)
+    return db.exec(statement).first()
+
+
+def _guardar_hash(db, user, nuevo_hash: str) -> None:
+    user.contraseña = nuevo_hash
+    db.add(user)
+    db.commit()
 
 
 @app.post("/token", tags=['login'])
-def login(
+async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: SessionDep
 ):
-    """Verifica credenciales y devuelve el token de acceso."""
+    """
+    Verifica credenciales y devuelve el token de acceso.
+    Es async: las consultas van al threadpool y el hash al pool de src/utils/passwords,
+    así una ráfaga de logins no deja sin hilos al resto de las rutas.
+    """
     
-    print(f"\n{'='*50}")
-    print(f"🔐 Intento de login para usuario: {form_data.username}")
-    print(f"{'='*50}")
+    log_auth.debug("Intento de login", extra={"usuario": form_data.username})
 
     # 1. MANEJO DEL ADMIN
     if form_data.username == ADMIN_USERNAME:
-        if form_data.password == ADMIN_PASSWORD:
+        if hmac.compare_digest(form_data.password.encode(), ADMIN_PASSWORD.encode()):
             payload = {
                 "username": ADMIN_USERNAME,
                 "email": "admin@system.com",
@@ -148,25 +246,25 @@ def login(
                 "sub": "0"
             }
             token = encode_token(payload)
-            print(f"✅ Admin login exitoso")
+            log_auth.info("Login exitoso", extra={"usuario": ADMIN_USERNAME})
             return {
                 "access_token": token,
                 "token_type": "bearer"
             }
         else:
-            print("❌ Contraseña de admin incorrecta")
+            log_auth.warning("Contraseña de admin incorrecta")
             raise HTTPException(status_code=400, detail="Credenciales incorrectas")
 
     # 2. USUARIOS REGULARES
-    statement = select(models.Item).where(models.Item.nombre == form_data.username)
-    user = db.exec(statement).first()
+    user = await run_in_threadpool(_buscar_usuario, db, form_data.username)
 
     if not user:
-        print(f"❌ Usuario '{form_data.username}' no encontrado en DB")
+        log_auth.warning("Login fallido: usuario no encontrado", extra={"usuario": form_data.username})
         raise HTTPException(status_code=400, detail="Credenciales incorrectas")
     
-    if form_data.password != user.contraseña:
-        print(f"❌ Contraseña incorrecta para usuario '{form_data.username}'")
+    coincide, rehashear = await verificar_async(form_data.password, user.contraseña)
+    if not coincide:
+        log_auth.warning("Login fallido: contraseña incorrecta", extra={"usuario": form_data.username})
         raise HTTPException(status_code=400, detail="Credenciales incorrectas")
 
     payload = {
@@ -175,11 +273,15 @@ def login(
         "rol": user.rol,
         "sub": str(user.id)
     }
+
+    # Filas en texto plano (o con menos iteraciones) se actualizan al hash vigente
+    if rehashear:
+        nuevo_hash = await hashear_async(form_data.password)
+        await run_in_threadpool(_guardar_hash, db, user, nuevo_hash)
     
     token = encode_token(payload)
     
-    print(f"✅ Usuario '{user.nombre}' login exitoso")
-    print(f"{'='*50}\n")
+    log_auth.info("Login exitoso", extra={"usuario": payload["username"]})
     
     return {
         "access_token": token,
@@ -205,94 +307,13 @@ def admin_dashboard(
     }
 
 
-# CHATBOT GEMINI
+@app.get("/admin/db/pool", tags=['admin'])
+def admin_db_pool(is_admin: Annotated[bool, Depends(verify_admin_role)]):
+    """Estado del pool de conexiones: conexiones en uso, libres y overflow."""
+    if DB_ASYNC:
+        return {"sync": estadisticas_pool(), "async": estadisticas_pool(async_engine)}
+    return estadisticas_pool()
 
-class ChatRequest(BaseModel):
-    message: str
-
-
-@app.get("/chat/models", tags=["chat"])
-async def list_available_models():
-    """Lista todos los modelos de Gemini disponibles para tu API key."""
-    try:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            return {"error": "API key no configurada en .env"}
-        
-        models_list = []
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                models_list.append({
-                    "name": m.name,
-                    "display_name": m.display_name,
-                    "description": m.description
-                })
-        
-        if not models_list:
-            return {
-                "error": "No hay modelos disponibles",
-                "suggestion": "Tu API key puede ser inválida o estar restringida. Genera una nueva en https://aistudio.google.com/app/apikey"
-            }
-        
-        return {"available_models": models_list, "total": len(models_list)}
-        
-    except Exception as e:
-        return {
-            "error": str(e), 
-            "suggestion": "Verifica tu API key en https://aistudio.google.com/app/apikey"
-        }
-
-
-@app.post("/chat", tags=["chat"])
-async def chat_endpoint(req: ChatRequest):
-    try:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            return {"error": "API key no configurada"}
-        
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
-        
-        # Sistema prompt para respuestas concisas pero completas
-        system_prompt = """Eres un asistente financiero experto y amigable. 
-        Proporciona respuestas claras, estructuradas pero resumidas para no saturar al usuario. 
-        Si la respuesta es larga, organízala con bullets o numeración.
-        Siempre termina con un punto o pregunta."""
-        
-        full_message = f"{system_prompt}\n\nUsuario: {req.message}"
-        
-        response = model.generate_content(
-            full_message,
-            generation_config=genai.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=2048,
-                top_p=0.95,
-                top_k=40
-            )
-        )
-        
-        reply = response.text
-        
-        # Detectar truncamiento
-        is_truncated = (
-            hasattr(response.candidates[0], 'finish_reason') and
-            response.candidates[0].finish_reason.name == "MAX_TOKENS"
-        ) or not reply.strip()[-1] in '.!?'
-        
-        if is_truncated:
-            reply += "\n\n💡 *La respuesta fue resumida. ¿Quieres más detalles sobre algún punto específico?*"
-        
-        return {
-            "reply": reply,
-            "model_used": "gemini-2.5-flash",
-            "truncated": is_truncated
-        }
-        
-    except Exception as e:
-        print(f"❌ Error en chat: {e}")
-        return {
-            "error": "Error al procesar mensaje",
-            "suggestion": "Intenta reformular tu pregunta"
-        }
 
 # -------------------------------
 # 🏥 HEALTH CHECK
@@ -304,4 +325,10 @@ async def health_check():
     return {
         "status": "ok",
         "message": "FinanzApp API is running"
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    return PlainTextResponse(exportar_prometheus(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
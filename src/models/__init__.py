@@ -1,6 +1,10 @@
 from .item import Item, ItemCreateIn, ItemCreateOut, ItemUpdateIn
-from .gasto import Gasto, GastoCreateIn, GastoUpdateIn, GastoRead
-from .inversion import Inversion, InversionCreateIn, InversionUpdateIn, InversionRead
+from .gasto import Gasto, GastoCreateIn, GastoUpdateIn, GastoLoteUpdateIn, GastoRead
+from .inversion import Inversion, InversionCreateIn, InversionUpdateIn, InversionLoteUpdateIn, InversionRead
+from .resumen_mensual import ResumenMensual
+from .resumen_plataforma import ResumenPlataforma, ActividadMensual, MarcaAgregador
+from .trabajo_borrado import TrabajoBorrado
+from .lote import EliminarLoteIn, ResultadoItemLote, ResultadoLote
 
 # Asegurar que las relaciones entre modelos se importen al cargar el paquete
 from . import relationships
\ No newline at end of file
@@ -1,5 +1,5 @@
 # gasto.py
-from sqlmodel import Relationship, SQLModel, Field
+from sqlmodel import Relationship, SQLModel, Field, Index
 from typing import Optional
 from datetime import date
 
@@ -21,6 +21,9 @@ class GastoUpdateIn(SQLModel):
     fecha_gasto: Optional[date] = None
     descripcion: Optional[str] = None
 
+class GastoLoteUpdateIn(GastoUpdateIn):
+    id: int = Field()
+
 class GastoRead(SQLModel):
     id: int = Field()
     tipo_gasto: str = Field()
@@ -31,6 +34,10 @@ class GastoRead(SQLModel):
 
 class Gasto(GastoBase, table=True):
     __tablename__ = "gasto"
+    __table_args__ = (
+        # Paginación por cursor: rango acotado sobre (usuario_id, fecha_gasto, id)
+        Index("ix_gasto_usuario_fecha_id", "usuario_id", "fecha_gasto", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     usuario_id: Optional[int] = Field(default=None, foreign_key="item.id")
\ No newline at end of file
@@ -1,5 +1,5 @@
 # inversion.py
-from sqlmodel import Relationship, SQLModel, Field
+from sqlmodel import Relationship, SQLModel, Field, Index
 from typing import Optional
 from datetime import date 
 
@@ -21,6 +21,9 @@ class InversionUpdateIn(SQLModel):
     fecha_inversion: Optional[date] = None
     descripcion: Optional[str] = None
 
+class InversionLoteUpdateIn(InversionUpdateIn):
+    id: int = Field()
+
 class InversionRead(SQLModel):
     id: int = Field()
     tipo_inversion: str = Field()
@@ -31,6 +34,10 @@ class InversionRead(SQLModel):
 
 class Inversion(InversionBase, table=True):
     __tablename__ = "inversion"
+    __table_args__ = (
+        # Paginación por cursor: rango acotado sobre (usuario_id, fecha_inversion, id)
+        Index("ix_inversion_usuario_fecha_id", "usuario_id", "fecha_inversion", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     usuario_id: Optional[int] = Field(default=None, foreign_key="item.id")
\ No newline at end of file
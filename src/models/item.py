@@ -1,6 +1,6 @@
 # item.py
 from __future__ import annotations
-from sqlmodel import Relationship, SQLModel, Field, Session
+from sqlmodel import Relationship, SQLModel, Field, Session, UniqueConstraint
 from typing import Optional
 
 class ItemBase(SQLModel):
@@ -28,6 +28,11 @@ class ItemCreateOut(SQLModel):
 
 class Item(ItemBase, table=True, extend_existing=True): 
     __tablename__ = "item"  # Añadir esto explícitamente
+    __table_args__ = (
+        # Login busca por nombre; ambos deben ser únicos
+        UniqueConstraint("nombre", name="uq_item_nombre"),
+        UniqueConstraint("correo", name="uq_item_correo"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     
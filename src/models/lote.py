@@ -0,0 +1,30 @@
+# lote.py
+from sqlmodel import SQLModel, Field
+from typing import List, Optional
+
+# Máximo de elementos aceptados por petición en las rutas /lote
+LOTE_MAXIMO = 1000
+
+class EliminarLoteIn(SQLModel):
+    ids: List[int] = Field()
+
+class ResultadoItemLote(SQLModel):
+    indice: int = Field()                 # posición del elemento en la petición
+    id: Optional[int] = None
+    estado: str = Field()                 # creado | actualizado | eliminado | no_encontrado | no_autorizado
+    detalle: Optional[str] = None
+
+class ResultadoLote(SQLModel):
+    procesados: int = Field()
+    errores: int = Field()
+    resultados: List[ResultadoItemLote] = Field()
+
+# Estados que cuentan como error en ResultadoLote.errores
+ESTADOS_ERROR = ("no_encontrado", "no_autorizado")
+
+def armar_resultado_lote(resultados: List[ResultadoItemLote]) -> ResultadoLote:
+    return ResultadoLote(
+        procesados=len(resultados),
+        errores=sum(1 for r in resultados if r.estado in ESTADOS_ERROR),
+        resultados=resultados
+    )
@@ -0,0 +1,26 @@
+# resumen_mensual.py
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+
+# Valores posibles de ResumenMensual.categoria
+CATEGORIA_GASTO = "gasto"
+CATEGORIA_INVERSION = "inversion"
+
+class ResumenMensual(SQLModel, table=True):
+    """
+    Acumulado por usuario, mes, categoría (gasto/inversion) y tipo.
+    Se mantiene en la misma transacción que las escrituras de gasto e inversion.
+    """
+    __tablename__ = "resumen_mensual"
+    __table_args__ = (
+        UniqueConstraint("usuario_id", "anio", "mes", "categoria", "tipo", name="uq_resumen_mensual_clave"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    usuario_id: int = Field(foreign_key="item.id", index=True)
+    anio: int = Field()
+    mes: int = Field()
+    categoria: str = Field(max_length=20)
+    tipo: str = Field(max_length=255)
+    total: float = Field(default=0.0)
+    cantidad: int = Field(default=0)
@@ -0,0 +1,52 @@
+# resumen_plataforma.py
+from datetime import datetime
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+
+
+class ResumenPlataforma(SQLModel, table=True):
+    """
+    Acumulado de todos los usuarios por mes, categoría (gasto/inversion) y tipo.
+    Lo mantiene el agregador en segundo plano (src/utils/agregador_plataforma.py), no las rutas.
+    """
+    __tablename__ = "resumen_plataforma"
+    __table_args__ = (
+        UniqueConstraint("anio", "mes", "categoria", "tipo", name="uq_resumen_plataforma_clave"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    anio: int = Field()
+    mes: int = Field()
+    categoria: str = Field(max_length=20)
+    tipo: str = Field(max_length=255)
+    total: float = Field(default=0.0)
+    cantidad: int = Field(default=0)
+
+
+class ActividadMensual(SQLModel, table=True):
+    """Una fila por usuario y mes en que registró algún movimiento (usuarios activos por mes)."""
+    __tablename__ = "actividad_mensual"
+    __table_args__ = (
+        UniqueConstraint("anio", "mes", "usuario_id", name="uq_actividad_mensual_clave"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    anio: int = Field()
+    mes: int = Field()
+    usuario_id: int = Field()
+
+
+class MarcaAgregador(SQLModel, table=True):
+    """
+    High-water mark por tabla: ultimo_id es el último id de gasto / inversion ya sumado.
+    visto_id es el máximo id observado en la corrida anterior; cada corrida suma hasta ahí,
+    así una transacción que tomó un id y todavía no confirmó tiene un intervalo para hacerlo.
+    reconciliado es la última reconciliación completa, la haya hecho el proceso que sea.
+    """
+    __tablename__ = "marca_agregador"
+
+    tabla: str = Field(primary_key=True, max_length=50)
+    ultimo_id: int = Field(default=0)
+    visto_id: int = Field(default=0)
+    actualizado: Optional[datetime] = None  # UTC
+    reconciliado: Optional[datetime] = None  # UTC
@@ -0,0 +1,24 @@
+# trabajo_borrado.py
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from typing import Optional
+
+
+class TrabajoBorrado(SQLModel, table=True):
+    """
+    Borrado de un usuario en segundo plano (src/utils/borrado_usuarios.py).
+    Vive en la base de datos para que cualquier worker responda su estado y un trabajo
+    interrumpido por un reinicio se retome con otro DELETE /items/{id}.
+    """
+    __tablename__ = "trabajo_borrado"
+
+    id: str = Field(primary_key=True, max_length=32)
+    # Sin foreign key: el usuario se borra al final del trabajo y la fila queda como registro
+    usuario_id: int = Field(index=True)
+    estado: str = Field(default="pendiente", max_length=20)  # pendiente | en_curso | completado | error
+    total: int = Field(default=0)
+    borradas: int = Field(default=0)
+    error: Optional[str] = Field(default=None, max_length=500)
+    creado: datetime = Field()  # UTC
+    actualizado: datetime = Field()  # UTC; avanza con cada bloque borrado
+    terminado: Optional[datetime] = None  # UTC
@@ -0,0 +1,253 @@
+from datetime import date
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, or_
+from sqlmodel import SQLModel, select
+from src.routes.db_session import SessionDep
+from src.models.item import Item
+from src.models.gasto import Gasto
+from src.models.inversion import Inversion
+from src.models.resumen_mensual import ResumenMensual, CATEGORIA_GASTO, CATEGORIA_INVERSION
+from src.models.resumen_plataforma import ResumenPlataforma, ActividadMensual
+from src.utils.agregador_plataforma import agregador
+from src.utils.paginacion import paginar, codificar_cursor
+from src.dependencies import verify_admin_role
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+AdminDep = Annotated[bool, Depends(verify_admin_role)]
+
+USUARIOS_POR_PAGINA_MAXIMO = 100
+
+
+# --- MODELOS DE RESPUESTA ---
+
+class UsuarioAdmin(SQLModel):
+    id: int
+    nombre: str
+    correo: str
+    rol: str
+    gastos: int
+    total_gastos: float
+    inversiones: int
+    total_inversiones: float
+    ultima_actividad: Optional[date] = None
+
+
+class PaginaUsuarios(SQLModel):
+    usuarios: List[UsuarioAdmin]
+    total: Optional[int] = None  # solo en la primera página (sin cursor)
+    siguiente: Optional[str] = None  # cursor de la página siguiente; None si es la última
+    por_pagina: int
+
+
+class ResumenUsuarios(SQLModel):
+    total: int
+    admins: int
+    con_actividad: int
+
+
+class TotalPorTipo(SQLModel):
+    tipo: str
+    total: float
+    cantidad: int
+
+
+class MesPlataforma(SQLModel):
+    anio: int
+    mes: int
+    total_gastos: float
+    total_inversiones: float
+    movimientos: int
+    usuarios_activos: int
+
+
+# --- USUARIOS ---
+
+def _filtros_usuarios(q: Optional[str], rol: Optional[str]) -> list:
+    filtros = []
+    if q:
+        # Búsqueda por prefijo: LIKE 'texto%' usa los índices únicos de nombre y correo
+        filtros.append(or_(Item.nombre.startswith(q, autoescape=True), Item.correo.startswith(q, autoescape=True)))
+    if rol:
+        filtros.append(Item.rol == rol)
+    return filtros
+
+
+def _sumar_si(categoria: str, columna):
+    return func.coalesce(func.sum(case((ResumenMensual.categoria == categoria, columna), else_=0)), 0)
+
+
+@admin_router.get("/usuarios", response_model=PaginaUsuarios)
+def get_usuarios(
+    db: SessionDep,
+    is_admin: AdminDep,
+    q: Optional[str] = Query(default=None, max_length=100, description="Prefijo de nombre o correo"),
+    rol: Optional[str] = Query(default=None, description="Filtrar por rol"),
+    orden: Literal["id", "nombre", "correo"] = Query(default="id", description="Solo columnas con índice"),
+    desc: bool = Query(default=False),
+    cursor: Optional[str] = Query(default=None, description="Valor de 'siguiente' de la página anterior"),
+    por_pagina: int = Query(default=25, ge=1, le=USUARIOS_POR_PAGINA_MAXIMO)
+):
+    """
+    Listado paginado por cursor (keyset sobre la columna de orden e id) con conteos, totales y
+    última actividad. Requiere rol de administrador. `total` se calcula solo en la primera página.
+    La página de usuarios se une al resumen mensual agrupado por usuario, y la última fecha
+    sale del índice (usuario_id, fecha) de gasto e inversion.
+    """
+    filtros = _filtros_usuarios(q, rol)
+    total = db.exec(select(func.count()).select_from(Item).where(*filtros)).one() if cursor is None else None
+
+    columna_orden = getattr(Item, orden)
+    pagina_usuarios = paginar(
+        select(Item.id, Item.nombre, Item.correo, Item.rol).where(*filtros),
+        columna_orden, Item.id, cursor, por_pagina, "desc" if desc else "asc",
+        convertir=int if orden == "id" else str
+    ).subquery()
+
+    agregados = (
+        select(
+            pagina_usuarios.c.id,
+            pagina_usuarios.c.nombre,
+            pagina_usuarios.c.correo,
+            pagina_usuarios.c.rol,
+            _sumar_si(CATEGORIA_GASTO, ResumenMensual.cantidad).label("gastos"),
+            _sumar_si(CATEGORIA_GASTO, ResumenMensual.total).label("total_gastos"),
+            _sumar_si(CATEGORIA_INVERSION, ResumenMensual.cantidad).label("inversiones"),
+            _sumar_si(CATEGORIA_INVERSION, ResumenMensual.total).label("total_inversiones"),
+        )
+        .select_from(pagina_usuarios)
+        .outerjoin(ResumenMensual, ResumenMensual.usuario_id == pagina_usuarios.c.id)
+        .group_by(pagina_usuarios.c.id, pagina_usuarios.c.nombre, pagina_usuarios.c.correo, pagina_usuarios.c.rol)
+        .subquery()
+    )
+
+    ultimo_gasto = select(func.max(Gasto.fecha_gasto)).where(Gasto.usuario_id == agregados.c.id).scalar_subquery()
+    ultima_inversion = select(func.max(Inversion.fecha_inversion)).where(Inversion.usuario_id == agregados.c.id).scalar_subquery()
+
+    columna_orden_pagina = getattr(agregados.c, orden)
+    statement = select(agregados, ultimo_gasto, ultima_inversion).order_by(
+        *([columna_orden_pagina.desc(), agregados.c.id.desc()] if desc else [columna_orden_pagina.asc(), agregados.c.id.asc()])
+    )
+
+    filas = db.exec(statement).all()
+    hay_siguiente = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+
+    usuarios = []
+    for fila in filas:
+        id_, nombre, correo, rol_, gastos, total_gastos, inversiones, total_inversiones, fecha_gasto, fecha_inversion = fila
+        fechas = [f for f in (fecha_gasto, fecha_inversion) if f is not None]
+        usuarios.append(UsuarioAdmin(
+            id=id_,
+            nombre=nombre,
+            correo=correo,
+            rol=rol_,
+            gastos=int(gastos),
+            total_gastos=round(float(total_gastos), 2),
+            inversiones=int(inversiones),
+            total_inversiones=round(float(total_inversiones), 2),
+            # SQLite devuelve el max() de un subquery escalar como texto
+            ultima_actividad=max(date.fromisoformat(f) if isinstance(f, str) else f for f in fechas) if fechas else None
+        ))
+
+    siguiente = None
+    if hay_siguiente:
+        ultimo = usuarios[-1]
+        siguiente = codificar_cursor(getattr(ultimo, orden), ultimo.id)
+    return PaginaUsuarios(usuarios=usuarios, total=total, siguiente=siguiente, por_pagina=por_pagina)
+
+
+@admin_router.get("/usuarios/resumen", response_model=ResumenUsuarios)
+def get_resumen_usuarios(db: SessionDep, is_admin: AdminDep):
+    """Totales para las tarjetas del panel: usuarios, administradores y usuarios con movimientos."""
+    total, admins = db.exec(
+        select(func.count(), func.coalesce(func.sum(case((Item.rol == "admin", 1), else_=0)), 0)).select_from(Item)
+    ).one()
+    con_actividad = db.exec(select(func.count(func.distinct(ResumenMensual.usuario_id)))).one()
+    return ResumenUsuarios(total=total, admins=int(admins), con_actividad=con_actividad)
+
+
+# --- ANALÍTICA DE PLATAFORMA ---
+# Se lee de resumen_plataforma y actividad_mensual, que llena el agregador en segundo plano
+# (src/utils/agregador_plataforma.py): los datos pueden tener hasta un intervalo de atraso.
+
+@admin_router.get("/plataforma/por-tipo", response_model=List[TotalPorTipo])
+def get_plataforma_por_tipo(
+    db: SessionDep,
+    is_admin: AdminDep,
+    categoria: Literal["gasto", "inversion"] = Query(default=CATEGORIA_GASTO),
+    mes: Optional[int] = Query(default=None, ge=1, le=12, description="Mes (1-12). Por defecto el actual"),
+    anio: Optional[int] = Query(default=None, ge=2000, description="Año. Por defecto el actual")
+):
+    """Total y cantidad por tipo de todos los usuarios en un mes. Requiere rol de administrador."""
+    hoy = date.today()
+    statement = select(ResumenPlataforma).where(
+        ResumenPlataforma.categoria == categoria,
+        ResumenPlataforma.anio == (anio or hoy.year),
+        ResumenPlataforma.mes == (mes or hoy.month)
+    ).order_by(ResumenPlataforma.total.desc())
+    return [
+        TotalPorTipo(tipo=fila.tipo, total=round(fila.total, 2), cantidad=fila.cantidad)
+        for fila in db.exec(statement)
+    ]
+
+
+@admin_router.get("/plataforma/mensual", response_model=List[MesPlataforma])
+def get_plataforma_mensual(
+    db: SessionDep,
+    is_admin: AdminDep,
+    meses: int = Query(default=12, ge=1, le=60, description="Número de meses hacia atrás")
+):
+    """Totales y usuarios activos por mes de toda la plataforma. Requiere rol de administrador."""
+    hoy = date.today()
+    desde = hoy.year * 12 + hoy.month - meses
+
+    totales = db.exec(
+        select(ResumenPlataforma.anio, ResumenPlataforma.mes, ResumenPlataforma.categoria,
+               func.sum(ResumenPlataforma.total), func.sum(ResumenPlataforma.cantidad))
+        .where(ResumenPlataforma.anio * 12 + ResumenPlataforma.mes > desde)
+        .group_by(ResumenPlataforma.anio, ResumenPlataforma.mes, ResumenPlataforma.categoria)
+    ).all()
+    activos = dict(
+        ((anio, mes), usuarios) for anio, mes, usuarios in db.exec(
+            select(ActividadMensual.anio, ActividadMensual.mes, func.count())
+            .where(ActividadMensual.anio * 12 + ActividadMensual.mes > desde)
+            .group_by(ActividadMensual.anio, ActividadMensual.mes)
+        )
+    )
+
+    resultado = {}
+    for indice in range(desde + 1, hoy.year * 12 + hoy.month + 1):
+        anio, mes = divmod(indice - 1, 12)
+        resultado[(anio, mes + 1)] = MesPlataforma(
+            anio=anio, mes=mes + 1, total_gastos=0.0, total_inversiones=0.0, movimientos=0,
+            usuarios_activos=activos.get((anio, mes + 1), 0)
+        )
+    for anio, mes, categoria, total, cantidad in totales:
+        fila = resultado.get((anio, mes))
+        if fila is None:
+            continue
+        if categoria == CATEGORIA_GASTO:
+            fila.total_gastos = round(float(total or 0), 2)
+        else:
+            fila.total_inversiones = round(float(total or 0), 2)
+        fila.movimientos += int(cantidad or 0)
+
+    return list(resultado.values())
+
+
+@admin_router.get("/agregador")
+def get_agregador(is_admin: AdminDep):
+    """Estado del agregador de plataforma: última corrida, marcas y errores. Requiere rol de administrador."""
+    return agregador.estado()
+
+
+@admin_router.post("/agregador/ejecutar")
+def ejecutar_agregador(
+    is_admin: AdminDep,
+    reconciliar: bool = Query(default=False, description="Recalcular todo desde gasto e inversion")
+):
+    """Corre el agregador ahora, sin esperar al intervalo. Requiere rol de administrador."""
+    agregador.ejecutar(forzar_reconciliacion=reconciliar)
+    return agregador.estado()
@@ -0,0 +1,116 @@
+from typing import Annotated, List
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Request
+from src.routes.db_session_async import AsyncSessionDep
+from src.dependencies import decode_token
+from src.utils.cache_analisis import responder_cacheado_async
+from src.routes.analisis_router import (
+    ResumenFinanciero,
+    GastoPorTipo,
+    InversionPorTipo,
+    DashboardAnalisis,
+    _calcular_resumen,
+    _calcular_gastos_por_tipo,
+    _calcular_inversiones_por_tipo,
+    _calcular_tendencia,
+    _calcular_dashboard,
+)
+
+# Versión async de analisis_router (se activa con DB_ASYNC=true).
+# Los cálculos son los mismos: run_sync los ejecuta sobre la conexión async
+# sin ocupar un hilo del threadpool mientras se espera a la base de datos.
+analisis_async_router = APIRouter(prefix="/analisis", tags=["Análisis Financiero"])
+
+# --- DEPENDENCIAS DE SEGURIDAD ---
+UserDep = Annotated[dict, Depends(decode_token)]
+
+
+# --- ENDPOINTS ---
+
+@analisis_async_router.get("/resumen-general", response_model=ResumenFinanciero)
+async def get_resumen_general(request: Request, db: AsyncSessionDep, user: UserDep):
+    """Resumen financiero general del usuario (ver analisis_router)."""
+    return await responder_cacheado_async(
+        request, db, user["id"], "resumen-general", None,
+        lambda: db.run_sync(_calcular_resumen, user["id"])
+    )
+
+
+@analisis_async_router.get("/resumen-mensual", response_model=ResumenFinanciero)
+async def get_resumen_mensual(
+    request: Request,
+    db: AsyncSessionDep,
+    user: UserDep,
+    mes: int = Query(default=None, ge=1, le=12, description="Mes (1-12). Si no se especifica, usa el mes actual"),
+    anio: int = Query(default=None, ge=2000, description="Año. Si no se especifica, usa el año actual")
+):
+    """Resumen financiero de un mes (por defecto el actual)."""
+    if mes is None:
+        mes = datetime.now().month
+    if anio is None:
+        anio = datetime.now().year
+
+    return await responder_cacheado_async(
+        request, db, user["id"], "resumen-mensual", (mes, anio),
+        lambda: db.run_sync(_calcular_resumen, user["id"], mes, anio)
+    )
+
+
+@analisis_async_router.get("/gastos-por-tipo", response_model=List[GastoPorTipo])
+async def get_gastos_por_tipo(
+    request: Request,
+    db: AsyncSessionDep,
+    user: UserDep,
+    mes: int = Query(default=None, ge=1, le=12, description="Filtrar por mes (opcional)"),
+    anio: int = Query(default=None, ge=2000, description="Filtrar por año (opcional)")
+):
+    """Total de gastos agrupados por tipo, opcionalmente de un mes."""
+    return await responder_cacheado_async(
+        request, db, user["id"], "gastos-por-tipo", (mes, anio),
+        lambda: db.run_sync(_calcular_gastos_por_tipo, user["id"], mes, anio)
+    )
+
+
+@analisis_async_router.get("/inversiones-por-tipo", response_model=List[InversionPorTipo])
+async def get_inversiones_por_tipo(
+    request: Request,
+    db: AsyncSessionDep,
+    user: UserDep,
+    mes: int = Query(default=None, ge=1, le=12, description="Filtrar por mes (opcional)"),
+    anio: int = Query(default=None, ge=2000, description="Filtrar por año (opcional)")
+):
+    """Total de inversiones agrupadas por tipo, opcionalmente de un mes."""
+    return await responder_cacheado_async(
+        request, db, user["id"], "inversiones-por-tipo", (mes, anio),
+        lambda: db.run_sync(_calcular_inversiones_por_tipo, user["id"], mes, anio)
+    )
+
+
+@analisis_async_router.get("/tendencia-mensual")
+async def get_tendencia_mensual(
+    request: Request,
+    db: AsyncSessionDep,
+    user: UserDep,
+    meses: int = Query(default=6, ge=1, le=24, description="Número de meses hacia atrás")
+):
+    """Tendencia de ingresos y gastos de los últimos N meses."""
+    return await responder_cacheado_async(
+        request, db, user["id"], "tendencia-mensual", meses,
+        lambda: db.run_sync(_calcular_tendencia, user["id"], meses)
+    )
+
+
+@analisis_async_router.get("/dashboard", response_model=DashboardAnalisis)
+async def get_dashboard(
+    request: Request,
+    db: AsyncSessionDep,
+    user: UserDep,
+    mes: int = Query(default=None, ge=1, le=12, description="Filtrar resumen y distribuciones por mes (opcional)"),
+    anio: int = Query(default=None, ge=2000, description="Filtrar resumen y distribuciones por año (opcional)"),
+    meses: int = Query(default=6, ge=1, le=24, description="Número de meses de la tendencia")
+):
+    """Resumen, distribuciones por tipo y tendencia en una sola respuesta."""
+    return await responder_cacheado_async(
+        request, db, user["id"], "dashboard", (mes, anio, meses),
+        lambda: db.run_sync(_calcular_dashboard, user["id"], mes, anio, meses)
+    )
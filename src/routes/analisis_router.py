@@ -1,10 +1,17 @@
-from typing import Annotated, List, Dict
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import select, func
+from typing import Annotated, Dict, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from src.routes.db_session import SessionDep
-from src.models.inversion import Inversion
-from src.models.gasto import Gasto
 from src.dependencies import decode_token
+from src.models.resumen_mensual import CATEGORIA_GASTO
+from src.utils.cache_analisis import responder_cacheado
+from src.utils.agregaciones import (
+    rango_mes,
+    obtener_totales,
+    obtener_gastos_por_tipo,
+    obtener_inversiones_por_tipo,
+    obtener_totales_mensuales,
+    obtener_grupos,
+)
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 
@@ -28,39 +35,35 @@ class GastoPorTipo(BaseModel):
     tipo_gasto: str
     total: float
     porcentaje: float
+    registros: int = 0
 
 class InversionPorTipo(BaseModel):
     tipo_inversion: str
     total: float
     porcentaje: float
+    registros: int = 0
 
+class TendenciaMes(BaseModel):
+    mes: int
+    anio: int
+    periodo: str
+    total_inversiones: float
+    total_gastos: float
+    balance: float
 
-# --- ENDPOINTS ---
+class DashboardAnalisis(BaseModel):
+    resumen: ResumenFinanciero
+    gastos_por_tipo: List[GastoPorTipo]
+    inversiones_por_tipo: List[InversionPorTipo]
+    tendencia: List[TendenciaMes]
 
-@analisis_router.get("/resumen-general", response_model=ResumenFinanciero)
-def get_resumen_general(db: SessionDep, user: UserDep):
-    """
-    Obtiene un resumen financiero general del usuario:
-    - Total de inversiones
-    - Total de gastos
-    - Balance (inversiones - gastos)
-    - Porcentaje de ahorro
-    """
-    
-    # Obtener todas las inversiones del usuario
-    statement_inv = select(Inversion).where(Inversion.usuario_id == user["id"])
-    inversiones = db.exec(statement_inv).all()
-    total_inversiones = sum(inv.cantidad_inversion for inv in inversiones)
-    
-    # Obtener todos los gastos del usuario
-    statement_gasto = select(Gasto).where(Gasto.usuario_id == user["id"])
-    gastos = db.exec(statement_gasto).all()
-    total_gastos = sum(gasto.cantidad_gasto for gasto in gastos)
-    
-    # Calcular balance
+
+# --- CONSTRUCCIÓN DE RESPUESTAS ---
+
+def _construir_resumen(total_inversiones: float, total_gastos: float, periodo: str) -> ResumenFinanciero:
+    """Calcula balance y porcentaje de ahorro a partir de los totales."""
     balance = total_inversiones - total_gastos
     
-    # Calcular porcentaje de ahorro
     if total_inversiones > 0:
         porcentaje_ahorro = (balance / total_inversiones) * 100
     else:
@@ -71,12 +74,178 @@ def get_resumen_general(db: SessionDep, user: UserDep):
         total_gastos=total_gastos,
         balance=balance,
         porcentaje_ahorro=round(porcentaje_ahorro, 2),
-        periodo="Todo el tiempo"
+        periodo=periodo
+    )
+
+
+def _construir_gastos_por_tipo(totales: List[Tuple[str, float, int]]) -> List[GastoPorTipo]:
+    """Calcula porcentajes y ordena por total descendente."""
+    total_gastos = sum(total for _, total, _ in totales)
+    resultado = [
+        GastoPorTipo(
+            tipo_gasto=tipo,
+            total=total,
+            porcentaje=round((total / total_gastos * 100) if total_gastos > 0 else 0, 2),
+            registros=registros
+        )
+        for tipo, total, registros in totales
+    ]
+    resultado.sort(key=lambda x: x.total, reverse=True)
+    return resultado
+
+
+def _construir_inversiones_por_tipo(totales: List[Tuple[str, float, int]]) -> List[InversionPorTipo]:
+    """Calcula porcentajes y ordena por total descendente."""
+    total_inversiones = sum(total for _, total, _ in totales)
+    resultado = [
+        InversionPorTipo(
+            tipo_inversion=tipo,
+            total=total,
+            porcentaje=round((total / total_inversiones * 100) if total_inversiones > 0 else 0, 2),
+            registros=registros
+        )
+        for tipo, total, registros in totales
+    ]
+    resultado.sort(key=lambda x: x.total, reverse=True)
+    return resultado
+
+
+def _construir_tendencia(totales: Dict[Tuple[int, int], Tuple[float, float]], meses: int) -> List[dict]:
+    """Arma los últimos N meses (del más antiguo al más reciente) rellenando los vacíos con ceros."""
+    fecha_actual = date.today()
+    resultado = []
+    for i in range(meses - 1, -1, -1):
+        fecha_analisis = fecha_actual - relativedelta(months=i)
+        mes = fecha_analisis.month
+        anio = fecha_analisis.year
+        
+        total_inversiones, total_gastos = totales.get((anio, mes), (0.0, 0.0))
+        
+        resultado.append({
+            "mes": mes,
+            "anio": anio,
+            "periodo": f"{mes}/{anio}",
+            "total_inversiones": total_inversiones,
+            "total_gastos": total_gastos,
+            "balance": total_inversiones - total_gastos
+        })
+    
+    return resultado
+
+
+# --- CÁLCULOS (solo se ejecutan si no hay respuesta cacheada) ---
+
+def _calcular_resumen(db, usuario_id: int, mes: int = None, anio: int = None) -> ResumenFinanciero:
+    if mes is None or anio is None:
+        total_inversiones, total_gastos = obtener_totales(db, usuario_id)
+        return _construir_resumen(total_inversiones, total_gastos, "Todo el tiempo")
+    
+    primer_dia, ultimo_dia = rango_mes(mes, anio)
+    total_inversiones, total_gastos = obtener_totales(db, usuario_id, primer_dia, ultimo_dia)
+    return _construir_resumen(total_inversiones, total_gastos, f"{mes}/{anio}")
+
+
+def _calcular_gastos_por_tipo(db, usuario_id: int, mes: int = None, anio: int = None) -> List[GastoPorTipo]:
+    primer_dia = ultimo_dia = None
+    if mes is not None and anio is not None:
+        primer_dia, ultimo_dia = rango_mes(mes, anio)
+    
+    totales = obtener_gastos_por_tipo(db, usuario_id, primer_dia, ultimo_dia)
+    return _construir_gastos_por_tipo(totales)
+
+
+def _calcular_inversiones_por_tipo(db, usuario_id: int, mes: int = None, anio: int = None) -> List[InversionPorTipo]:
+    primer_dia = ultimo_dia = None
+    if mes is not None and anio is not None:
+        primer_dia, ultimo_dia = rango_mes(mes, anio)
+    
+    totales = obtener_inversiones_por_tipo(db, usuario_id, primer_dia, ultimo_dia)
+    return _construir_inversiones_por_tipo(totales)
+
+
+def _calcular_tendencia(db, usuario_id: int, meses: int) -> List[dict]:
+    fecha_actual = date.today()
+    
+    # Rango completo: desde el primer día del mes más antiguo hasta fin del mes actual
+    primer_mes = fecha_actual - relativedelta(months=meses - 1)
+    desde, _ = rango_mes(primer_mes.month, primer_mes.year)
+    _, hasta = rango_mes(fecha_actual.month, fecha_actual.year)
+    
+    totales = obtener_totales_mensuales(db, usuario_id, desde, hasta)
+    return _construir_tendencia(totales, meses)
+
+
+def _calcular_dashboard(db, usuario_id: int, mes: int, anio: int, meses: int) -> DashboardAnalisis:
+    grupos = obtener_grupos(db, usuario_id)
+    
+    # Período del resumen y las distribuciones: un mes concreto o todo el tiempo
+    if mes is not None and anio is not None:
+        periodo = f"{mes}/{anio}"
+    else:
+        periodo = "Todo el tiempo"
+    
+    total_inversiones = 0.0
+    total_gastos = 0.0
+    gastos_por_tipo: Dict[str, Tuple[float, int]] = {}
+    inversiones_por_tipo: Dict[str, Tuple[float, int]] = {}
+    totales_mensuales: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    
+    for anio_grupo, mes_grupo, categoria, tipo, total, registros in grupos:
+        es_gasto = categoria == CATEGORIA_GASTO
+        
+        # Tendencia: todos los meses (los que no estén en la ventana se ignoran al construirla)
+        inv_mes, gasto_mes = totales_mensuales.get((anio_grupo, mes_grupo), (0.0, 0.0))
+        if es_gasto:
+            totales_mensuales[(anio_grupo, mes_grupo)] = (inv_mes, gasto_mes + total)
+        else:
+            totales_mensuales[(anio_grupo, mes_grupo)] = (inv_mes + total, gasto_mes)
+        
+        if mes is not None and anio is not None and (anio_grupo, mes_grupo) != (anio, mes):
+            continue
+        
+        if es_gasto:
+            total_gastos += total
+            suma, conteo = gastos_por_tipo.get(tipo, (0.0, 0))
+            gastos_por_tipo[tipo] = (suma + total, conteo + registros)
+        else:
+            total_inversiones += total
+            suma, conteo = inversiones_por_tipo.get(tipo, (0.0, 0))
+            inversiones_por_tipo[tipo] = (suma + total, conteo + registros)
+    
+    return DashboardAnalisis(
+        resumen=_construir_resumen(total_inversiones, total_gastos, periodo),
+        gastos_por_tipo=_construir_gastos_por_tipo(
+            [(tipo, suma, conteo) for tipo, (suma, conteo) in gastos_por_tipo.items()]
+        ),
+        inversiones_por_tipo=_construir_inversiones_por_tipo(
+            [(tipo, suma, conteo) for tipo, (suma, conteo) in inversiones_por_tipo.items()]
+        ),
+        tendencia=_construir_tendencia(totales_mensuales, meses)
+    )
+
+
+# --- ENDPOINTS ---
+# Todas las respuestas pasan por responder_cacheado: llevan ETag y responden 304
+# con If-None-Match tras una sola consulta de versión (ver src/utils/cache_analisis.py).
+
+@analisis_router.get("/resumen-general", response_model=ResumenFinanciero)
+def get_resumen_general(request: Request, db: SessionDep, user: UserDep):
+    """
+    Obtiene un resumen financiero general del usuario:
+    - Total de inversiones
+    - Total de gastos
+    - Balance (inversiones - gastos)
+    - Porcentaje de ahorro
+    """
+    return responder_cacheado(
+        request, db, user["id"], "resumen-general", None,
+        lambda: _calcular_resumen(db, user["id"])
     )
 
 
 @analisis_router.get("/resumen-mensual", response_model=ResumenFinanciero)
 def get_resumen_mensual(
+    request: Request,
     db: SessionDep, 
     user: UserDep,
     mes: int = Query(default=None, ge=1, le=12, description="Mes (1-12). Si no se especifica, usa el mes actual"),
@@ -93,51 +262,15 @@ def get_resumen_mensual(
     if anio is None:
         anio = datetime.now().year
     
-    # Calcular el primer y último día del mes
-    primer_dia = date(anio, mes, 1)
-    if mes == 12:
-        ultimo_dia = date(anio + 1, 1, 1)
-    else:
-        ultimo_dia = date(anio, mes + 1, 1)
-    
-    # Obtener inversiones del mes
-    statement_inv = select(Inversion).where(
-        Inversion.usuario_id == user["id"],
-        Inversion.fecha_inversion >= primer_dia,
-        Inversion.fecha_inversion < ultimo_dia
-    )
-    inversiones = db.exec(statement_inv).all()
-    total_inversiones = sum(inv.cantidad_inversion for inv in inversiones)
-    
-    # Obtener gastos del mes
-    statement_gasto = select(Gasto).where(
-        Gasto.usuario_id == user["id"],
-        Gasto.fecha_gasto >= primer_dia,
-        Gasto.fecha_gasto < ultimo_dia
-    )
-    gastos = db.exec(statement_gasto).all()
-    total_gastos = sum(gasto.cantidad_gasto for gasto in gastos)
-    
-    # Calcular balance
-    balance = total_inversiones - total_gastos
-    
-    # Calcular porcentaje de ahorro
-    if total_inversiones > 0:
-        porcentaje_ahorro = (balance / total_inversiones) * 100
-    else:
-        porcentaje_ahorro = 0.0
-    
-    return ResumenFinanciero(
-        total_inversiones=total_inversiones,
-        total_gastos=total_gastos,
-        balance=balance,
-        porcentaje_ahorro=round(porcentaje_ahorro, 2),
-        periodo=f"{mes}/{anio}"
+    return responder_cacheado(
+        request, db, user["id"], "resumen-mensual", (mes, anio),
+        lambda: _calcular_resumen(db, user["id"], mes, anio)
     )
 
 
 @analisis_router.get("/gastos-por-tipo", response_model=List[GastoPorTipo])
 def get_gastos_por_tipo(
+    request: Request,
     db: SessionDep, 
     user: UserDep,
     mes: int = Query(default=None, ge=1, le=12, description="Filtrar por mes (opcional)"),
@@ -148,58 +281,15 @@ def get_gastos_por_tipo(
     Muestra qué categorías consumen más dinero.
     Opcionalmente se puede filtrar por mes y año.
     """
-    
-    # Construir query base
-    statement = select(Gasto).where(Gasto.usuario_id == user["id"])
-    
-    # Aplicar filtros de fecha si se especifican
-    if mes is not None and anio is not None:
-        primer_dia = date(anio, mes, 1)
-        if mes == 12:
-            ultimo_dia = date(anio + 1, 1, 1)
-        else:
-            ultimo_dia = date(anio, mes + 1, 1)
-        
-        statement = statement.where(
-            Gasto.fecha_gasto >= primer_dia,
-            Gasto.fecha_gasto < ultimo_dia
-        )
-    
-    # Obtener todos los gastos
-    gastos = db.exec(statement).all()
-    
-    if not gastos:
-        return []
-    
-    # Agrupar por tipo
-    gastos_por_tipo: Dict[str, float] = {}
-    for gasto in gastos:
-        if gasto.tipo_gasto in gastos_por_tipo:
-            gastos_por_tipo[gasto.tipo_gasto] += gasto.cantidad_gasto
-        else:
-            gastos_por_tipo[gasto.tipo_gasto] = gasto.cantidad_gasto
-    
-    # Calcular total
-    total_gastos = sum(gastos_por_tipo.values())
-    
-    # Crear lista de resultados con porcentajes
-    resultado = []
-    for tipo, total in gastos_por_tipo.items():
-        porcentaje = (total / total_gastos * 100) if total_gastos > 0 else 0
-        resultado.append(GastoPorTipo(
-            tipo_gasto=tipo,
-            total=total,
-            porcentaje=round(porcentaje, 2)
-        ))
-    
-    # Ordenar por total descendente
-    resultado.sort(key=lambda x: x.total, reverse=True)
-    
-    return resultado
+    return responder_cacheado(
+        request, db, user["id"], "gastos-por-tipo", (mes, anio),
+        lambda: _calcular_gastos_por_tipo(db, user["id"], mes, anio)
+    )
 
 
 @analisis_router.get("/inversiones-por-tipo", response_model=List[InversionPorTipo])
 def get_inversiones_por_tipo(
+    request: Request,
     db: SessionDep, 
     user: UserDep,
     mes: int = Query(default=None, ge=1, le=12, description="Filtrar por mes (opcional)"),
@@ -210,58 +300,15 @@ def get_inversiones_por_tipo(
     Muestra de dónde provienen los ingresos.
     Opcionalmente se puede filtrar por mes y año.
     """
-    
-    # Construir query base
-    statement = select(Inversion).where(Inversion.usuario_id == user["id"])
-    
-    # Aplicar filtros de fecha si se especifican
-    if mes is not None and anio is not None:
-        primer_dia = date(anio, mes, 1)
-        if mes == 12:
-            ultimo_dia = date(anio + 1, 1, 1)
-        else:
-            ultimo_dia = date(anio, mes + 1, 1)
-        
-        statement = statement.where(
-            Inversion.fecha_inversion >= primer_dia,
-            Inversion.fecha_inversion < ultimo_dia
-        )
-    
-    # Obtener todas las inversiones
-    inversiones = db.exec(statement).all()
-    
-    if not inversiones:
-        return []
-    
-    # Agrupar por tipo
-    inversiones_por_tipo: Dict[str, float] = {}
-    for inversion in inversiones:
-        if inversion.tipo_inversion in inversiones_por_tipo:
-            inversiones_por_tipo[inversion.tipo_inversion] += inversion.cantidad_inversion
-        else:
-            inversiones_por_tipo[inversion.tipo_inversion] = inversion.cantidad_inversion
-    
-    # Calcular total
-    total_inversiones = sum(inversiones_por_tipo.values())
-    
-    # Crear lista de resultados con porcentajes
-    resultado = []
-    for tipo, total in inversiones_por_tipo.items():
-        porcentaje = (total / total_inversiones * 100) if total_inversiones > 0 else 0
-        resultado.append(InversionPorTipo(
-            tipo_inversion=tipo,
-            total=total,
-            porcentaje=round(porcentaje, 2)
-        ))
-    
-    # Ordenar por total descendente
-    resultado.sort(key=lambda x: x.total, reverse=True)
-    
-    return resultado
+    return responder_cacheado(
+        request, db, user["id"], "inversiones-por-tipo", (mes, anio),
+        lambda: _calcular_inversiones_por_tipo(db, user["id"], mes, anio)
+    )
 
 
 @analisis_router.get("/tendencia-mensual")
 def get_tendencia_mensual(
+    request: Request,
     db: SessionDep,
     user: UserDep,
     meses: int = Query(default=6, ge=1, le=24, description="Número de meses hacia atrás")
@@ -270,53 +317,27 @@ def get_tendencia_mensual(
     Obtiene la tendencia de ingresos y gastos de los últimos N meses.
     Útil para graficar la evolución financiera.
     """
-    
-    resultado = []
-    fecha_actual = date.today()
-    
-    for i in range(meses):
-        # Calcular el mes a analizar (restando meses)
-        fecha_analisis = fecha_actual - relativedelta(months=i)
-        mes = fecha_analisis.month
-        anio = fecha_analisis.year
-        
-        # Primer y último día del mes
-        primer_dia = date(anio, mes, 1)
-        if mes == 12:
-            ultimo_dia = date(anio + 1, 1, 1)
-        else:
-            ultimo_dia = date(anio, mes + 1, 1)
-        
-        # Inversiones del mes
-        statement_inv = select(Inversion).where(
-            Inversion.usuario_id == user["id"],
-            Inversion.fecha_inversion >= primer_dia,
-            Inversion.fecha_inversion < ultimo_dia
-        )
-        inversiones = db.exec(statement_inv).all()
-        total_inversiones = sum(inv.cantidad_inversion for inv in inversiones)
-        
-        # Gastos del mes
-        statement_gasto = select(Gasto).where(
-            Gasto.usuario_id == user["id"],
-            Gasto.fecha_gasto >= primer_dia,
-            Gasto.fecha_gasto < ultimo_dia
-        )
-        gastos = db.exec(statement_gasto).all()
-        total_gastos = sum(gasto.cantidad_gasto for gasto in gastos)
-        
-        balance = total_inversiones - total_gastos
-        
-        resultado.append({
-            "mes": mes,
-            "anio": anio,
-            "periodo": f"{mes}/{anio}",
-            "total_inversiones": total_inversiones,
-            "total_gastos": total_gastos,
-            "balance": balance
-        })
-    
-    # Invertir para que el más antiguo esté primero
-    resultado.reverse()
-    
-    return resultado
\ No newline at end of file
+    return responder_cacheado(
+        request, db, user["id"], "tendencia-mensual", meses,
+        lambda: _calcular_tendencia(db, user["id"], meses)
+    )
+
+
+@analisis_router.get("/dashboard", response_model=DashboardAnalisis)
+def get_dashboard(
+    request: Request,
+    db: SessionDep,
+    user: UserDep,
+    mes: int = Query(default=None, ge=1, le=12, description="Filtrar resumen y distribuciones por mes (opcional)"),
+    anio: int = Query(default=None, ge=2000, description="Filtrar resumen y distribuciones por año (opcional)"),
+    meses: int = Query(default=6, ge=1, le=24, description="Número de meses de la tendencia")
+):
+    """
+    Devuelve en una sola respuesta lo que entregan resumen-general (o resumen-mensual),
+    gastos-por-tipo, inversiones-por-tipo y tendencia-mensual.
+    Todo se calcula a partir de una única consulta sobre el resumen mensual.
+    """
+    return responder_cacheado(
+        request, db, user["id"], "dashboard", (mes, anio, meses),
+        lambda: _calcular_dashboard(db, user["id"], mes, anio, meses)
+    )
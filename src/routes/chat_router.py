@@ -0,0 +1,278 @@
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, AsyncIterator, Iterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
+from src.dependencies import decode_token, verify_admin_role
+from src.utils.cache import CacheLRU
+from src.utils.limitador import LimitadorConcurrencia
+from src.utils.proveedores_chat import ConfigGeneracion, ErrorProveedorChat, RespuestaChat, crear_proveedor
+
+chat_router = APIRouter(prefix="/chat", tags=["chat"])
+
+log = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+CHAT_MAX_CONCURRENTES = int(os.getenv("CHAT_MAX_CONCURRENTES", "8"))
+CHAT_MAX_POR_USUARIO = int(os.getenv("CHAT_MAX_POR_USUARIO", "2"))
+CHAT_TIMEOUT_SEGUNDOS = float(os.getenv("CHAT_TIMEOUT_SEGUNDOS", "30"))
+CHAT_CACHE_MAX = int(os.getenv("CHAT_CACHE_MAX", "256"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+# Respuestas más largas que esto (en bytes UTF-8) no se guardan
+CHAT_CACHE_MAX_BYTES = int(os.getenv("CHAT_CACHE_MAX_BYTES", "16384"))
+
+# Sistema prompt para respuestas concisas pero completas
+SYSTEM_PROMPT = """Eres un asistente financiero experto y amigable.
+        Proporciona respuestas claras, estructuradas pero resumidas para no saturar al usuario.
+        Si la respuesta es larga, organízala con bullets o numeración.
+        Siempre termina con un punto o pregunta."""
+
+AVISO_TRUNCADO = "\n\n💡 *La respuesta fue resumida. ¿Quieres más detalles sobre algún punto específico?*"
+
+proveedor = crear_proveedor()
+limitador = LimitadorConcurrencia(CHAT_MAX_CONCURRENTES, CHAT_MAX_POR_USUARIO)
+
+# Respuestas por (proveedor, modelo, pregunta normalizada, configuración de generación).
+# El prompt no incluye datos del usuario, así que la caché se comparte entre usuarios.
+cache_chat = CacheLRU(max_entradas=CHAT_CACHE_MAX, ttl_segundos=CHAT_CACHE_TTL)
+
+# Lista de modelos: se pide una vez por proceso; POST /chat/models/refresh la vuelve a pedir
+_modelos_cacheados: Optional[List[dict]] = None
+
+# Las llamadas al proveedor son bloqueantes: corren en este pool, no en el event loop ni
+# en el threadpool de las rutas sync. Su tamaño acota también las llamadas que siguen
+# vivas después de un timeout.
+_executor = ThreadPoolExecutor(max_workers=CHAT_MAX_CONCURRENTES, thread_name_prefix="chat")
+
+# El token es opcional: si viene, el cupo se lleva por usuario; si no, por IP
+oauth2_opcional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+def _clave_cliente(request: Request, token: Optional[str]) -> str:
+    if token:
+        try:
+            return f"usuario:{decode_token(token)['id']}"
+        except HTTPException:
+            pass
+    return f"ip:{request.client.host if request.client else 'desconocido'}"
+
+
+def _reservar_cupo(request: Request, token: Optional[str]) -> str:
+    clave = _clave_cliente(request, token)
+    if not limitador.reservar(clave):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas consultas al asistente en curso. Intenta de nuevo en unos segundos.",
+            headers={"Retry-After": "5"}
+        )
+    return clave
+
+
+def _clave_cache(mensaje: str, config: ConfigGeneracion) -> tuple:
+    # Mayúsculas, espacios repetidos y signos al inicio o final no cambian la pregunta
+    normalizado = " ".join(mensaje.lower().split()).strip("¿?¡!. ")
+    return (proveedor.nombre, proveedor.modelo, normalizado, config)
+
+
+def _guardar_en_cache(clave: tuple, respuesta: RespuestaChat) -> None:
+    if len(respuesta.texto.encode("utf-8")) <= CHAT_CACHE_MAX_BYTES:
+        cache_chat.set(clave, respuesta)
+
+
+def _esta_truncada(texto: str, cortada_por_limite: bool) -> bool:
+    """Detectar truncamiento: límite de tokens o respuesta sin cierre."""
+    return cortada_por_limite or not texto.strip() or texto.strip()[-1] not in ".!?"
+
+
+def _armar_respuesta(respuesta: RespuestaChat) -> dict:
+    reply = respuesta.texto
+    is_truncated = _esta_truncada(reply, respuesta.cortada_por_limite)
+    if is_truncated:
+        reply += AVISO_TRUNCADO
+
+    return {
+        "reply": reply,
+        "model_used": respuesta.modelo,
+        "truncated": is_truncated
+    }
+
+
+async def _en_executor(funcion, *args, timeout: float):
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(_executor, funcion, *args), timeout)
+
+
+async def _listar_modelos(refrescar: bool = False) -> List[dict]:
+    global _modelos_cacheados
+    if _modelos_cacheados is None or refrescar:
+        _modelos_cacheados = await _en_executor(proveedor.listar_modelos, timeout=CHAT_TIMEOUT_SEGUNDOS)
+    return _modelos_cacheados
+
+
+async def _respuesta_modelos(refrescar: bool = False):
+    try:
+        models_list = await _listar_modelos(refrescar)
+
+        if not models_list:
+            return {
+                "error": "No hay modelos disponibles",
+                "suggestion": "Tu API key puede ser inválida o estar restringida. Genera una nueva en https://aistudio.google.com/app/apikey"
+            }
+
+        return {"available_models": models_list, "total": len(models_list)}
+
+    except ErrorProveedorChat as e:
+        return {"error": e.mensaje, "suggestion": e.sugerencia}
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="El proveedor de chat no respondió a tiempo")
+    except Exception as e:
+        return {
+            "error": str(e),
+            "suggestion": "Verifica tu API key en https://aistudio.google.com/app/apikey"
+        }
+
+
+@chat_router.get("/models")
+async def list_available_models():
+    """Lista los modelos del proveedor de chat disponibles para tu API key (cacheada en el proceso)."""
+    return await _respuesta_modelos()
+
+
+@chat_router.post("/models/refresh")
+async def refresh_available_models(is_admin: Annotated[bool, Depends(verify_admin_role)]):
+    """Vuelve a pedir la lista de modelos al proveedor. Requiere rol de administrador."""
+    return await _respuesta_modelos(refrescar=True)
+
+
+@chat_router.get("/estadisticas")
+def chat_estadisticas(is_admin: Annotated[bool, Depends(verify_admin_role)]):
+    """Aciertos y fallos de la caché de respuestas y consultas en curso. Requiere rol de administrador."""
+    return {
+        "cache": cache_chat.estadisticas(),
+        "concurrencia": limitador.estadisticas(),
+        "modelos_cacheados": _modelos_cacheados is not None
+    }
+
+
+@chat_router.post("")
+async def chat_endpoint(
+    req: ChatRequest,
+    request: Request,
+    token: Annotated[Optional[str], Depends(oauth2_opcional)]
+):
+    """Envía un mensaje al asistente y devuelve la respuesta completa."""
+    config = ConfigGeneracion()
+    clave_cache = _clave_cache(req.message, config)
+
+    # Una pregunta repetida se responde sin ocupar cupo ni llamar al proveedor
+    respuesta = cache_chat.get(clave_cache)
+    if respuesta is not None:
+        return _armar_respuesta(respuesta)
+
+    clave = _reservar_cupo(request, token)
+    try:
+        full_message = f"{SYSTEM_PROMPT}\n\nUsuario: {req.message}"
+        respuesta = await _en_executor(
+            proveedor.generar, full_message, config, CHAT_TIMEOUT_SEGUNDOS,
+            timeout=CHAT_TIMEOUT_SEGUNDOS
+        )
+        _guardar_en_cache(clave_cache, respuesta)
+        return _armar_respuesta(respuesta)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="El asistente tardó demasiado en responder")
+    except ErrorProveedorChat as e:
+        return {"error": e.mensaje, "suggestion": e.sugerencia}
+    except Exception:
+        log.exception("Error en chat")
+        return {
+            "error": "Error al procesar mensaje",
+            "suggestion": "Intenta reformular tu pregunta"
+        }
+    finally:
+        limitador.liberar(clave)
+
+
+# --- STREAMING (Server-Sent Events) ---
+
+def _sse(datos: dict, evento: Optional[str] = None) -> str:
+    linea_evento = f"event: {evento}\n" if evento else ""
+    return f"{linea_evento}data: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def _eventos_cacheados(respuesta: RespuestaChat) -> AsyncIterator[str]:
+    texto = _armar_respuesta(respuesta)
+    yield _sse({"delta": texto["reply"]})
+    yield _sse({"truncated": texto["truncated"]}, evento="fin")
+
+
+async def _eventos_chat(fragmentos: Iterator[str], clave: str, clave_cache: tuple) -> AsyncIterator[str]:
+    """
+    Consume el iterador bloqueante del proveedor fragmento a fragmento en el executor.
+    El timeout se aplica a la respuesta completa, no a cada fragmento.
+    """
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + CHAT_TIMEOUT_SEGUNDOS
+    partes = []
+    try:
+        while True:
+            restante = limite - loop.time()
+            if restante <= 0:
+                raise asyncio.TimeoutError
+            fragmento = await _en_executor(next, fragmentos, None, timeout=restante)
+            if fragmento is None:
+                break
+            partes.append(fragmento)
+            yield _sse({"delta": fragmento})
+
+        texto = "".join(partes)
+        # Solo se cachea una respuesta completa (sin timeout ni error)
+        _guardar_en_cache(clave_cache, RespuestaChat(texto=texto, modelo=proveedor.modelo.split("/")[-1]))
+        is_truncated = _esta_truncada(texto, False)
+        if is_truncated:
+            yield _sse({"delta": AVISO_TRUNCADO})
+        yield _sse({"truncated": is_truncated}, evento="fin")
+
+    except asyncio.TimeoutError:
+        yield _sse({"error": "El asistente tardó demasiado en responder"}, evento="error")
+    except ErrorProveedorChat as e:
+        yield _sse({"error": e.mensaje, "suggestion": e.sugerencia}, evento="error")
+    except Exception:
+        log.exception("Error en chat (stream)")
+        yield _sse({"error": "Error al procesar mensaje", "suggestion": "Intenta reformular tu pregunta"}, evento="error")
+    finally:
+        # También se ejecuta si el cliente corta la conexión
+        limitador.liberar(clave)
+
+
+@chat_router.post("/stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    token: Annotated[Optional[str], Depends(oauth2_opcional)]
+):
+    """
+    Igual que POST /chat pero responde con Server-Sent Events: un evento `data` por
+    fragmento ({"delta": ...}) y un evento `fin` (o `error`) al terminar.
+    """
+    config = ConfigGeneracion()
+    clave_cache = _clave_cache(req.message, config)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    respuesta = cache_chat.get(clave_cache)
+    if respuesta is not None:
+        return StreamingResponse(_eventos_cacheados(respuesta), media_type="text/event-stream", headers=headers)
+
+    clave = _reservar_cupo(request, token)
+    full_message = f"{SYSTEM_PROMPT}\n\nUsuario: {req.message}"
+    fragmentos = proveedor.generar_stream(full_message, config, CHAT_TIMEOUT_SEGUNDOS)
+
+    return StreamingResponse(_eventos_chat(fragmentos, clave, clave_cache), media_type="text/event-stream", headers=headers)
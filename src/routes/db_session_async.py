@@ -0,0 +1,13 @@
+from typing import Annotated, AsyncGenerator
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config.db_async import async_engine
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False: tras el commit los atributos siguen cargados y
+    # serializar la respuesta no dispara consultas implícitas (no permitidas en async)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import os
+from datetime import date
+from typing import Annotated, Iterator, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from src.config.db import engine
+from src.models.gasto import Gasto
+from src.models.inversion import Inversion
+from src.dependencies import decode_token
+
+exportacion_router = APIRouter(prefix="/exportar", tags=["Exportación"])
+
+# --- DEPENDENCIAS DE SEGURIDAD ---
+UserDep = Annotated[dict, Depends(decode_token)]
+
+# Filas que el cursor del servidor entrega por cada ida a la base de datos
+EXPORTACION_FILAS_POR_LOTE = int(os.getenv("EXPORTACION_FILAS_POR_LOTE", "1000"))
+
+# Destino -> (columnas exportadas, columna de fecha, columna de usuario)
+DESTINOS = {
+    "gastos": (
+        (Gasto.id, Gasto.tipo_gasto, Gasto.cantidad_gasto, Gasto.fecha_gasto, Gasto.descripcion),
+        Gasto.fecha_gasto,
+        Gasto.usuario_id,
+    ),
+    "inversiones": (
+        (Inversion.id, Inversion.tipo_inversion, Inversion.cantidad_inversion, Inversion.fecha_inversion, Inversion.descripcion),
+        Inversion.fecha_inversion,
+        Inversion.usuario_id,
+    ),
+}
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# Filas por trozo enviado: se envía en trozos de tamaño acotado, no fila por fila
+_FILAS_POR_TROZO = 500
+
+
+def _filas(statement) -> Iterator[tuple]:
+    """
+    Recorre el resultado con un cursor del lado del servidor (stream_results), de a
+    EXPORTACION_FILAS_POR_LOTE filas. La sesión se abre al empezar a enviar y se cierra
+    (devolviendo la conexión al pool) apenas termina o se corta la descarga.
+    """
+    with Session(engine) as db:
+        resultado = db.connection(
+            execution_options={"stream_results": True, "yield_per": EXPORTACION_FILAS_POR_LOTE}
+        ).execute(statement)
+        try:
+            for fila in resultado:
+                yield tuple(fila)
+        finally:
+            resultado.close()
+
+
+def _como_csv(columnas, filas: Iterator[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for i, fila in enumerate(filas, start=1):
+        escritor.writerow(fila)
+        if i % _FILAS_POR_TROZO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def _como_ndjson(columnas, filas: Iterator[tuple]) -> Iterator[str]:
+    lineas = []
+    for fila in filas:
+        lineas.append(json.dumps(
+            {columna: valor.isoformat() if isinstance(valor, date) else valor for columna, valor in zip(columnas, fila)},
+            ensure_ascii=False
+        ))
+        if len(lineas) == _FILAS_POR_TROZO:
+            yield "\n".join(lineas) + "\n"
+            lineas = []
+    if lineas:
+        yield "\n".join(lineas) + "\n"
+
+
+@exportacion_router.get("/{destino}")
+def exportar(
+    destino: Literal["gastos", "inversiones"],
+    user: UserDep,
+    formato: Literal["csv", "ndjson"] = Query(default="csv"),
+    desde: Optional[date] = Query(default=None, description="Fecha inicial (incluida)"),
+    hasta: Optional[date] = Query(default=None, description="Fecha final (incluida)")
+):
+    """
+    Descarga todos los gastos o inversiones del usuario autenticado en CSV o NDJSON.
+    Las filas se leen y envían a medida que llegan, sin cargarlas todas en memoria.
+    """
+    if desde is not None and hasta is not None and desde > hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'desde' no puede ser posterior a 'hasta'"
+        )
+
+    columnas, columna_fecha, columna_usuario = DESTINOS[destino]
+    statement = select(*columnas).where(columna_usuario == user["id"])
+    if desde is not None:
+        statement = statement.where(columna_fecha >= desde)
+    if hasta is not None:
+        statement = statement.where(columna_fecha <= hasta)
+    statement = statement.order_by(columna_fecha, columnas[0])
+
+    nombres = [columna.key for columna in columnas]
+    cuerpo = _como_csv(nombres, _filas(statement)) if formato == "csv" else _como_ndjson(nombres, _filas(statement))
+
+    return StreamingResponse(
+        cuerpo,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{destino}.{formato}"'}
+    )
@@ -0,0 +1,132 @@
+from datetime import date
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from src.routes.db_session_async import AsyncSessionDep
+from src.routes.gasto_router import consulta_gastos, COLUMNAS_GASTO_READ
+from src.models.gasto import Gasto, GastoCreateIn, GastoUpdateIn, GastoRead
+from src.dependencies import decode_token
+from src.utils.resumenes import registrar_gasto
+from src.utils.paginacion import paginar, codificar_cursor, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+from src.utils.serializacion import SERIALIZACION_RAPIDA, respuesta_filas
+
+# Versión async de las rutas CRUD de gasto_router (se activa con DB_ASYNC=true).
+# Los IDs usan el convertidor :int para que /gastos/lote siga llegando a gasto_router.
+# El resumen mensual se mantiene con las mismas funciones sync vía run_sync,
+# dentro de la misma transacción.
+gasto_async_router = APIRouter(prefix="/gastos", tags=["Gastos"])
+
+# --- DEPENDENCIAS DE SEGURIDAD ---
+UserDep = Annotated[dict, Depends(decode_token)]
+
+# --- RUTAS DE LECTURA (GET) ---
+
+@gasto_async_router.get("/", response_model=List[GastoRead])
+async def get_gastos(
+    db: AsyncSessionDep,
+    user: UserDep,
+    response: Response,
+    limit: int = Query(default=LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    cursor: Optional[str] = Query(default=None, description="Valor de X-Next-Cursor de la página anterior"),
+    orden: Literal["desc", "asc"] = Query(default="desc", description="Orden por fecha (y id)"),
+    desde: Optional[date] = Query(default=None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[date] = Query(default=None, description="Fecha máxima (inclusive)"),
+    tipo: Optional[str] = Query(default=None, description="Filtrar por tipo_gasto"),
+    cantidad_min: Optional[float] = Query(default=None, description="Cantidad mínima"),
+    cantidad_max: Optional[float] = Query(default=None, description="Cantidad máxima")
+):
+    """
+    Obtiene los gastos del usuario autenticado, paginados por cursor sobre (fecha, id).
+    Si hay más resultados, el cursor de la siguiente página viene en la cabecera X-Next-Cursor.
+    """
+    statement = consulta_gastos(
+        user["id"], desde, hasta, tipo, cantidad_min, cantidad_max,
+        columnas=COLUMNAS_GASTO_READ if SERIALIZACION_RAPIDA else None
+    )
+    statement = paginar(statement, Gasto.fecha_gasto, Gasto.id, cursor, limit, orden)
+    gastos = (await db.exec(statement)).all()
+
+    # Se pidió una fila de más: si llegó, hay página siguiente
+    if len(gastos) > limit:
+        gastos = gastos[:limit]
+        ultimo = gastos[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(ultimo.fecha_gasto, ultimo.id)
+
+    if SERIALIZACION_RAPIDA:
+        return respuesta_filas(gastos, COLUMNAS_GASTO_READ, response)
+    return gastos
+
+@gasto_async_router.get("/{gasto_id:int}", response_model=GastoRead)
+async def get_gasto_by_id(gasto_id: int, db: AsyncSessionDep, user: UserDep):
+    """Obtiene un gasto específico del usuario autenticado por ID."""
+    gasto = await db.get(Gasto, gasto_id)
+
+    if not gasto:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Gasto no encontrado")
+
+    # Seguridad: Asegurar que el gasto pertenezca al usuario autenticado (a menos que sea Admin)
+    if gasto.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para ver este gasto")
+
+    return gasto
+
+# --- RUTA DE CREACIÓN (POST) ---
+
+@gasto_async_router.post("/", response_model=GastoRead, status_code=status.HTTP_201_CREATED)
+async def create_gasto(gasto_in: GastoCreateIn, db: AsyncSessionDep, user: UserDep):
+    """Crea un nuevo gasto para el usuario autenticado."""
+    db_gasto = Gasto.model_validate(gasto_in)
+    db_gasto.usuario_id = user["id"]
+
+    db.add(db_gasto)
+    await db.run_sync(registrar_gasto, db_gasto)
+    await db.commit()
+    await db.refresh(db_gasto)
+    return db_gasto
+
+# --- RUTA DE ACTUALIZACIÓN (PUT) ---
+
+@gasto_async_router.put("/{gasto_id:int}", response_model=GastoRead)
+async def update_gasto(gasto_id: int, gasto_in: GastoUpdateIn, db: AsyncSessionDep, user: UserDep):
+    """Actualiza un gasto existente del usuario autenticado por ID."""
+    db_gasto = await db.get(Gasto, gasto_id)
+
+    if not db_gasto:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Gasto no encontrado")
+
+    # Seguridad: Asegurar que el gasto pertenezca al usuario autenticado (a menos que sea Admin)
+    if db_gasto.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para modificar este gasto")
+
+    update_data = gasto_in.model_dump(exclude_unset=True)
+
+    # Restar el estado anterior del resumen (puede cambiar de mes o de tipo)
+    await db.run_sync(registrar_gasto, db_gasto, -1)
+
+    for key, value in update_data.items():
+        setattr(db_gasto, key, value)
+
+    db.add(db_gasto)
+    await db.run_sync(registrar_gasto, db_gasto)
+    await db.commit()
+    await db.refresh(db_gasto)
+    return db_gasto
+
+# --- RUTA DE ELIMINACIÓN (DELETE) ---
+
+@gasto_async_router.delete("/{gasto_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_gasto(gasto_id: int, db: AsyncSessionDep, user: UserDep):
+    """Elimina un gasto existente del usuario autenticado por ID."""
+    db_gasto = await db.get(Gasto, gasto_id)
+
+    if not db_gasto:
+        # Se devuelve 204 incluso si no se encuentra para mantener la idempotencia.
+        return
+
+    # Seguridad: Asegurar que el gasto pertenezca al usuario autenticado (a menos que sea Admin)
+    if db_gasto.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para eliminar este gasto")
+
+    await db.run_sync(registrar_gasto, db_gasto, -1)
+    await db.delete(db_gasto)
+    await db.commit()
+    return
@@ -1,9 +1,15 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import select
+from datetime import date
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlmodel import select, delete
 from src.routes.db_session import SessionDep
-from src.models.gasto import Gasto, GastoCreateIn, GastoUpdateIn, GastoRead
+from src.models.gasto import Gasto, GastoCreateIn, GastoUpdateIn, GastoLoteUpdateIn, GastoRead
+from src.models.lote import EliminarLoteIn, ResultadoItemLote, ResultadoLote, LOTE_MAXIMO, armar_resultado_lote
 from src.dependencies import decode_token # Para obtener el ID del usuario
+from src.utils.resumenes import registrar_gasto, DeltaResumen
+from src.utils.insercion_lote import insertar_filas
+from src.utils.paginacion import paginar, codificar_cursor, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+from src.utils.serializacion import SERIALIZACION_RAPIDA, columnas_de, respuesta_filas
 
 gasto_router = APIRouter(prefix="/gastos", tags=["Gastos"])
 
@@ -11,18 +17,74 @@ gasto_router = APIRouter(prefix="/gastos", tags=["Gastos"])
 # Usa decode_token para obtener el usuario autenticado
 UserDep = Annotated[dict, Depends(decode_token)]
 
+# --- CONSULTAS (compartidas con la versión async) ---
+
+def consulta_gastos(
+    usuario_id: int,
+    desde: Optional[date],
+    hasta: Optional[date],
+    tipo: Optional[str],
+    cantidad_min: Optional[float],
+    cantidad_max: Optional[float],
+    columnas: Optional[tuple] = None
+):
+    """SELECT de gastos del usuario con los filtros opcionales del listado (o solo `columnas`, si se indican)."""
+    # Filtrar por el ID del usuario
+    statement = select(*columnas) if columnas else select(Gasto)
+    statement = statement.where(Gasto.usuario_id == usuario_id)
+    
+    if desde is not None:
+        statement = statement.where(Gasto.fecha_gasto >= desde)
+    if hasta is not None:
+        statement = statement.where(Gasto.fecha_gasto <= hasta)
+    if tipo is not None:
+        statement = statement.where(Gasto.tipo_gasto == tipo)
+    if cantidad_min is not None:
+        statement = statement.where(Gasto.cantidad_gasto >= cantidad_min)
+    if cantidad_max is not None:
+        statement = statement.where(Gasto.cantidad_gasto <= cantidad_max)
+    return statement
+
+
+# Columnas de GastoRead para la serialización rápida (SERIALIZACION_RAPIDA)
+COLUMNAS_GASTO_READ = columnas_de(Gasto, GastoRead)
+
 # --- RUTAS DE LECTURA (GET) ---
 
 @gasto_router.get("/", response_model=List[GastoRead])
-def get_gastos(db: SessionDep, user: UserDep):
-    """Obtiene todos los gastos del usuario autenticado."""
-    # Filtrar por el ID del usuario
-    statement = select(Gasto).where(Gasto.usuario_id == user["id"])
+def get_gastos(
+    db: SessionDep,
+    user: UserDep,
+    response: Response,
+    limit: int = Query(default=LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    cursor: Optional[str] = Query(default=None, description="Valor de X-Next-Cursor de la página anterior"),
+    orden: Literal["desc", "asc"] = Query(default="desc", description="Orden por fecha (y id)"),
+    desde: Optional[date] = Query(default=None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[date] = Query(default=None, description="Fecha máxima (inclusive)"),
+    tipo: Optional[str] = Query(default=None, description="Filtrar por tipo_gasto"),
+    cantidad_min: Optional[float] = Query(default=None, description="Cantidad mínima"),
+    cantidad_max: Optional[float] = Query(default=None, description="Cantidad máxima")
+):
+    """
+    Obtiene los gastos del usuario autenticado, paginados por cursor sobre (fecha, id).
+    Si hay más resultados, el cursor de la siguiente página viene en la cabecera X-Next-Cursor.
+    """
+    # Con SERIALIZACION_RAPIDA se piden tuplas en lugar de objetos ORM: sin identity map ni validación por fila
+    statement = consulta_gastos(
+        user["id"], desde, hasta, tipo, cantidad_min, cantidad_max,
+        columnas=COLUMNAS_GASTO_READ if SERIALIZACION_RAPIDA else None
+    )
+    statement = paginar(statement, Gasto.fecha_gasto, Gasto.id, cursor, limit, orden)
     gastos = db.exec(statement).all()
     
-    if not gastos and user["id"] != 0: # Si no hay gastos y no es el Admin
-        return []
+    # Se pidió una fila de más: si llegó, hay página siguiente
+    if len(gastos) > limit:
+        gastos = gastos[:limit]
+        ultimo = gastos[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(ultimo.fecha_gasto, ultimo.id)
 
+    if SERIALIZACION_RAPIDA:
+        return respuesta_filas(gastos, COLUMNAS_GASTO_READ, response)
     return gastos
 
 @gasto_router.get("/{gasto_id}", response_model=GastoRead)
@@ -52,10 +114,122 @@ def create_gasto(gasto_in: GastoCreateIn, db: SessionDep, user: UserDep):
     db_gasto.usuario_id = user["id"]
     
     db.add(db_gasto)
+    registrar_gasto(db, db_gasto)
     db.commit()
     db.refresh(db_gasto)
     return db_gasto
 
+# --- RUTAS POR LOTE ---
+# Deben registrarse antes de las rutas con /{gasto_id} para que "lote" no se tome como ID.
+
+@gasto_router.post("/lote", response_model=ResultadoLote, status_code=status.HTTP_201_CREATED)
+def create_gastos_lote(gastos_in: List[GastoCreateIn], db: SessionDep, user: UserDep):
+    """Crea varios gastos del usuario autenticado en una sola transacción."""
+    
+    if len(gastos_in) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    db_gastos = []
+    for gasto_in in gastos_in:
+        db_gasto = Gasto.model_validate(gasto_in)
+        db_gasto.usuario_id = user["id"]
+        db_gastos.append(db_gasto)
+    
+    delta = DeltaResumen()
+    for db_gasto in db_gastos:
+        delta.gasto(db_gasto)
+    
+    # Un solo executemany sin pasar los objetos por la sesión (ver src/utils/insercion_lote.py)
+    ids = insertar_filas(
+        db, Gasto, [db_gasto.model_dump(exclude={"id"}) for db_gasto in db_gastos], user["id"]
+    )
+    delta.aplicar(db)
+    
+    resultados = [
+        ResultadoItemLote(indice=indice, id=id_creado, estado="creado")
+        for indice, id_creado in enumerate(ids)
+    ]
+    
+    db.commit()
+    return armar_resultado_lote(resultados)
+
+
+@gasto_router.put("/lote", response_model=ResultadoLote)
+def update_gastos_lote(gastos_in: List[GastoLoteUpdateIn], db: SessionDep, user: UserDep):
+    """Actualiza varios gastos por ID en una sola transacción. Reporta el resultado de cada elemento."""
+    
+    if len(gastos_in) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    # Cargar todos los registros pedidos con una sola consulta
+    ids = {gasto_in.id for gasto_in in gastos_in}
+    existentes = {db_gasto.id: db_gasto for db_gasto in db.exec(select(Gasto).where(Gasto.id.in_(ids))).all()}
+    
+    delta = DeltaResumen()
+    resultados = []
+    
+    for indice, gasto_in in enumerate(gastos_in):
+        db_gasto = existentes.get(gasto_in.id)
+        
+        if not db_gasto:
+            resultados.append(ResultadoItemLote(indice=indice, id=gasto_in.id, estado="no_encontrado", detalle="Gasto no encontrado"))
+            continue
+        
+        # Seguridad: misma regla que la ruta individual (dueño o Admin)
+        if db_gasto.usuario_id != user["id"] and user["id"] != 0:
+            resultados.append(ResultadoItemLote(indice=indice, id=gasto_in.id, estado="no_autorizado", detalle="No autorizado para modificar este gasto"))
+            continue
+        
+        delta.gasto(db_gasto, signo=-1)
+        for key, value in gasto_in.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(db_gasto, key, value)
+        delta.gasto(db_gasto)
+        
+        resultados.append(ResultadoItemLote(indice=indice, id=db_gasto.id, estado="actualizado"))
+    
+    delta.aplicar(db)
+    db.commit()
+    
+    return armar_resultado_lote(resultados)
+
+
+@gasto_router.post("/lote/eliminar", response_model=ResultadoLote)
+def delete_gastos_lote(lote_in: EliminarLoteIn, db: SessionDep, user: UserDep):
+    """Elimina varios gastos por ID con un único DELETE. Reporta el resultado de cada elemento."""
+    
+    if len(lote_in.ids) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    existentes = {db_gasto.id: db_gasto for db_gasto in db.exec(select(Gasto).where(Gasto.id.in_(lote_in.ids))).all()}
+    
+    delta = DeltaResumen()
+    permitidos = set()
+    resultados = []
+    
+    for indice, gasto_id in enumerate(lote_in.ids):
+        db_gasto = existentes.get(gasto_id)
+        
+        if not db_gasto:
+            resultados.append(ResultadoItemLote(indice=indice, id=gasto_id, estado="no_encontrado", detalle="Gasto no encontrado"))
+            continue
+        
+        # Seguridad: misma regla que la ruta individual (dueño o Admin)
+        if db_gasto.usuario_id != user["id"] and user["id"] != 0:
+            resultados.append(ResultadoItemLote(indice=indice, id=gasto_id, estado="no_autorizado", detalle="No autorizado para eliminar este gasto"))
+            continue
+        
+        if gasto_id not in permitidos:
+            delta.gasto(db_gasto, signo=-1)
+            permitidos.add(gasto_id)
+        resultados.append(ResultadoItemLote(indice=indice, id=gasto_id, estado="eliminado"))
+    
+    if permitidos:
+        db.exec(delete(Gasto).where(Gasto.id.in_(permitidos)))
+        delta.aplicar(db)
+        db.commit()
+    
+    return armar_resultado_lote(resultados)
+
 # --- RUTA DE ACTUALIZACIÓN (PUT) ---
 
 @gasto_router.put("/{gasto_id}", response_model=GastoRead)
@@ -74,11 +248,15 @@ def update_gasto(gasto_id: int, gasto_in: GastoUpdateIn, db: SessionDep, user: U
     # ✅ CORRECCIÓN: Actualizar los campos correctamente
     update_data = gasto_in.model_dump(exclude_unset=True)
     
+    # Restar el estado anterior del resumen (puede cambiar de mes o de tipo)
+    registrar_gasto(db, db_gasto, signo=-1)
+    
     # Actualizar cada campo individualmente
     for key, value in update_data.items():
         setattr(db_gasto, key, value)
     
     db.add(db_gasto)
+    registrar_gasto(db, db_gasto)
     db.commit()
     db.refresh(db_gasto)
     return db_gasto
@@ -99,6 +277,7 @@ def delete_gasto(gasto_id: int, db: SessionDep, user: UserDep):
     if db_gasto.usuario_id != user["id"] and user["id"] != 0:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para eliminar este gasto")
 
+    registrar_gasto(db, db_gasto, signo=-1)
     db.delete(db_gasto)
     db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,246 @@
+import codecs
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Dict, Iterator, List, Literal, Optional
+import anyio.from_thread
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import ValidationError
+from sqlmodel import Session, insert
+from src.config.db import engine
+from src.models.gasto import Gasto, GastoCreateIn
+from src.models.inversion import Inversion, InversionCreateIn
+from src.dependencies import decode_token
+from src.utils.resumenes import DeltaResumen
+
+importacion_router = APIRouter(prefix="/importar", tags=["Importación"])
+
+# --- DEPENDENCIAS DE SEGURIDAD ---
+UserDep = Annotated[dict, Depends(decode_token)]
+
+# Filas por transacción; cada bloque se confirma por separado
+IMPORTACION_TAMANO_BLOQUE = int(os.getenv("IMPORTACION_TAMANO_BLOQUE", "1000"))
+
+# Máximo de errores detallados por evento de progreso (el total siempre se cuenta)
+MAX_ERRORES_POR_EVENTO = 50
+
+# Destino -> (tabla, modelo de entrada, campos de tipo/cantidad/fecha)
+DESTINOS = {
+    "gastos": (Gasto, GastoCreateIn, "tipo_gasto", "cantidad_gasto", "fecha_gasto"),
+    "inversiones": (Inversion, InversionCreateIn, "tipo_inversion", "cantidad_inversion", "fecha_inversion"),
+}
+
+
+def _parsear_cantidad(valor: str, separador_decimal: str) -> float:
+    valor = valor.strip().replace("$", "").replace(" ", "")
+    if separador_decimal == ",":
+        valor = valor.replace(".", "").replace(",", ".")
+    else:
+        valor = valor.replace(",", "")
+    return float(valor)
+
+
+def _evento(datos: dict) -> str:
+    return json.dumps(datos, ensure_ascii=False) + "\n"
+
+
+def _trozos_cuerpo(flujo: AsyncIterator[bytes]) -> Iterator[bytes]:
+    """
+    Recorre el cuerpo de la petición desde un hilo del threadpool: cada trozo se pide al
+    event loop a medida que llega, sin esperar a que termine la subida.
+    """
+    while True:
+        try:
+            yield anyio.from_thread.run(flujo.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+def _lineas(trozos: Iterator[str]) -> Iterator[str]:
+    """Reparte el texto decodificado en líneas completas (con su salto) para csv.reader."""
+    pendiente = ""
+    for trozo in trozos:
+        pendiente += trozo
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea + "\n"
+    if pendiente:
+        yield pendiente
+
+
+class RespuestaImportacion(StreamingResponse):
+    """
+    StreamingResponse que no escucha la desconexión en paralelo. Con servidores ASGI < 2.4
+    (uvicorn) esa escucha consume los mensajes del cuerpo que la importación todavía está
+    leyendo; aquí la desconexión llega por request.stream() como ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+def _procesar_csv(
+    lector: Iterator[List[str]],
+    indices: Dict[str, Optional[int]],
+    destino: str,
+    usuario_id: int,
+    formato_fecha: str,
+    separador_decimal: str,
+    tamano_bloque: int
+) -> Iterator[str]:
+    """
+    Lee el CSV fila a fila e inserta en bloques de `tamano_bloque`, cada uno en su propia transacción.
+    Emite un evento NDJSON por bloque; en memoria solo vive el bloque actual.
+    """
+    tabla, modelo_in, campo_tipo, campo_cantidad, campo_fecha = DESTINOS[destino]
+
+    inicio = time.perf_counter()
+    filas_leidas = 0
+    insertadas = 0
+    total_errores = 0
+    bloque: list = []
+    errores_bloque: List[dict] = []
+
+    def confirmar_bloque() -> None:
+        nonlocal insertadas
+        if bloque:
+            delta = DeltaResumen()
+            acumular = delta.gasto if tabla is Gasto else delta.inversion
+            for fila in bloque:
+                acumular(fila)
+            with Session(engine) as db:
+                # executemany en una sola ida al servidor, sin crear objetos en la sesión
+                db.connection().execute(insert(tabla), [fila.model_dump(exclude={"id"}) for fila in bloque])
+                delta.aplicar(db)
+                db.commit()
+            insertadas += len(bloque)
+
+    def progreso(evento: str) -> str:
+        duracion = time.perf_counter() - inicio
+        datos = {
+            "evento": evento,
+            "filas_leidas": filas_leidas,
+            "insertadas": insertadas,
+            "errores": total_errores,
+            "segundos": round(duracion, 3),
+            "filas_por_segundo": round(insertadas / duracion, 1) if duracion > 0 else 0.0,
+        }
+        if errores_bloque:
+            datos["errores_bloque"] = errores_bloque[:MAX_ERRORES_POR_EVENTO]
+        return _evento(datos)
+
+    try:
+        # La fila 1 es la cabecera, ya leída al validar las columnas
+        for numero_fila, fila in enumerate(lector, start=2):
+            if not any(campo.strip() for campo in fila):
+                continue
+            filas_leidas += 1
+
+            try:
+                datos = {
+                    campo_tipo: fila[indices["tipo"]].strip(),
+                    campo_cantidad: _parsear_cantidad(fila[indices["cantidad"]], separador_decimal),
+                    campo_fecha: datetime.strptime(fila[indices["fecha"]].strip(), formato_fecha).date(),
+                }
+                if indices["descripcion"] is not None:
+                    datos["descripcion"] = fila[indices["descripcion"]].strip() or None
+                registro = tabla.model_validate(modelo_in.model_validate(datos))
+                registro.usuario_id = usuario_id
+                bloque.append(registro)
+            except (IndexError, ValueError, ValidationError) as e:
+                total_errores += 1
+                errores_bloque.append({"fila": numero_fila, "error": str(e).splitlines()[0]})
+
+            if len(bloque) >= tamano_bloque:
+                confirmar_bloque()
+                yield progreso("progreso")
+                bloque.clear()
+                errores_bloque.clear()
+
+        confirmar_bloque()
+        bloque.clear()
+        yield progreso("fin")
+
+    except ClientDisconnect:
+        # El cliente cortó la subida: el bloque a medias se descarta, lo confirmado se conserva
+        return
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        # El archivo quedó ilegible a mitad de camino: lo ya confirmado se conserva
+        yield _evento({"evento": "error", "detalle": str(e), "filas_leidas": filas_leidas, "insertadas": insertadas})
+
+
+@importacion_router.post(
+    "/{destino}",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "description": "Extracto bancario en CSV",
+            "content": {"text/csv": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    }
+)
+def importar_csv(
+    destino: Literal["gastos", "inversiones"],
+    request: Request,
+    user: UserDep,
+    columna_tipo: Optional[str] = Query(default=None, description="Columna con el tipo (por defecto tipo_gasto / tipo_inversion)"),
+    columna_cantidad: Optional[str] = Query(default=None, description="Columna con la cantidad"),
+    columna_fecha: Optional[str] = Query(default=None, description="Columna con la fecha"),
+    columna_descripcion: Optional[str] = Query(default="descripcion", description="Columna con la descripción (opcional)"),
+    delimitador: str = Query(default=",", min_length=1, max_length=1),
+    formato_fecha: str = Query(default="%Y-%m-%d", description="Formato strptime de la fecha"),
+    separador_decimal: Literal[".", ","] = Query(default="."),
+    codificacion: str = Query(default="utf-8-sig"),
+    tamano_bloque: int = Query(default=IMPORTACION_TAMANO_BLOQUE, ge=1, le=10000)
+):
+    """
+    Importa un CSV (de cualquier tamaño) como gastos o inversiones del usuario autenticado.
+    El CSV es el cuerpo de la petición (text/csv), no un formulario multipart: se lee del
+    socket a medida que llega y se inserta por bloques, cada uno en su propia transacción.
+    La respuesta es NDJSON: un evento de progreso por bloque (con los errores de ese bloque)
+    y un evento final con totales y filas por segundo.
+    """
+    _, _, campo_tipo, campo_cantidad, campo_fecha = DESTINOS[destino]
+    columnas = {
+        "tipo": columna_tipo or campo_tipo,
+        "cantidad": columna_cantidad or campo_cantidad,
+        "fecha": columna_fecha or campo_fecha,
+    }
+
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envía el CSV como cuerpo de la petición (Content-Type: text/csv), no como formulario"
+        )
+
+    try:
+        # Decodificador incremental: un carácter multibyte partido entre dos trozos no rompe la lectura
+        lineas = _lineas(codecs.iterdecode(_trozos_cuerpo(request.stream()), codificacion))
+        lector = csv.reader(lineas, delimiter=delimitador)
+        cabecera = [columna.strip() for columna in next(lector)]
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Codificación desconocida: {codificacion}")
+    except (StopIteration, UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El archivo está vacío o no es un CSV válido")
+    except ClientDisconnect:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La subida se interrumpió antes de la cabecera")
+
+    faltantes = [nombre for nombre in columnas.values() if nombre not in cabecera]
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Columnas no encontradas en el CSV: {', '.join(faltantes)}"
+        )
+
+    indices = {clave: cabecera.index(nombre) for clave, nombre in columnas.items()}
+    indices["descripcion"] = cabecera.index(columna_descripcion) if columna_descripcion in cabecera else None
+
+    return RespuestaImportacion(
+        _procesar_csv(lector, indices, destino, user["id"], formato_fecha, separador_decimal, tamano_bloque),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,132 @@
+from datetime import date
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from src.routes.db_session_async import AsyncSessionDep
+from src.routes.inversion_router import consulta_inversiones, COLUMNAS_INVERSION_READ
+from src.models.inversion import Inversion, InversionCreateIn, InversionUpdateIn, InversionRead
+from src.dependencies import decode_token
+from src.utils.resumenes import registrar_inversion
+from src.utils.paginacion import paginar, codificar_cursor, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+from src.utils.serializacion import SERIALIZACION_RAPIDA, respuesta_filas
+
+# Versión async de las rutas CRUD de inversion_router (se activa con DB_ASYNC=true).
+# Los IDs usan el convertidor :int para que /inversiones/lote siga llegando a inversion_router.
+# El resumen mensual se mantiene con las mismas funciones sync vía run_sync,
+# dentro de la misma transacción.
+inversion_async_router = APIRouter(prefix="/inversiones", tags=["Inversiones"])
+
+# --- DEPENDENCIAS DE SEGURIDAD ---
+UserDep = Annotated[dict, Depends(decode_token)]
+
+# --- RUTAS DE LECTURA (GET) ---
+
+@inversion_async_router.get("/", response_model=List[InversionRead])
+async def get_inversiones(
+    db: AsyncSessionDep,
+    user: UserDep,
+    response: Response,
+    limit: int = Query(default=LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    cursor: Optional[str] = Query(default=None, description="Valor de X-Next-Cursor de la página anterior"),
+    orden: Literal["desc", "asc"] = Query(default="desc", description="Orden por fecha (y id)"),
+    desde: Optional[date] = Query(default=None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[date] = Query(default=None, description="Fecha máxima (inclusive)"),
+    tipo: Optional[str] = Query(default=None, description="Filtrar por tipo_inversion"),
+    cantidad_min: Optional[float] = Query(default=None, description="Cantidad mínima"),
+    cantidad_max: Optional[float] = Query(default=None, description="Cantidad máxima")
+):
+    """
+    Obtiene las inversiones del usuario autenticado, paginadas por cursor sobre (fecha, id).
+    Si hay más resultados, el cursor de la siguiente página viene en la cabecera X-Next-Cursor.
+    """
+    statement = consulta_inversiones(
+        user["id"], desde, hasta, tipo, cantidad_min, cantidad_max,
+        columnas=COLUMNAS_INVERSION_READ if SERIALIZACION_RAPIDA else None
+    )
+    statement = paginar(statement, Inversion.fecha_inversion, Inversion.id, cursor, limit, orden)
+    inversiones = (await db.exec(statement)).all()
+
+    # Se pidió una fila de más: si llegó, hay página siguiente
+    if len(inversiones) > limit:
+        inversiones = inversiones[:limit]
+        ultimo = inversiones[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(ultimo.fecha_inversion, ultimo.id)
+
+    if SERIALIZACION_RAPIDA:
+        return respuesta_filas(inversiones, COLUMNAS_INVERSION_READ, response)
+    return inversiones
+
+@inversion_async_router.get("/{inversion_id:int}", response_model=InversionRead)
+async def get_inversion_by_id(inversion_id: int, db: AsyncSessionDep, user: UserDep):
+    """Obtiene una inversión específica del usuario autenticado por ID."""
+    inversion = await db.get(Inversion, inversion_id)
+
+    if not inversion:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inversión no encontrada")
+
+    # Seguridad: Asegurar que la inversión pertenezca al usuario autenticado (a menos que sea Admin)
+    if inversion.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para ver esta inversión")
+
+    return inversion
+
+# --- RUTA DE CREACIÓN (POST) ---
+
+@inversion_async_router.post("/", response_model=InversionRead, status_code=status.HTTP_201_CREATED)
+async def create_inversion(inversion_in: InversionCreateIn, db: AsyncSessionDep, user: UserDep):
+    """Crea una nueva inversión para el usuario autenticado."""
+    db_inversion = Inversion.model_validate(inversion_in)
+    db_inversion.usuario_id = user["id"]
+
+    db.add(db_inversion)
+    await db.run_sync(registrar_inversion, db_inversion)
+    await db.commit()
+    await db.refresh(db_inversion)
+    return db_inversion
+
+# --- RUTA DE ACTUALIZACIÓN (PUT) ---
+
+@inversion_async_router.put("/{inversion_id:int}", response_model=InversionRead)
+async def update_inversion(inversion_id: int, inversion_in: InversionUpdateIn, db: AsyncSessionDep, user: UserDep):
+    """Actualiza una inversión existente del usuario autenticado por ID."""
+    db_inversion = await db.get(Inversion, inversion_id)
+
+    if not db_inversion:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inversión no encontrada")
+
+    # Seguridad: Asegurar que la inversión pertenezca al usuario autenticado (a menos que sea Admin)
+    if db_inversion.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para modificar esta inversión")
+
+    update_data = inversion_in.model_dump(exclude_unset=True)
+
+    # Restar el estado anterior del resumen (puede cambiar de mes o de tipo)
+    await db.run_sync(registrar_inversion, db_inversion, -1)
+
+    for key, value in update_data.items():
+        setattr(db_inversion, key, value)
+
+    db.add(db_inversion)
+    await db.run_sync(registrar_inversion, db_inversion)
+    await db.commit()
+    await db.refresh(db_inversion)
+    return db_inversion
+
+# --- RUTA DE ELIMINACIÓN (DELETE) ---
+
+@inversion_async_router.delete("/{inversion_id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_inversion(inversion_id: int, db: AsyncSessionDep, user: UserDep):
+    """Elimina una inversión existente del usuario autenticado por ID."""
+    db_inversion = await db.get(Inversion, inversion_id)
+
+    if not db_inversion:
+        # Se devuelve 204 incluso si no se encuentra para mantener la idempotencia.
+        return
+
+    # Seguridad: Asegurar que la inversión pertenezca al usuario autenticado (a menos que sea Admin)
+    if db_inversion.usuario_id != user["id"] and user["id"] != 0:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para eliminar esta inversión")
+
+    await db.run_sync(registrar_inversion, db_inversion, -1)
+    await db.delete(db_inversion)
+    await db.commit()
+    return
@@ -1,28 +1,93 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import select
+import logging
+from datetime import date
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlmodel import select, delete
 from src.routes.db_session import SessionDep
-from src.models.inversion import Inversion, InversionCreateIn, InversionUpdateIn, InversionRead
+from src.models.inversion import Inversion, InversionCreateIn, InversionUpdateIn, InversionLoteUpdateIn, InversionRead
+from src.models.lote import EliminarLoteIn, ResultadoItemLote, ResultadoLote, LOTE_MAXIMO, armar_resultado_lote
 from src.dependencies import decode_token # Para obtener el ID del usuario
+from src.utils.resumenes import registrar_inversion, DeltaResumen
+from src.utils.insercion_lote import insertar_filas
+from src.utils.paginacion import paginar, codificar_cursor, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+from src.utils.serializacion import SERIALIZACION_RAPIDA, columnas_de, respuesta_filas
 
 inversion_router = APIRouter(prefix="/inversiones", tags=["Inversiones"])
 
+log = logging.getLogger(__name__)
+
 # --- DEPENDENCIAS DE SEGURIDAD ---
 # Usa decode_token para obtener el usuario autenticado
 UserDep = Annotated[dict, Depends(decode_token)]
 
+# --- CONSULTAS (compartidas con la versión async) ---
+
+def consulta_inversiones(
+    usuario_id: int,
+    desde: Optional[date],
+    hasta: Optional[date],
+    tipo: Optional[str],
+    cantidad_min: Optional[float],
+    cantidad_max: Optional[float],
+    columnas: Optional[tuple] = None
+):
+    """SELECT de inversiones del usuario con los filtros opcionales del listado (o solo `columnas`, si se indican)."""
+    # Filtrar por el ID del usuario
+    statement = select(*columnas) if columnas else select(Inversion)
+    statement = statement.where(Inversion.usuario_id == usuario_id)
+    
+    if desde is not None:
+        statement = statement.where(Inversion.fecha_inversion >= desde)
+    if hasta is not None:
+        statement = statement.where(Inversion.fecha_inversion <= hasta)
+    if tipo is not None:
+        statement = statement.where(Inversion.tipo_inversion == tipo)
+    if cantidad_min is not None:
+        statement = statement.where(Inversion.cantidad_inversion >= cantidad_min)
+    if cantidad_max is not None:
+        statement = statement.where(Inversion.cantidad_inversion <= cantidad_max)
+    return statement
+
+
+# Columnas de InversionRead para la serialización rápida (SERIALIZACION_RAPIDA)
+COLUMNAS_INVERSION_READ = columnas_de(Inversion, InversionRead)
+
 # --- RUTAS DE LECTURA (GET) ---
 
 @inversion_router.get("/", response_model=List[InversionRead])
-def get_inversiones(db: SessionDep, user: UserDep):
-    """Obtiene todas las inversiones del usuario autenticado."""
-    # Filtrar por el ID del usuario
-    statement = select(Inversion).where(Inversion.usuario_id == user["id"])
+def get_inversiones(
+    db: SessionDep,
+    user: UserDep,
+    response: Response,
+    limit: int = Query(default=LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    cursor: Optional[str] = Query(default=None, description="Valor de X-Next-Cursor de la página anterior"),
+    orden: Literal["desc", "asc"] = Query(default="desc", description="Orden por fecha (y id)"),
+    desde: Optional[date] = Query(default=None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[date] = Query(default=None, description="Fecha máxima (inclusive)"),
+    tipo: Optional[str] = Query(default=None, description="Filtrar por tipo_inversion"),
+    cantidad_min: Optional[float] = Query(default=None, description="Cantidad mínima"),
+    cantidad_max: Optional[float] = Query(default=None, description="Cantidad máxima")
+):
+    """
+    Obtiene las inversiones del usuario autenticado, paginados por cursor sobre (fecha, id).
+    Si hay más resultados, el cursor de la siguiente página viene en la cabecera X-Next-Cursor.
+    """
+    # Con SERIALIZACION_RAPIDA se piden tuplas en lugar de objetos ORM: sin identity map ni validación por fila
+    statement = consulta_inversiones(
+        user["id"], desde, hasta, tipo, cantidad_min, cantidad_max,
+        columnas=COLUMNAS_INVERSION_READ if SERIALIZACION_RAPIDA else None
+    )
+    statement = paginar(statement, Inversion.fecha_inversion, Inversion.id, cursor, limit, orden)
     inversiones = db.exec(statement).all()
     
-    if not inversiones and user["id"] != 0: # Si no hay inversiones y no es el Admin
-        return []
+    # Se pidió una fila de más: si llegó, hay página siguiente
+    if len(inversiones) > limit:
+        inversiones = inversiones[:limit]
+        ultimo = inversiones[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(ultimo.fecha_inversion, ultimo.id)
 
+    if SERIALIZACION_RAPIDA:
+        return respuesta_filas(inversiones, COLUMNAS_INVERSION_READ, response)
     return inversiones
 
 @inversion_router.get("/{inversion_id}", response_model=InversionRead)
@@ -45,28 +110,135 @@ def get_inversion_by_id(inversion_id: int, db: SessionDep, user: UserDep):
 def create_inversion(inversion_in: InversionCreateIn, db: SessionDep, user: UserDep):
     """Crea una nueva inversión para el usuario autenticado."""
     
-    print(f"\n{'='*50}")
-    print(f"💰 Creando inversión para usuario: {user['username']} (ID: {user['id']})")
-    print(f"   Tipo: {inversion_in.tipo_inversion}")
-    print(f"   Cantidad: {inversion_in.cantidad_inversion}")
-    print(f"{'='*50}")
-    
     # Crea la instancia del modelo de DB
     db_inversion = Inversion.model_validate(inversion_in)
     
     # Asigna el usuario_id del usuario autenticado
     db_inversion.usuario_id = user["id"]
     
-    print(f"✅ Inversión creada y asignada a usuario ID: {user['id']}")
-    
     db.add(db_inversion)
+    registrar_inversion(db, db_inversion)
     db.commit()
     db.refresh(db_inversion)
-    
-    print(f"✅ Inversión guardada en DB con ID: {db_inversion.id}\n")
+
+    log.debug(
+        "Inversión creada",
+        extra={"usuario_id": user["id"], "inversion_id": db_inversion.id, "tipo": inversion_in.tipo_inversion}
+    )
     
     return db_inversion
 
+# --- RUTAS POR LOTE ---
+# Deben registrarse antes de las rutas con /{inversion_id} para que "lote" no se tome como ID.
+
+@inversion_router.post("/lote", response_model=ResultadoLote, status_code=status.HTTP_201_CREATED)
+def create_inversiones_lote(inversiones_in: List[InversionCreateIn], db: SessionDep, user: UserDep):
+    """Crea varios inversiones del usuario autenticado en una sola transacción."""
+    
+    if len(inversiones_in) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    db_inversiones = []
+    for inversion_in in inversiones_in:
+        db_inversion = Inversion.model_validate(inversion_in)
+        db_inversion.usuario_id = user["id"]
+        db_inversiones.append(db_inversion)
+    
+    delta = DeltaResumen()
+    for db_inversion in db_inversiones:
+        delta.inversion(db_inversion)
+    
+    # Un solo executemany sin pasar los objetos por la sesión (ver src/utils/insercion_lote.py)
+    ids = insertar_filas(
+        db, Inversion, [db_inversion.model_dump(exclude={"id"}) for db_inversion in db_inversiones], user["id"]
+    )
+    delta.aplicar(db)
+    
+    resultados = [
+        ResultadoItemLote(indice=indice, id=id_creado, estado="creado")
+        for indice, id_creado in enumerate(ids)
+    ]
+    
+    db.commit()
+    return armar_resultado_lote(resultados)
+
+
+@inversion_router.put("/lote", response_model=ResultadoLote)
+def update_inversiones_lote(inversiones_in: List[InversionLoteUpdateIn], db: SessionDep, user: UserDep):
+    """Actualiza varios inversiones por ID en una sola transacción. Reporta el resultado de cada elemento."""
+    
+    if len(inversiones_in) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    # Cargar todos los registros pedidos con una sola consulta
+    ids = {inversion_in.id for inversion_in in inversiones_in}
+    existentes = {db_inversion.id: db_inversion for db_inversion in db.exec(select(Inversion).where(Inversion.id.in_(ids))).all()}
+    
+    delta = DeltaResumen()
+    resultados = []
+    
+    for indice, inversion_in in enumerate(inversiones_in):
+        db_inversion = existentes.get(inversion_in.id)
+        
+        if not db_inversion:
+            resultados.append(ResultadoItemLote(indice=indice, id=inversion_in.id, estado="no_encontrado", detalle="Inversión no encontrada"))
+            continue
+        
+        # Seguridad: misma regla que la ruta individual (dueño o Admin)
+        if db_inversion.usuario_id != user["id"] and user["id"] != 0:
+            resultados.append(ResultadoItemLote(indice=indice, id=inversion_in.id, estado="no_autorizado", detalle="No autorizado para modificar esta inversión"))
+            continue
+        
+        delta.inversion(db_inversion, signo=-1)
+        for key, value in inversion_in.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(db_inversion, key, value)
+        delta.inversion(db_inversion)
+        
+        resultados.append(ResultadoItemLote(indice=indice, id=db_inversion.id, estado="actualizado"))
+    
+    delta.aplicar(db)
+    db.commit()
+    
+    return armar_resultado_lote(resultados)
+
+
+@inversion_router.post("/lote/eliminar", response_model=ResultadoLote)
+def delete_inversiones_lote(lote_in: EliminarLoteIn, db: SessionDep, user: UserDep):
+    """Elimina varios inversiones por ID con un único DELETE. Reporta el resultado de cada elemento."""
+    
+    if len(lote_in.ids) > LOTE_MAXIMO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {LOTE_MAXIMO} elementos por lote")
+    
+    existentes = {db_inversion.id: db_inversion for db_inversion in db.exec(select(Inversion).where(Inversion.id.in_(lote_in.ids))).all()}
+    
+    delta = DeltaResumen()
+    permitidos = set()
+    resultados = []
+    
+    for indice, inversion_id in enumerate(lote_in.ids):
+        db_inversion = existentes.get(inversion_id)
+        
+        if not db_inversion:
+            resultados.append(ResultadoItemLote(indice=indice, id=inversion_id, estado="no_encontrado", detalle="Inversión no encontrada"))
+            continue
+        
+        # Seguridad: misma regla que la ruta individual (dueño o Admin)
+        if db_inversion.usuario_id != user["id"] and user["id"] != 0:
+            resultados.append(ResultadoItemLote(indice=indice, id=inversion_id, estado="no_autorizado", detalle="No autorizado para eliminar esta inversión"))
+            continue
+        
+        if inversion_id not in permitidos:
+            delta.inversion(db_inversion, signo=-1)
+            permitidos.add(inversion_id)
+        resultados.append(ResultadoItemLote(indice=indice, id=inversion_id, estado="eliminado"))
+    
+    if permitidos:
+        db.exec(delete(Inversion).where(Inversion.id.in_(permitidos)))
+        delta.aplicar(db)
+        db.commit()
+    
+    return armar_resultado_lote(resultados)
+
 # --- RUTA DE ACTUALIZACIÓN (PUT) ---
 
 @inversion_router.put("/{inversion_id}", response_model=InversionRead)
@@ -85,11 +257,15 @@ def update_inversion(inversion_id: int, inversion_in: InversionUpdateIn, db: Ses
     # ✅ CORRECCIÓN: Actualizar los campos correctamente
     update_data = inversion_in.model_dump(exclude_unset=True)
     
+    # Restar el estado anterior del resumen (puede cambiar de mes o de tipo)
+    registrar_inversion(db, db_inversion, signo=-1)
+    
     # Actualizar cada campo individualmente
     for key, value in update_data.items():
         setattr(db_inversion, key, value)
     
     db.add(db_inversion)
+    registrar_inversion(db, db_inversion)
     db.commit()
     db.refresh(db_inversion)
     return db_inversion
@@ -110,6 +286,7 @@ def delete_inversion(inversion_id: int, db: SessionDep, user: UserDep):
     if db_inversion.usuario_id != user["id"] and user["id"] != 0:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado para eliminar esta inversión")
 
+    registrar_inversion(db, db_inversion, signo=-1)
     db.delete(db_inversion)
     db.commit()
     return
\ No newline at end of file
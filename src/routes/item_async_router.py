@@ -0,0 +1,84 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from src.models.item import Item, ItemCreateIn, ItemCreateOut, ItemUpdateIn
+from src.routes.db_session_async import AsyncSessionDep
+from src.utils.passwords import hashear_async
+from src.utils.borrado_usuarios import BORRADO_UMBRAL_SEGUNDO_PLANO, borrar_usuario, contar_movimientos, iniciar_borrado
+from src.routes.item_router import respuesta_borrado_en_curso
+from src.dependencies import verify_admin_role
+
+# Versión async de item_router (se activa con DB_ASYNC=true).
+items_async_router = APIRouter(prefix="/items", tags=["items CRUD"])
+
+
+async def _guardar_item(db) -> None:
+    """Commit que traduce un nombre o correo repetido (índices únicos) a 409."""
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El nombre o el correo ya están registrados")
+
+
+@items_async_router.post("/", response_model=ItemCreateOut)
+async def add_item(item_in: ItemCreateIn, db: AsyncSessionDep) -> ItemCreateOut:
+    """Crea un nuevo ítem (usuario)."""
+    db_item = Item.model_validate(item_in)
+    db_item.contraseña = await hashear_async(item_in.contraseña)
+
+    db.add(db_item)
+    await _guardar_item(db)
+    await db.refresh(db_item)
+    return db_item
+
+
+@items_async_router.put("/{item_id:int}", response_model=ItemCreateOut)
+async def update_item(
+    item_id: int,
+    item_in: ItemUpdateIn,
+    db: AsyncSessionDep,
+    is_admin: Annotated[bool, Depends(verify_admin_role)]
+):
+    """Actualiza un ítem por ID. Requiere rol de administrador."""
+    db_item = await db.get(Item, item_id)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item no encontrado")
+
+    item_data = item_in.model_dump(exclude_unset=True)
+    if item_data.get("contraseña") is not None:
+        item_data["contraseña"] = await hashear_async(item_data["contraseña"])
+
+    for key, value in item_data.items():
+        setattr(db_item, key, value)
+
+    db.add(db_item)
+    await _guardar_item(db)
+    await db.refresh(db_item)
+    return db_item
+
+
+@items_async_router.delete(
+    "/{item_id:int}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"description": "Borrado en segundo plano; consultar estado_url"}}
+)
+async def delete_item(
+    item_id: int,
+    db: AsyncSessionDep,
+    is_admin: Annotated[bool, Depends(verify_admin_role)],
+    segundo_plano: bool = Query(default=False, description="Forzar el borrado en segundo plano")
+):
+    """Elimina un ítem por ID junto con sus gastos, inversiones y resumen. Requiere rol de administrador."""
+    db_item = await db.get(Item, item_id)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item no encontrado")
+
+    total = await db.run_sync(contar_movimientos, item_id)
+    if segundo_plano or total > BORRADO_UMBRAL_SEGUNDO_PLANO:
+        return respuesta_borrado_en_curso(await run_in_threadpool(iniciar_borrado, item_id, total))
+
+    await db.run_sync(borrar_usuario, db_item)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
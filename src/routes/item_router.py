@@ -1,8 +1,15 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlmodel import select
+from typing import Annotated, List
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from src.models.item import Item, ItemCreateIn, ItemCreateOut, ItemUpdateIn
 from src.routes.db_session import SessionDep
+from src.utils.passwords import hashear_async
+from src.utils.borrado_usuarios import (
+    BORRADO_UMBRAL_SEGUNDO_PLANO, borrar_usuario, contar_movimientos, iniciar_borrado, listar_trabajos, obtener_trabajo
+)
 
 # Importamos las dependencias de seguridad desde main.py
 # (Asegúrate de que 'main.py' esté accesible o considera mover estas dependencias)
@@ -13,22 +20,31 @@ from src.dependencies import verify_admin_role, decode_token
 items_router = APIRouter(prefix="/items", tags=["items CRUD"])
 
 
-# --- RUTA GET (Abierta al público o autenticados, sin restricción de rol) ---
+def guardar_item(db) -> None:
+    """Commit que traduce un nombre o correo repetido (índices únicos) a 409."""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El nombre o el correo ya están registrados")
 
-@items_router.get("/")
-def get_items(
-    db: SessionDep
-) -> list[Item]:
-    """Obtiene todos los ítems."""
-    statement = select(Item)
-    result = db.exec(statement).all()
-    return result
+
+# El listado de usuarios vive en GET /admin/usuarios (admin, paginado por cursor).
 
 
 # --- RUTA POST (Abierta, asigna rol 'user' por defecto) ---
+# Las rutas que hashean son async: el PBKDF2 corre en el pool de contraseñas sin ocupar
+# un hilo del threadpool mientras espera, y solo el acceso a la DB pasa por run_in_threadpool.
+
+def _guardar_y_refrescar(db, db_item: Item) -> Item:
+    db.add(db_item)
+    guardar_item(db)
+    db.refresh(db_item)
+    return db_item
+
 
 @items_router.post("/", response_model=ItemCreateOut)
-def add_item(
+async def add_item(
     item_in: ItemCreateIn,
     db: SessionDep
 ) -> ItemCreateOut:
@@ -36,17 +52,15 @@ def add_item(
     
     # Item.model_validate asigna automáticamente rol="user"
     db_item = Item.model_validate(item_in) 
+    db_item.contraseña = await hashear_async(item_in.contraseña)
     
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return await run_in_threadpool(_guardar_y_refrescar, db, db_item)
 
 
 # --- RUTA PUT (Protegida por Rol de Administrador) ---
 
 @items_router.put("/{item_id}", response_model=ItemCreateOut)
-def update_item(
+async def update_item(
     item_id: int,
     item_in: ItemUpdateIn,
     db: SessionDep,
@@ -54,7 +68,7 @@ def update_item(
 ):
     """Actualiza un ítem por ID. Requiere rol de administrador."""
     
-    db_item = db.get(Item, item_id)
+    db_item = await run_in_threadpool(db.get, Item, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item no encontrado")
 
@@ -62,6 +76,8 @@ def update_item(
     
     # 1. Obtener solo los campos que fueron enviados (no None)
     item_data = item_in.model_dump(exclude_unset=True)
+    if item_data.get("contraseña") is not None:
+        item_data["contraseña"] = await hashear_async(item_data["contraseña"])
     
     # 2. Iterar sobre los datos enviados y actualizar la instancia de la DB
     for key, value in item_data.items():
@@ -70,9 +86,7 @@ def update_item(
     # -------------------
 
     # 3. Guardar los cambios
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    db_item = await run_in_threadpool(_guardar_y_refrescar, db, db_item)
     
     # 4. Devolver la instancia actualizada (que será mapeada a ItemCreateOut)
     return db_item
@@ -80,35 +94,55 @@ def update_item(
 
 # --- RUTA DELETE (Protegida por Rol de Administrador) ---
 
-@items_router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+def respuesta_borrado_en_curso(trabajo: dict) -> JSONResponse:
+    """202 con el estado del trabajo y la URL para consultarlo."""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder({**trabajo, "estado_url": f"/items/borrados/{trabajo['id']}"})
+    )
+
+
+@items_router.delete(
+    "/{item_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"description": "Borrado en segundo plano; consultar estado_url"}}
+)
 def delete_item(
     item_id: int,
     db: SessionDep,
-    is_admin: Annotated[bool, Depends(verify_admin_role)]
+    is_admin: Annotated[bool, Depends(verify_admin_role)],
+    segundo_plano: bool = Query(default=False, description="Forzar el borrado en segundo plano")
 ):
-    """Elimina un ítem por ID. Requiere rol de administrador."""
+    """
+    Elimina un ítem por ID junto con sus gastos, inversiones y resumen. Requiere rol de administrador.
+    Si el usuario tiene más de BORRADO_UMBRAL_SEGUNDO_PLANO movimientos (o con segundo_plano=true)
+    responde 202 y borra en bloques en segundo plano; el estado se consulta en /items/borrados/{id}.
+    Repetir la llamada devuelve el trabajo activo, o lo retoma si quedó interrumpido.
+    """
     
     db_item = db.get(Item, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item no encontrado")
+
+    total = contar_movimientos(db, item_id)
+    if segundo_plano or total > BORRADO_UMBRAL_SEGUNDO_PLANO:
+        return respuesta_borrado_en_curso(iniciar_borrado(item_id, total))
+
+    borrar_usuario(db, db_item)
     
-    # ✅ NUEVO: Primero eliminar todas las inversiones del usuario
-    from src.models.inversion import Inversion
-    from src.models.gasto import Gasto
-    
-    inversiones_statement = select(Inversion).where(Inversion.usuario_id == item_id)
-    inversiones = db.exec(inversiones_statement).all()
-    for inversion in inversiones:
-        db.delete(inversion)
-    
-    # ✅ NUEVO: Eliminar todos los gastos del usuario
-    gastos_statement = select(Gasto).where(Gasto.usuario_id == item_id)
-    gastos = db.exec(gastos_statement).all()
-    for gasto in gastos:
-        db.delete(gasto)
-    
-    # Ahora sí eliminar el usuario
-    db.delete(db_item)
-    db.commit()
-    
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@items_router.get("/borrados")
+def get_borrados(db: SessionDep, is_admin: Annotated[bool, Depends(verify_admin_role)]) -> List[dict]:
+    """Borrados en segundo plano recientes, del más nuevo al más viejo. Requiere rol de administrador."""
+    return listar_trabajos(db)
+
+
+@items_router.get("/borrados/{trabajo_id}")
+def get_borrado(trabajo_id: str, db: SessionDep, is_admin: Annotated[bool, Depends(verify_admin_role)]) -> dict:
+    """Estado de un borrado en segundo plano: pendiente, en_curso, completado o error. Requiere rol de administrador."""
+    trabajo = obtener_trabajo(db, trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo de borrado no encontrado")
+    return trabajo
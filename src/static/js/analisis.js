@@ -40,29 +40,30 @@ async function loadAnalisis() {
 }
 
 /**
- * Carga análisis general (todo el tiempo)
+ * Carga resumen, distribuciones y tendencia en una sola petición
  */
-async function loadAnalisisGeneral() {
-    const response = await authenticatedFetch(`${API_BASE_URL}/analisis/resumen-general`);
+async function fetchDashboardAnalisis(params) {
+    const query = new URLSearchParams(params).toString();
+    const response = await authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?${query}`);
     
     if (!response.ok) {
-        throw new Error('Error al cargar análisis general');
+        throw new Error('Error al cargar análisis');
     }
     
-    const resumen = await response.json();
-    
-    // Cargar distribuciones
-    const gastosResponse = await authenticatedFetch(`${API_BASE_URL}/analisis/gastos-por-tipo`);
-    const inversionesResponse = await authenticatedFetch(`${API_BASE_URL}/analisis/inversiones-por-tipo`);
-    
-    const gastosPorTipo = gastosResponse.ok ? await gastosResponse.json() : [];
-    const inversionesPorTipo = inversionesResponse.ok ? await inversionesResponse.json() : [];
+    return response.json();
+}
+
+/**
+ * Carga análisis general (todo el tiempo)
+ */
+async function loadAnalisisGeneral() {
+    const data = await fetchDashboardAnalisis({ meses: 1 });
     
     return {
         periodo: 'Todo el tiempo',
-        resumen,
-        gastosPorTipo,
-        inversionesPorTipo
+        resumen: data.resumen,
+        gastosPorTipo: data.gastos_por_tipo,
+        inversionesPorTipo: data.inversiones_por_tipo
     };
 }
 
@@ -74,32 +75,13 @@ async function loadAnalisisMensual() {
     const mes = hoy.getMonth() + 1;
     const anio = hoy.getFullYear();
     
-    const response = await authenticatedFetch(
-        `${API_BASE_URL}/analisis/resumen-mensual?mes=${mes}&anio=${anio}`
-    );
-    
-    if (!response.ok) {
-        throw new Error('Error al cargar análisis mensual');
-    }
-    
-    const resumen = await response.json();
-    
-    // Cargar distribuciones del mes
-    const gastosResponse = await authenticatedFetch(
-        `${API_BASE_URL}/analisis/gastos-por-tipo?mes=${mes}&anio=${anio}`
-    );
-    const inversionesResponse = await authenticatedFetch(
-        `${API_BASE_URL}/analisis/inversiones-por-tipo?mes=${mes}&anio=${anio}`
-    );
-    
-    const gastosPorTipo = gastosResponse.ok ? await gastosResponse.json() : [];
-    const inversionesPorTipo = inversionesResponse.ok ? await inversionesResponse.json() : [];
+    const data = await fetchDashboardAnalisis({ mes, anio, meses: 1 });
     
     return {
         periodo: `${getNombreMes(mes)} ${anio}`,
-        resumen,
-        gastosPorTipo,
-        inversionesPorTipo
+        resumen: data.resumen,
+        gastosPorTipo: data.gastos_por_tipo,
+        inversionesPorTipo: data.inversiones_por_tipo
     };
 }
 
@@ -107,19 +89,11 @@ async function loadAnalisisMensual() {
  * Carga análisis trimestral (últimos 3 meses)
  */
 async function loadAnalisisTrimestral() {
-    const response = await authenticatedFetch(
-        `${API_BASE_URL}/analisis/tendencia-mensual?meses=3`
-    );
-    
-    if (!response.ok) {
-        throw new Error('Error al cargar tendencia');
-    }
-    
-    const tendencia = await response.json();
+    const data = await fetchDashboardAnalisis({ meses: 3 });
     
     return {
         periodo: 'Últimos 3 meses',
-        tendencia
+        tendencia: data.tendencia
     };
 }
 
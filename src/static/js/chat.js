@@ -59,25 +59,56 @@ async function sendChatMessage() {
     // Deshabilitar input mientras se procesa
     input.disabled = true;
     
+    const headers = { 'Content-Type': 'application/json' };
+    const token = localStorage.getItem('token');
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+    
     try {
-        const response = await fetch(`${API_BASE_URL}/chat`, {
+        // Respuesta por Server-Sent Events: el texto se muestra a medida que llega
+        const response = await fetch(`${API_BASE_URL}/chat/stream`, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers,
             body: JSON.stringify({ message })
         });
         
+        if (response.status === 429) {
+            addChatMessage('El asistente está atendiendo muchas consultas. Espera unos segundos e intenta de nuevo.', 'bot');
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error('Error en el chat');
         }
         
-        const data = await response.json();
+        const botText = addChatMessage('', 'bot');
+        const messagesContainer = document.getElementById('chat-messages');
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
         
-        if (data.error) {
-            addChatMessage(`Error: ${data.error}. ${data.suggestion || ''}`, 'bot');
-        } else {
-            addChatMessage(data.reply, 'bot');
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            
+            for (const event of events) {
+                const isError = event.startsWith('event: error');
+                const dataLine = event.split('\n').find(line => line.startsWith('data: '));
+                if (!dataLine) continue;
+                
+                const data = JSON.parse(dataLine.slice(6));
+                if (isError) {
+                    botText.textContent += `${botText.textContent ? '\n\n' : ''}Error: ${data.error}. ${data.suggestion || ''}`;
+                } else if (data.delta) {
+                    botText.textContent += data.delta;
+                }
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            }
         }
         
     } catch (error) {
@@ -111,4 +142,6 @@ function addChatMessage(text, type) {
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    return textDiv;
 }
\ No newline at end of file
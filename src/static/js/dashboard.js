@@ -4,11 +4,12 @@
 
 async function loadDashboardData() {
     try {
-        // Cargar resumen general
-        const resumenResponse = await authenticatedFetch(`${API_BASE_URL}/analisis/resumen-general`);
+        // Cargar resumen y distribuciones en una sola petición
+        const response = await authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?meses=1`);
         
-        if (resumenResponse.ok) {
-            const resumen = await resumenResponse.json();
+        if (response.ok) {
+            const data = await response.json();
+            const resumen = data.resumen;
             
             // Actualizar tarjetas
             document.getElementById('total-inversiones').textContent = formatCurrency(resumen.total_inversiones);
@@ -30,22 +31,10 @@ async function loadDashboardData() {
             } else {
                 ahorroBadge.classList.add('negative');
             }
-        }
-        
-        // Cargar distribución de gastos
-        const gastosResponse = await authenticatedFetch(`${API_BASE_URL}/analisis/gastos-por-tipo`);
-        
-        if (gastosResponse.ok) {
-            const gastos = await gastosResponse.json();
-            renderGastosChart(gastos);
-        }
-        
-        // Cargar distribución de inversiones
-        const inversionesResponse = await authenticatedFetch(`${API_BASE_URL}/analisis/inversiones-por-tipo`);
-        
-        if (inversionesResponse.ok) {
-            const inversiones = await inversionesResponse.json();
-            renderInversionesChart(inversiones);
+            
+            // Distribución de gastos e inversiones
+            renderGastosChart(data.gastos_por_tipo);
+            renderInversionesChart(data.inversiones_por_tipo);
         }
         
     } catch (error) {
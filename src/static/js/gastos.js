@@ -8,6 +8,8 @@ let currentUser = null;
 let allGastos = [];
 let filteredGastos = [];
 let currentPage = 1;
+let pageCursors = [null];   // cursor de inicio de cada página visitada
+let nextCursor = null;      // cabecera X-Next-Cursor de la última respuesta
 let itemsPerPage = 10;
 let sortField = 'fecha';
 let sortDirection = 'desc';
@@ -136,25 +138,14 @@ async function loadUserProfile() {
 }
 
 /**
- * Cargar gastos del usuario autenticado
+ * Cargar gastos del usuario autenticado (estadísticas + primera página)
  */
 async function loadGastos() {
     try {
         console.log('📥 Cargando gastos del usuario...');
-        const response = await authenticatedFetch(`${API_BASE_URL}/gastos/`);
-        
-        if (!response.ok) {
-            throw new Error('Error al cargar gastos');
-        }
-        
-        allGastos = await response.json();
-        console.log('✅ Gastos cargados:', allGastos.length);
-        
-        // Actualizar estadísticas y filtros
-        updateStats();
-        updateTipoFilter();
-        renderCategoriasChart();
-        applyFilters();
+        pageCursors = [null];
+        currentPage = 1;
+        await Promise.all([loadGastosResumen(), loadGastosPage()]);
         
     } catch (error) {
         console.error('❌ Error al cargar gastos:', error);
@@ -162,6 +153,71 @@ async function loadGastos() {
     }
 }
 
+/**
+ * Cargar estadísticas agregadas sin descargar la lista completa
+ */
+async function loadGastosResumen() {
+    const now = new Date();
+    const mes = now.getMonth() + 1;
+    const anio = now.getFullYear();
+    
+    const [generalResponse, mesResponse] = await Promise.all([
+        authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?meses=6`),
+        authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?mes=${mes}&anio=${anio}&meses=1`)
+    ]);
+    
+    if (!generalResponse.ok || !mesResponse.ok) {
+        throw new Error('Error al cargar estadísticas');
+    }
+    
+    const general = await generalResponse.json();
+    const delMes = await mesResponse.json();
+    
+    updateStats(general, delMes);
+    updateTipoFilter(general.gastos_por_tipo);
+    renderCategoriasChart(delMes.gastos_por_tipo);
+}
+
+/**
+ * Cargar la página actual desde el servidor (paginación por cursor)
+ */
+async function loadGastosPage() {
+    const filterTipo = document.getElementById('filter-tipo');
+    const params = new URLSearchParams({
+        limit: itemsPerPage,
+        orden: sortField === 'fecha' ? sortDirection : 'desc'
+    });
+    
+    if (filterTipo && filterTipo.value) params.set('tipo', filterTipo.value);
+    
+    const cursor = pageCursors[currentPage - 1];
+    if (cursor) params.set('cursor', cursor);
+    
+    const response = await authenticatedFetch(`${API_BASE_URL}/gastos/?${params}`);
+    
+    if (!response.ok) {
+        throw new Error('Error al cargar gastos');
+    }
+    
+    allGastos = await response.json();
+    nextCursor = response.headers.get('X-Next-Cursor');
+    console.log('✅ Gastos cargados:', allGastos.length);
+    
+    applyFilters();
+}
+
+/**
+ * Volver a la primera página (cambio de filtro u orden por fecha)
+ */
+function reloadGastosPage() {
+    pageCursors = [null];
+    currentPage = 1;
+    loadGastosPage().catch(error => {
+        console.error('❌ Error al cargar gastos:', error);
+        showToast('Error al cargar gastos', 'error');
+    });
+}
+
 // ====================================
 // ESTADÍSTICAS Y GRÁFICOS
 // ====================================
@@ -169,30 +225,22 @@ async function loadGastos() {
 /**
  * Actualizar estadísticas
  */
-function updateStats() {
+function updateStats(general, delMes) {
     // Total acumulado
-    const total = allGastos.reduce((sum, g) => sum + g.cantidad_gasto, 0);
+    const total = general.resumen.total_gastos;
     document.getElementById('total-acumulado').textContent = formatCurrency(total);
     document.getElementById('total-gastos-header').textContent = formatCurrency(total);
     
     // Total de registros
-    document.getElementById('total-registros').textContent = allGastos.length;
+    const registros = general.gastos_por_tipo.reduce((sum, t) => sum + (t.registros || 0), 0);
+    document.getElementById('total-registros').textContent = registros;
 
     // Total del mes actual
-    const now = new Date();
-    const mesActual = allGastos.filter(g => {
-        const fecha = new Date(g.fecha_gasto);
-        return fecha.getMonth() === now.getMonth() && fecha.getFullYear() === now.getFullYear();
-    });
-    const totalMes = mesActual.reduce((sum, g) => sum + g.cantidad_gasto, 0);
-    document.getElementById('total-mes').textContent = formatCurrency(totalMes);
+    document.getElementById('total-mes').textContent = formatCurrency(delMes.resumen.total_gastos);
 
     // Promedio mensual últimos 6 meses
-    const seisM = new Date();
-    seisM.setMonth(seisM.getMonth() - 6);
-    const ultimos6 = allGastos.filter(g => new Date(g.fecha_gasto) >= seisM);
-    const promedio = ultimos6.length > 0 ? ultimos6.reduce((sum, g) => sum + g.cantidad_gasto, 0) / 6 : 0;
-    document.getElementById('promedio-mensual').textContent = formatCurrency(promedio);
+    const totalSeisMeses = general.tendencia.reduce((sum, m) => sum + m.total_gastos, 0);
+    document.getElementById('promedio-mensual').textContent = formatCurrency(totalSeisMeses / 6);
     
     console.log('📊 Estadísticas actualizadas');
 }
@@ -200,16 +248,10 @@ function updateStats() {
 /**
  * Renderizar gráfico de categorías
  */
-function renderCategoriasChart() {
-    const now = new Date();
-    const mesActual = allGastos.filter(g => {
-        const fecha = new Date(g.fecha_gasto);
-        return fecha.getMonth() === now.getMonth() && fecha.getFullYear() === now.getFullYear();
-    });
-
+function renderCategoriasChart(gastosPorTipo) {
     const categorias = {};
-    mesActual.forEach(g => {
-        categorias[g.tipo_gasto] = (categorias[g.tipo_gasto] || 0) + g.cantidad_gasto;
+    gastosPorTipo.forEach(t => {
+        categorias[t.tipo_gasto] = t.total;
     });
 
     const chartContainer = document.getElementById('categorias-chart');
@@ -247,12 +289,13 @@ function renderCategoriasChart() {
 /**
  * Actualizar filtro de tipos
  */
-function updateTipoFilter() {
-    const tipos = [...new Set(allGastos.map(g => g.tipo_gasto))];
+function updateTipoFilter(porTipo) {
+    const tipos = porTipo.map(t => t.tipo_gasto);
     const select = document.getElementById('filter-tipo');
     
     if (!select) return;
     
+    const seleccionado = select.value;
     select.innerHTML = '<option value="">Todos los tipos</option>';
     tipos.forEach(tipo => {
         const option = document.createElement('option');
@@ -260,6 +303,7 @@ function updateTipoFilter() {
         option.textContent = tipo.charAt(0).toUpperCase() + tipo.slice(1);
         select.appendChild(option);
     });
+    select.value = tipos.includes(seleccionado) ? seleccionado : '';
 }
 
 // ====================================
@@ -284,7 +328,6 @@ function applyFilters() {
     });
 
     sortGastos();
-    currentPage = 1;
     renderTable();
 }
 
@@ -326,9 +369,7 @@ function renderTable() {
     
     if (!tbody) return;
     
-    const start = (currentPage - 1) * itemsPerPage;
-    const end = start + itemsPerPage;
-    const pageItems = filteredGastos.slice(start, end);
+    const pageItems = filteredGastos;
 
     console.log('Renderizando tabla con', pageItems.length, 'items');
 
@@ -384,15 +425,14 @@ function renderTable() {
  */
 function updatePagination() {
     const paginationDiv = document.getElementById('pagination');
-    const totalPages = Math.ceil(filteredGastos.length / itemsPerPage);
     
     if (!paginationDiv) return;
     
-    if (totalPages > 1) {
+    if (currentPage > 1 || nextCursor) {
         paginationDiv.style.display = 'flex';
-        document.getElementById('page-info').textContent = `Página ${currentPage} de ${totalPages}`;
+        document.getElementById('page-info').textContent = `Página ${currentPage}`;
         document.getElementById('prev-page').disabled = currentPage === 1;
-        document.getElementById('next-page').disabled = currentPage === totalPages;
+        document.getElementById('next-page').disabled = !nextCursor;
     } else {
         paginationDiv.style.display = 'none';
     }
@@ -745,7 +785,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Filtro por tipo
     const filterTipo = document.getElementById('filter-tipo');
     if (filterTipo) {
-        filterTipo.addEventListener('change', applyFilters);
+        filterTipo.addEventListener('change', reloadGastosPage);
     }
     
     // Botón confirmar eliminación
@@ -779,7 +819,12 @@ document.addEventListener('DOMContentLoaded', async () => {
                 sortField = field;
                 sortDirection = 'desc';
             }
-            applyFilters();
+            // El orden por fecha lo resuelve el servidor; los demás ordenan la página actual
+            if (field === 'fecha') {
+                reloadGastosPage();
+            } else {
+                applyFilters();
+            }
         });
     });
 
@@ -789,7 +834,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         prevPageBtn.addEventListener('click', () => {
             if (currentPage > 1) {
                 currentPage--;
-                renderTable();
+                loadGastosPage();
             }
         });
     }
@@ -797,10 +842,10 @@ document.addEventListener('DOMContentLoaded', async () => {
     const nextPageBtn = document.getElementById('next-page');
     if (nextPageBtn) {
         nextPageBtn.addEventListener('click', () => {
-            const totalPages = Math.ceil(filteredGastos.length / itemsPerPage);
-            if (currentPage < totalPages) {
+            if (nextCursor) {
+                pageCursors[currentPage] = nextCursor;
                 currentPage++;
-                renderTable();
+                loadGastosPage();
             }
         });
     }
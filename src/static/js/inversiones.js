@@ -8,6 +8,8 @@ let currentUser = null;
 let allInversiones = [];
 let filteredInversiones = [];
 let currentPage = 1;
+let pageCursors = [null];   // cursor de inicio de cada página visitada
+let nextCursor = null;      // cabecera X-Next-Cursor de la última respuesta
 let itemsPerPage = 10;
 let sortField = 'fecha';
 let sortDirection = 'desc';
@@ -119,24 +121,14 @@ async function loadUserProfile() {
 }
 
 /**
- * Cargar inversiones del usuario autenticado
+ * Cargar inversiones del usuario autenticado (estadísticas + primera página)
  */
 async function loadInversiones() {
     try {
         console.log('📥 Cargando inversiones del usuario...');
-        const response = await authenticatedFetch(`${API_BASE_URL}/inversiones/`);
-        
-        if (!response.ok) {
-            throw new Error('Error al cargar inversiones');
-        }
-        
-        allInversiones = await response.json();
-        console.log('✅ Inversiones cargadas:', allInversiones.length);
-        
-        // Actualizar estadísticas y filtros
-        updateStats();
-        updateTipoFilter();
-        applyFilters();
+        pageCursors = [null];
+        currentPage = 1;
+        await Promise.all([loadInversionesResumen(), loadInversionesPage()]);
         
     } catch (error) {
         console.error('❌ Error al cargar inversiones:', error);
@@ -144,6 +136,70 @@ async function loadInversiones() {
     }
 }
 
+/**
+ * Cargar estadísticas agregadas sin descargar la lista completa
+ */
+async function loadInversionesResumen() {
+    const now = new Date();
+    const mes = now.getMonth() + 1;
+    const anio = now.getFullYear();
+    
+    const [generalResponse, mesResponse] = await Promise.all([
+        authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?meses=6`),
+        authenticatedFetch(`${API_BASE_URL}/analisis/dashboard?mes=${mes}&anio=${anio}&meses=1`)
+    ]);
+    
+    if (!generalResponse.ok || !mesResponse.ok) {
+        throw new Error('Error al cargar estadísticas');
+    }
+    
+    const general = await generalResponse.json();
+    const delMes = await mesResponse.json();
+    
+    updateStats(general, delMes);
+    updateTipoFilter(general.inversiones_por_tipo);
+}
+
+/**
+ * Cargar la página actual desde el servidor (paginación por cursor)
+ */
+async function loadInversionesPage() {
+    const filterTipo = document.getElementById('filter-tipo');
+    const params = new URLSearchParams({
+        limit: itemsPerPage,
+        orden: sortField === 'fecha' ? sortDirection : 'desc'
+    });
+    
+    if (filterTipo && filterTipo.value) params.set('tipo', filterTipo.value);
+    
+    const cursor = pageCursors[currentPage - 1];
+    if (cursor) params.set('cursor', cursor);
+    
+    const response = await authenticatedFetch(`${API_BASE_URL}/inversiones/?${params}`);
+    
+    if (!response.ok) {
+        throw new Error('Error al cargar inversiones');
+    }
+    
+    allInversiones = await response.json();
+    nextCursor = response.headers.get('X-Next-Cursor');
+    console.log('✅ Inversiones cargadas:', allInversiones.length);
+    
+    applyFilters();
+}
+
+/**
+ * Volver a la primera página (cambio de filtro u orden por fecha)
+ */
+function reloadInversionesPage() {
+    pageCursors = [null];
+    currentPage = 1;
+    loadInversionesPage().catch(error => {
+        console.error('❌ Error al cargar inversiones:', error);
+        showToast('Error al cargar inversiones', 'error');
+    });
+}
+
 // ====================================
 // ESTADÍSTICAS Y GRÁFICOS
 // ====================================
@@ -151,30 +207,22 @@ async function loadInversiones() {
 /**
  * Actualizar estadísticas
  */
-function updateStats() {
+function updateStats(general, delMes) {
     // Total acumulado
-    const total = allInversiones.reduce((sum, inv) => sum + inv.cantidad_inversion, 0);
+    const total = general.resumen.total_inversiones;
     document.getElementById('total-acumulado').textContent = formatCurrency(total);
     document.getElementById('total-inversiones-header').textContent = formatCurrency(total);
     
     // Total de registros
-    document.getElementById('total-registros').textContent = allInversiones.length;
+    const registros = general.inversiones_por_tipo.reduce((sum, t) => sum + (t.registros || 0), 0);
+    document.getElementById('total-registros').textContent = registros;
 
     // Total del mes actual
-    const now = new Date();
-    const mesActual = allInversiones.filter(inv => {
-        const fecha = new Date(inv.fecha_inversion);
-        return fecha.getMonth() === now.getMonth() && fecha.getFullYear() === now.getFullYear();
-    });
-    const totalMes = mesActual.reduce((sum, inv) => sum + inv.cantidad_inversion, 0);
-    document.getElementById('total-mes').textContent = formatCurrency(totalMes);
+    document.getElementById('total-mes').textContent = formatCurrency(delMes.resumen.total_inversiones);
 
     // Promedio mensual últimos 6 meses
-    const seisM = new Date();
-    seisM.setMonth(seisM.getMonth() - 6);
-    const ultimos6 = allInversiones.filter(inv => new Date(inv.fecha_inversion) >= seisM);
-    const promedio = ultimos6.length > 0 ? ultimos6.reduce((sum, inv) => sum + inv.cantidad_inversion, 0) / 6 : 0;
-    document.getElementById('promedio-mensual').textContent = formatCurrency(promedio);
+    const totalSeisMeses = general.tendencia.reduce((sum, m) => sum + m.total_inversiones, 0);
+    document.getElementById('promedio-mensual').textContent = formatCurrency(totalSeisMeses / 6);
     
     console.log('📊 Estadísticas actualizadas');
 }
@@ -182,12 +230,13 @@ function updateStats() {
 /**
  * Actualizar filtro de tipos
  */
-function updateTipoFilter() {
-    const tipos = [...new Set(allInversiones.map(inv => inv.tipo_inversion))];
+function updateTipoFilter(porTipo) {
+    const tipos = porTipo.map(t => t.tipo_inversion);
     const select = document.getElementById('filter-tipo');
     
     if (!select) return;
     
+    const seleccionado = select.value;
     select.innerHTML = '<option value="">Todos los tipos</option>';
     tipos.forEach(tipo => {
         const option = document.createElement('option');
@@ -195,6 +244,7 @@ function updateTipoFilter() {
         option.textContent = tipo.charAt(0).toUpperCase() + tipo.slice(1);
         select.appendChild(option);
     });
+    select.value = tipos.includes(seleccionado) ? seleccionado : '';
 }
 
 // ====================================
@@ -219,7 +269,6 @@ function applyFilters() {
     });
 
     sortInversiones();
-    currentPage = 1;
     renderTable();
 }
 
@@ -261,9 +310,7 @@ function renderTable() {
     
     if (!tbody) return;
     
-    const start = (currentPage - 1) * itemsPerPage;
-    const end = start + itemsPerPage;
-    const pageItems = filteredInversiones.slice(start, end);
+    const pageItems = filteredInversiones;
 
     // Si no hay items, mostrar mensaje vacío
     if (pageItems.length === 0) {
@@ -317,15 +364,14 @@ function renderTable() {
  */
 function updatePagination() {
     const paginationDiv = document.getElementById('pagination');
-    const totalPages = Math.ceil(filteredInversiones.length / itemsPerPage);
     
     if (!paginationDiv) return;
     
-    if (totalPages > 1) {
+    if (currentPage > 1 || nextCursor) {
         paginationDiv.style.display = 'flex';
-        document.getElementById('page-info').textContent = `Página ${currentPage} de ${totalPages}`;
+        document.getElementById('page-info').textContent = `Página ${currentPage}`;
         document.getElementById('prev-page').disabled = currentPage === 1;
-        document.getElementById('next-page').disabled = currentPage === totalPages;
+        document.getElementById('next-page').disabled = !nextCursor;
     } else {
         paginationDiv.style.display = 'none';
     }
@@ -559,7 +605,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Filtro por tipo
     const filterTipo = document.getElementById('filter-tipo');
     if (filterTipo) {
-        filterTipo.addEventListener('change', applyFilters);
+        filterTipo.addEventListener('change', reloadInversionesPage);
     }
     
     // Botón confirmar eliminación
@@ -593,7 +639,12 @@ document.addEventListener('DOMContentLoaded', async () => {
                 sortField = field;
                 sortDirection = 'desc';
             }
-            applyFilters();
+            // El orden por fecha lo resuelve el servidor; los demás ordenan la página actual
+            if (field === 'fecha') {
+                reloadInversionesPage();
+            } else {
+                applyFilters();
+            }
         });
     });
 
@@ -603,7 +654,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         prevPageBtn.addEventListener('click', () => {
             if (currentPage > 1) {
                 currentPage--;
-                renderTable();
+                loadInversionesPage();
             }
         });
     }
@@ -611,10 +662,10 @@ document.addEventListener('DOMContentLoaded', async () => {
     const nextPageBtn = document.getElementById('next-page');
     if (nextPageBtn) {
         nextPageBtn.addEventListener('click', () => {
-            const totalPages = Math.ceil(filteredInversiones.length / itemsPerPage);
-            if (currentPage < totalPages) {
+            if (nextCursor) {
+                pageCursors[currentPage] = nextCursor;
                 currentPage++;
-                renderTable();
+                loadInversionesPage();
             }
         });
     }
@@ -0,0 +1,126 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import Session, select, func
+from src.models.resumen_mensual import ResumenMensual, CATEGORIA_GASTO, CATEGORIA_INVERSION
+
+# Todas las consultas leen de resumen_mensual (ver src/utils/resumenes.py), por lo que
+# los filtros desde/hasta deben caer en el primer día de un mes (ver rango_mes).
+
+
+# --- RANGOS DE FECHA ---
+
+def rango_mes(mes: int, anio: int) -> Tuple[date, date]:
+    """Devuelve (primer_dia, primer_dia_del_mes_siguiente) para filtrar un mes."""
+    primer_dia = date(anio, mes, 1)
+    if mes == 12:
+        ultimo_dia = date(anio + 1, 1, 1)
+    else:
+        ultimo_dia = date(anio, mes + 1, 1)
+    return primer_dia, ultimo_dia
+
+
+# --- FILTROS ---
+
+def _filtrar(statement, usuario_id: int, desde: Optional[date], hasta: Optional[date]):
+    statement = statement.where(ResumenMensual.usuario_id == usuario_id)
+    periodo = ResumenMensual.anio * 100 + ResumenMensual.mes
+    if desde is not None:
+        statement = statement.where(periodo >= desde.year * 100 + desde.month)
+    if hasta is not None:
+        statement = statement.where(periodo < hasta.year * 100 + hasta.month)
+    return statement
+
+
+def _totales_por_tipo(
+    db: Session,
+    categoria: str,
+    usuario_id: int,
+    desde: Optional[date],
+    hasta: Optional[date]
+) -> List[Tuple[str, float, int]]:
+    statement = _filtrar(
+        select(ResumenMensual.tipo, func.sum(ResumenMensual.total), func.sum(ResumenMensual.cantidad)),
+        usuario_id, desde, hasta
+    ).where(ResumenMensual.categoria == categoria).group_by(ResumenMensual.tipo)
+    return [(tipo, float(total or 0), int(cantidad or 0)) for tipo, total, cantidad in db.exec(statement).all()]
+
+
+# --- AGREGADOS ---
+
+def obtener_totales(
+    db: Session,
+    usuario_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+) -> Tuple[float, float]:
+    """Devuelve (total_inversiones, total_gastos) del usuario en una sola consulta."""
+    statement = _filtrar(
+        select(ResumenMensual.categoria, func.sum(ResumenMensual.total)),
+        usuario_id, desde, hasta
+    ).group_by(ResumenMensual.categoria)
+    totales = {categoria: float(total or 0) for categoria, total in db.exec(statement).all()}
+    return totales.get(CATEGORIA_INVERSION, 0.0), totales.get(CATEGORIA_GASTO, 0.0)
+
+
+def obtener_gastos_por_tipo(
+    db: Session,
+    usuario_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+) -> List[Tuple[str, float, int]]:
+    """Devuelve [(tipo_gasto, total, registros)] agrupado en la base de datos."""
+    return _totales_por_tipo(db, CATEGORIA_GASTO, usuario_id, desde, hasta)
+
+
+def obtener_inversiones_por_tipo(
+    db: Session,
+    usuario_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+) -> List[Tuple[str, float, int]]:
+    """Devuelve [(tipo_inversion, total, registros)] agrupado en la base de datos."""
+    return _totales_por_tipo(db, CATEGORIA_INVERSION, usuario_id, desde, hasta)
+
+
+def obtener_totales_mensuales(
+    db: Session,
+    usuario_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+) -> Dict[Tuple[int, int], Tuple[float, float]]:
+    """
+    Devuelve {(anio, mes): (total_inversiones, total_gastos)} en una sola consulta.
+    Los meses sin movimientos no aparecen; quien llama debe rellenarlos.
+    """
+    statement = _filtrar(
+        select(ResumenMensual.anio, ResumenMensual.mes, ResumenMensual.categoria, func.sum(ResumenMensual.total)),
+        usuario_id, desde, hasta
+    ).group_by(ResumenMensual.anio, ResumenMensual.mes, ResumenMensual.categoria)
+
+    totales: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    for anio, mes, categoria, total in db.exec(statement).all():
+        total_inversiones, total_gastos = totales.get((anio, mes), (0.0, 0.0))
+        if categoria == CATEGORIA_INVERSION:
+            total_inversiones = float(total or 0)
+        else:
+            total_gastos = float(total or 0)
+        totales[(anio, mes)] = (total_inversiones, total_gastos)
+    return totales
+
+
+def obtener_grupos(db: Session, usuario_id: int) -> List[Tuple[int, int, str, str, float, int]]:
+    """
+    Devuelve todos los grupos del usuario como [(anio, mes, categoria, tipo, total, registros)].
+    Es la pasada única que usa /analisis/dashboard para armar todas sus secciones.
+    """
+    statement = _filtrar(
+        select(
+            ResumenMensual.anio, ResumenMensual.mes, ResumenMensual.categoria,
+            ResumenMensual.tipo, ResumenMensual.total, ResumenMensual.cantidad
+        ),
+        usuario_id, None, None
+    )
+    return [
+        (anio, mes, categoria, tipo, float(total or 0), cantidad)
+        for anio, mes, categoria, tipo, total, cantidad in db.exec(statement).all()
+    ]
@@ -0,0 +1,264 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import insert, literal, union, update, tuple_
+from sqlmodel import Session, select, delete, func
+from src.config.db import engine
+from src.models.gasto import Gasto
+from src.models.inversion import Inversion
+from src.models.resumen_mensual import CATEGORIA_GASTO, CATEGORIA_INVERSION
+from src.models.resumen_plataforma import ResumenPlataforma, ActividadMensual, MarcaAgregador
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+# Cada cuántos segundos se suman las filas nuevas (0 desactiva el agregador)
+AGREGADOR_INTERVALO_SEGUNDOS = float(os.getenv("AGREGADOR_INTERVALO_SEGUNDOS", "60"))
+# Cada cuántas horas se recalcula todo desde gasto e inversion (recoge ediciones y borrados)
+AGREGADOR_RECONCILIAR_HORAS = float(os.getenv("AGREGADOR_RECONCILIAR_HORAS", "24"))
+# Ids procesados por transacción
+AGREGADOR_BLOQUE = int(os.getenv("AGREGADOR_BLOQUE", "100000"))
+
+log = logging.getLogger(__name__)
+
+# (tabla, categoría, columnas tipo / cantidad / fecha)
+_FUENTES = (
+    (Gasto, CATEGORIA_GASTO, Gasto.tipo_gasto, Gasto.cantidad_gasto, Gasto.fecha_gasto),
+    (Inversion, CATEGORIA_INVERSION, Inversion.tipo_inversion, Inversion.cantidad_inversion, Inversion.fecha_inversion),
+)
+
+
+def _insertar_ignorando_repetidos(db: Session, tabla, filas: list) -> None:
+    """INSERT que salta las filas que violan un índice único (OR IGNORE en SQLite, IGNORE en MySQL)."""
+    if filas:
+        statement = insert(tabla).prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql")
+        db.connection().execute(statement, filas)
+
+
+def _marca(db: Session, tabla: str) -> MarcaAgregador:
+    marca = db.get(MarcaAgregador, tabla)
+    if marca is None:
+        marca = MarcaAgregador(tabla=tabla)
+        db.add(marca)
+        db.commit()
+        db.refresh(marca)
+    return marca
+
+
+def _avanzar_marca(db: Session, tabla: str, desde: int, hasta: int, visto: int) -> bool:
+    """
+    Mueve la marca solo si sigue en `desde`. Va primero en la transacción: toma el lock de
+    la fila, y si otro proceso ya avanzó la marca devuelve False y no se suma nada dos veces.
+    """
+    resultado = db.exec(
+        update(MarcaAgregador)
+        .where(MarcaAgregador.tabla == tabla, MarcaAgregador.ultimo_id == desde)
+        .values(ultimo_id=hasta, visto_id=visto, actualizado=datetime.now(timezone.utc))
+    )
+    return resultado.rowcount == 1
+
+
+def _sumar_rango(db: Session, fuente: tuple, desde: int, hasta: int) -> None:
+    """Suma las filas con id en (desde, hasta] al resumen de plataforma y a la actividad mensual."""
+    modelo, categoria, col_tipo, col_cantidad, col_fecha = fuente
+    anio = func.extract("year", col_fecha)
+    mes = func.extract("month", col_fecha)
+    rango = (modelo.id > desde, modelo.id <= hasta)
+
+    grupos = db.exec(
+        select(anio, mes, col_tipo, func.sum(col_cantidad), func.count(modelo.id)).where(*rango).group_by(anio, mes, col_tipo)
+    ).all()
+    if not grupos:
+        return
+
+    meses = {(int(a), int(m)) for a, m, _, _, _ in grupos}
+    existentes = {
+        (fila.anio, fila.mes, fila.tipo): fila
+        for fila in db.exec(
+            select(ResumenPlataforma)
+            .where(ResumenPlataforma.categoria == categoria, tuple_(ResumenPlataforma.anio, ResumenPlataforma.mes).in_(meses))
+            .with_for_update()
+        )
+    }
+    for a, m, tipo, total, cantidad in grupos:
+        fila = existentes.get((int(a), int(m), tipo))
+        if fila is None:
+            fila = ResumenPlataforma(anio=int(a), mes=int(m), categoria=categoria, tipo=tipo)
+        fila.total += float(total or 0)
+        fila.cantidad += int(cantidad)
+        db.add(fila)
+
+    actividad = db.exec(select(anio, mes, modelo.usuario_id).where(*rango).distinct()).all()
+    _insertar_ignorando_repetidos(
+        db, ActividadMensual.__table__,
+        [{"anio": int(a), "mes": int(m), "usuario_id": u} for a, m, u in actividad if u is not None]
+    )
+
+
+def sumar_filas_nuevas(db: Session) -> int:
+    """Suma lo insertado desde la última corrida, en bloques de AGREGADOR_BLOQUE ids. Devuelve los ids recorridos."""
+    recorridos = 0
+    for fuente in _FUENTES:
+        modelo = fuente[0]
+        tabla = modelo.__tablename__
+        marca = _marca(db, tabla)
+        desde, limite = marca.ultimo_id, marca.visto_id
+        visto = db.exec(select(func.coalesce(func.max(modelo.id), 0))).one()
+
+        while True:
+            hasta = min(limite, desde + AGREGADOR_BLOQUE)
+            if not _avanzar_marca(db, tabla, desde, hasta, visto):
+                db.rollback()
+                log.info("Otro proceso avanzó la marca del agregador", extra={"tabla": tabla})
+                break
+            if hasta > desde:
+                _sumar_rango(db, fuente, desde, hasta)
+            db.commit()
+            recorridos += hasta - desde
+            if hasta >= limite:
+                break
+            desde = hasta
+        db.expire_all()
+    return recorridos
+
+
+def reconciliacion_vencida(db: Session, segundos: float) -> bool:
+    """True si alguna tabla nunca se reconcilió o su última reconciliación (de cualquier proceso) es más vieja que `segundos`."""
+    limite = datetime.now(timezone.utc) - timedelta(seconds=segundos)
+    al_dia = db.exec(
+        select(func.count()).select_from(MarcaAgregador)
+        .where(MarcaAgregador.tabla.in_([fuente[0].__tablename__ for fuente in _FUENTES]), MarcaAgregador.reconciliado >= limite)
+    ).one()
+    return al_dia < len(_FUENTES)
+
+
+def reconciliar(db: Session, vencida_segundos: Optional[float] = None) -> bool:
+    """
+    Recalcula todo desde gasto e inversion (recoge ediciones y borrados). Es una sola transacción
+    que empieza bloqueando las marcas: ni la suma incremental ni otra reconciliación pueden
+    moverlas mientras tanto.
+
+    Se reconstruye solo hasta el visto_id de la corrida anterior, igual que la suma incremental:
+    ultimo_id queda ahí y visto_id en el máximo actual, así las transacciones que tomaron un id
+    y todavía no confirmaron tienen un intervalo para hacerlo.
+
+    Con `vencida_segundos`, si otro proceso reconcilió en ese lapso no hace nada y devuelve False.
+    """
+    tablas = [fuente[0].__tablename__ for fuente in _FUENTES]
+    for tabla in tablas:
+        _marca(db, tabla)
+    marcas = {
+        marca.tabla: marca
+        for marca in db.exec(select(MarcaAgregador).where(MarcaAgregador.tabla.in_(tablas)).with_for_update())
+    }
+    if vencida_segundos is not None and not reconciliacion_vencida(db, vencida_segundos):
+        db.rollback()
+        return False
+
+    db.exec(delete(ResumenPlataforma))
+    db.exec(delete(ActividadMensual))
+
+    actividad = []
+    ahora = datetime.now(timezone.utc)
+    for modelo, categoria, col_tipo, col_cantidad, col_fecha in _FUENTES:
+        marca = marcas[modelo.__tablename__]
+        maximo = db.exec(select(func.coalesce(func.max(modelo.id), 0))).one()
+        hasta = min(marca.visto_id, maximo)
+
+        anio = func.extract("year", col_fecha)
+        mes = func.extract("month", col_fecha)
+        db.exec(insert(ResumenPlataforma).from_select(
+            ["anio", "mes", "categoria", "tipo", "total", "cantidad"],
+            select(anio, mes, literal(categoria), col_tipo, func.sum(col_cantidad), func.count(modelo.id))
+            .where(modelo.id <= hasta)
+            .group_by(anio, mes, col_tipo)
+        ))
+        actividad.append(select(anio, mes, modelo.usuario_id).where(modelo.id <= hasta, modelo.usuario_id.is_not(None)))
+
+        marca.ultimo_id = hasta
+        marca.visto_id = maximo
+        marca.actualizado = marca.reconciliado = ahora
+        db.add(marca)
+
+    # UNION (no UNION ALL): un usuario con gastos e inversiones en el mismo mes cuenta una vez
+    db.exec(insert(ActividadMensual).from_select(["anio", "mes", "usuario_id"], union(*actividad)))
+    db.commit()
+    return True
+
+
+# --- EJECUCIÓN PERIÓDICA ---
+
+class AgregadorPlataforma:
+    """Hilo del proceso que suma las filas nuevas cada `intervalo` segundos y reconcilia cada tanto."""
+
+    def __init__(self, intervalo: float, reconciliar_horas: float):
+        self.intervalo = intervalo
+        self.reconciliar_segundos = reconciliar_horas * 3600
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.ultima_ejecucion: Optional[datetime] = None
+        self.ultima_duracion: Optional[float] = None
+        self.ultimos_ids: int = 0
+        self.ultimo_error: Optional[str] = None
+
+    def ejecutar(self, forzar_reconciliacion: bool = False) -> None:
+        # Una corrida a la vez dentro del proceso; entre procesos lo resuelven las marcas
+        with self._lock:
+            inicio = time.perf_counter()
+            try:
+                with Session(engine) as db:
+                    reconciliado = False
+                    if forzar_reconciliacion:
+                        reconciliado = reconciliar(db)
+                    elif reconciliacion_vencida(db, self.reconciliar_segundos):
+                        # Con varios workers vencen a la vez: reconcilia el primero que bloquea las marcas
+                        reconciliado = reconciliar(db, self.reconciliar_segundos)
+                    self.ultimos_ids = 0 if reconciliado else sumar_filas_nuevas(db)
+                self.ultimo_error = None
+            except Exception as e:
+                log.exception("Error en el agregador de plataforma")
+                self.ultimo_error = str(e)
+            finally:
+                self.ultima_duracion = time.perf_counter() - inicio
+                self.ultima_ejecucion = datetime.now(timezone.utc)
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            self.ejecutar()
+            self._detener.wait(self.intervalo)
+
+    def iniciar(self) -> None:
+        if self.intervalo <= 0 or self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="agregador-plataforma", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera: float = 5) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=espera)
+
+    def estado(self) -> dict:
+        with Session(engine) as db:
+            marcas = {
+                marca.tabla: {"ultimo_id": marca.ultimo_id, "visto_id": marca.visto_id, "actualizado": marca.actualizado, "reconciliado": marca.reconciliado}
+                for marca in db.exec(select(MarcaAgregador))
+            }
+        return {
+            "activo": self._hilo is not None and self._hilo.is_alive(),
+            "intervalo_segundos": self.intervalo,
+            "ultima_ejecucion": self.ultima_ejecucion,
+            "ultima_duracion_segundos": self.ultima_duracion,
+            "ultimos_ids_procesados": self.ultimos_ids,
+            "ultima_reconciliacion": min((marca["reconciliado"] for marca in marcas.values() if marca["reconciliado"]), default=None),
+            "ultimo_error": self.ultimo_error,
+            "marcas": marcas,
+        }
+
+
+agregador = AgregadorPlataforma(AGREGADOR_INTERVALO_SEGUNDOS, AGREGADOR_RECONCILIAR_HORAS)
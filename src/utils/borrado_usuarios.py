@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlmodel import Session, select, delete, update
+from src.config.db import engine
+from src.models.item import Item
+from src.models.trabajo_borrado import TrabajoBorrado
+from src.models.gasto import Gasto
+from src.models.inversion import Inversion
+from src.utils.resumenes import eliminar_resumenes_usuario
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+# Filas borradas por transacción en el borrado en segundo plano
+BORRADO_TAMANO_BLOQUE = int(os.getenv("BORRADO_TAMANO_BLOQUE", "5000"))
+# A partir de cuántos gastos + inversiones DELETE /items/{id} pasa a segundo plano
+BORRADO_UMBRAL_SEGUNDO_PLANO = int(os.getenv("BORRADO_UMBRAL_SEGUNDO_PLANO", "20000"))
+# Un trabajo activo que no avanzó en este tiempo se da por interrumpido (p. ej. por un reinicio)
+# y el siguiente DELETE /items/{id} lo retoma
+BORRADO_SIN_PROGRESO_SEGUNDOS = int(os.getenv("BORRADO_SIN_PROGRESO_SEGUNDOS", "300"))
+
+log = logging.getLogger(__name__)
+
+# Los borrados grandes corren de a uno: no compiten entre sí por locks ni por el pool
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="borrado")
+
+# Trabajos terminados que se conservan para consultar su estado
+_MAX_TRABAJOS = 100
+
+_ACTIVOS = ("pendiente", "en_curso")
+
+# Las tablas hijas de item, en el orden en que se vacían
+_TABLAS_MOVIMIENTOS = (Inversion, Gasto)
+
+
+def contar_movimientos(db: Session, usuario_id: int) -> int:
+    """Gastos + inversiones del usuario."""
+    return sum(
+        db.exec(select(func.count()).select_from(modelo).where(modelo.usuario_id == usuario_id)).one()
+        for modelo in _TABLAS_MOVIMIENTOS
+    )
+
+
+def borrar_usuario(db: Session, db_item: Item) -> None:
+    """
+    Borra el usuario con sus gastos, inversiones y resumen en una sola transacción,
+    con un DELETE por tabla (sin cargar filas en memoria).
+    """
+    for modelo in _TABLAS_MOVIMIENTOS:
+        db.exec(delete(modelo).where(modelo.usuario_id == db_item.id))
+    eliminar_resumenes_usuario(db, db_item.id)
+    db.delete(db_item)
+    db.commit()
+
+
+# --- BORRADO EN SEGUNDO PLANO ---
+# El estado de cada trabajo está en la tabla trabajo_borrado. El progreso se guarda en la misma
+# transacción que cada bloque borrado, así que la fila nunca cuenta filas que siguen existiendo.
+
+# Trabajos que este proceso tiene encolados o en ejecución
+_locales = set()
+_lock = threading.Lock()
+
+
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def como_dict(trabajo: TrabajoBorrado) -> dict:
+    """Estado del trabajo para la API, con el progreso entre 0 y 1."""
+    datos = trabajo.model_dump()
+    datos["progreso"] = round(trabajo.borradas / trabajo.total, 3) if trabajo.total else (1.0 if trabajo.estado == "completado" else 0.0)
+    return datos
+
+
+def _marcar(db: Session, trabajo_id: str, **valores) -> None:
+    db.exec(update(TrabajoBorrado).where(TrabajoBorrado.id == trabajo_id).values(actualizado=_ahora(), **valores))
+
+
+def _borrar_en_bloques(db: Session, modelo, usuario_id: int, trabajo_id: str) -> None:
+    # Se eligen los ids y luego se borran por id: MySQL no admite LIMIT en un
+    # subquery IN y SQLite no admite DELETE ... LIMIT
+    while True:
+        ids = db.exec(
+            select(modelo.id).where(modelo.usuario_id == usuario_id).order_by(modelo.id).limit(BORRADO_TAMANO_BLOQUE)
+        ).all()
+        if not ids:
+            return
+        db.exec(delete(modelo).where(modelo.id.in_(ids)))
+        _marcar(db, trabajo_id, borradas=TrabajoBorrado.borradas + len(ids))
+        db.commit()
+
+
+def _ejecutar(trabajo_id: str, usuario_id: int) -> None:
+    try:
+        with Session(engine) as db:
+            _marcar(db, trabajo_id, estado="en_curso")
+            db.commit()
+
+            # El resumen se borra recién en la última transacción, junto con el usuario: si el
+            # trabajo se interrumpe, el usuario no queda con movimientos y sin resumen
+            for modelo in _TABLAS_MOVIMIENTOS:
+                _borrar_en_bloques(db, modelo, usuario_id, trabajo_id)
+
+            # Última transacción: lo que se haya agregado durante el borrado, el resumen y el usuario
+            db_item = db.get(Item, usuario_id)
+            _marcar(db, trabajo_id, estado="completado", terminado=_ahora())
+            if db_item is not None:
+                borrar_usuario(db, db_item)  # hace el commit
+            else:
+                db.commit()
+    except Exception as e:
+        log.exception("Error borrando usuario", extra={"usuario_id": usuario_id, "trabajo_id": trabajo_id})
+        with Session(engine) as db:
+            _marcar(db, trabajo_id, estado="error", error=str(e)[:500], terminado=_ahora())
+            db.commit()
+    finally:
+        with _lock:
+            _locales.discard(trabajo_id)
+
+
+def _encolar(trabajo_id: str, usuario_id: int) -> None:
+    with _lock:
+        _locales.add(trabajo_id)
+    _executor.submit(_ejecutar, trabajo_id, usuario_id)
+
+
+def _retomar(db: Session, trabajo: TrabajoBorrado) -> bool:
+    """
+    Toma un trabajo activo sin progreso reciente. El UPDATE condicionado hace de compare-and-swap:
+    si dos workers intentan retomarlo a la vez, solo uno lo consigue.
+    """
+    limite = _ahora() - timedelta(seconds=BORRADO_SIN_PROGRESO_SEGUNDOS)
+    resultado = db.exec(
+        update(TrabajoBorrado)
+        .where(TrabajoBorrado.id == trabajo.id, TrabajoBorrado.estado.in_(_ACTIVOS), TrabajoBorrado.actualizado < limite)
+        .values(estado="pendiente", actualizado=_ahora())
+    )
+    db.commit()
+    return resultado.rowcount == 1
+
+
+def _purgar_terminados(db: Session) -> None:
+    viejos = db.exec(
+        select(TrabajoBorrado.id)
+        .where(TrabajoBorrado.terminado.is_not(None))
+        .order_by(TrabajoBorrado.terminado.desc())
+        .offset(_MAX_TRABAJOS)
+    ).all()
+    if viejos:
+        db.exec(delete(TrabajoBorrado).where(TrabajoBorrado.id.in_(viejos)))
+
+
+def iniciar_borrado(usuario_id: int, total: int) -> dict:
+    """
+    Encola el borrado del usuario y devuelve el estado del trabajo. Si ya hay uno activo para él
+    devuelve ese; si ese trabajo quedó sin avanzar más de BORRADO_SIN_PROGRESO_SEGUNDOS, lo retoma.
+    """
+    with Session(engine) as db:
+        activo = db.exec(
+            select(TrabajoBorrado)
+            .where(TrabajoBorrado.usuario_id == usuario_id, TrabajoBorrado.estado.in_(_ACTIVOS))
+            .order_by(TrabajoBorrado.creado.desc())
+        ).first()
+
+        if activo is not None:
+            with _lock:
+                local = activo.id in _locales
+            if not local and _retomar(db, activo):
+                log.info("Borrado retomado", extra={"usuario_id": usuario_id, "trabajo_id": activo.id})
+                _encolar(activo.id, usuario_id)
+                db.refresh(activo)
+            return como_dict(activo)
+
+        ahora = _ahora()
+        trabajo = TrabajoBorrado(id=uuid.uuid4().hex, usuario_id=usuario_id, total=total, creado=ahora, actualizado=ahora)
+        db.add(trabajo)
+        _purgar_terminados(db)
+        db.commit()
+        db.refresh(trabajo)
+        _encolar(trabajo.id, usuario_id)
+        return como_dict(trabajo)
+
+
+def obtener_trabajo(db: Session, trabajo_id: str) -> Optional[dict]:
+    trabajo = db.get(TrabajoBorrado, trabajo_id)
+    return None if trabajo is None else como_dict(trabajo)
+
+
+def listar_trabajos(db: Session) -> List[dict]:
+    """Trabajos recientes, del más nuevo al más viejo."""
+    trabajos = db.exec(select(TrabajoBorrado).order_by(TrabajoBorrado.creado.desc()).limit(_MAX_TRABAJOS)).all()
+    return [como_dict(trabajo) for trabajo in trabajos]
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Caché en memoria acotada por número de entradas (LRU) y por tiempo de vida (TTL).
+    Es segura entre hilos: las rutas sync de FastAPI corren en un threadpool.
+    """
+
+    def __init__(self, max_entradas: int = 1024, ttl_segundos: float = 300.0):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._datos: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave: Hashable) -> Optional[Any]:
+        """Devuelve el valor guardado o None si no existe o ya expiró."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            expira, valor = entrada
+            if expira <= ahora:
+                del self._datos[clave]
+                self.fallos += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def set(self, clave: Hashable, valor: Any, ttl_segundos: Optional[float] = None) -> None:
+        """Guarda un valor; ttl_segundos permite acortar el TTL por defecto para esta entrada."""
+        ttl = self.ttl_segundos if ttl_segundos is None else min(ttl_segundos, self.ttl_segundos)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave: Hashable) -> None:
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def estadisticas(self) -> dict:
+        """Tamaño actual y contadores de aciertos/fallos."""
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "ttl_segundos": self.ttl_segundos,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos
+        }
@@ -0,0 +1,113 @@
+import hashlib
+import os
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.models.resumen_mensual import ResumenMensual
+from src.utils.cache import CacheLRU
+from src.utils.serializacion import SERIALIZACION_RAPIDA, a_json
+
+load_dotenv()
+
+ANALISIS_CACHE_MAX = int(os.getenv("ANALISIS_CACHE_MAX", "1024"))
+ANALISIS_CACHE_TTL = float(os.getenv("ANALISIS_CACHE_TTL", "300"))
+
+# Caché por proceso: (usuario_id, endpoint, periodo, dia) -> (version, datos)
+# Con SERIALIZACION_RAPIDA, datos es el JSON ya codificado y un acierto no vuelve a serializar
+cache_analisis = CacheLRU(max_entradas=ANALISIS_CACHE_MAX, ttl_segundos=ANALISIS_CACHE_TTL)
+
+
+def version_usuario(db: Session, usuario_id: int) -> str:
+    """
+    Versión de los datos de análisis de un usuario, derivada de sus filas de resumen_mensual.
+    Todos los análisis leen de esa tabla y toda escritura la actualiza en la misma transacción,
+    así que la versión cambia con cada escritura confirmada y es la misma en todos los workers.
+    Una consulta sobre ix_resumen_mensual_usuario_id, mucho más barata que el análisis.
+    """
+    peso = ResumenMensual.id + 1
+    statement = select(
+        func.count(),
+        func.max(ResumenMensual.id),
+        func.sum(ResumenMensual.cantidad),
+        func.sum(ResumenMensual.cantidad * peso),
+        func.sum(ResumenMensual.total),
+        func.sum(ResumenMensual.total * peso)
+    ).where(ResumenMensual.usuario_id == usuario_id)
+    # Las sumas ponderadas por id detectan movimientos entre grupos que no cambian los totales
+    return ":".join(str(valor) for valor in db.exec(statement).one())
+
+
+def _calcular_etag(usuario_id: int, version: str, endpoint: str, periodo: Hashable) -> str:
+    base = f"{usuario_id}:{version}:{endpoint}:{periodo}:{date.today().isoformat()}"
+    return f'W/"{hashlib.sha1(base.encode()).hexdigest()[:20]}"'
+
+
+def _buscar(request: Request, version: str, usuario_id: int, endpoint: str, periodo: Hashable):
+    """
+    Resuelve lo que solo depende de la versión de los datos.
+    Devuelve (respuesta, clave, headers); respuesta es None si hay que calcular.
+    """
+    etag = _calcular_etag(usuario_id, version, endpoint, periodo)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers), None, headers
+
+    clave = (usuario_id, endpoint, periodo, date.today())
+    entrada = cache_analisis.get(clave)
+    if entrada is not None and entrada[0] == version:
+        return _respuesta(entrada[1], headers), clave, headers
+
+    return None, clave, headers
+
+
+def _respuesta(datos: Any, headers: dict) -> Response:
+    if isinstance(datos, bytes):
+        return Response(content=datos, media_type="application/json", headers=headers)
+    return JSONResponse(content=datos, headers=headers)
+
+
+def _guardar(clave: Hashable, version: str, headers: dict, resultado: Any) -> Response:
+    datos = a_json(resultado) if SERIALIZACION_RAPIDA else jsonable_encoder(resultado)
+    cache_analisis.set(clave, (version, datos))
+    return _respuesta(datos, headers)
+
+
+def responder_cacheado(
+    request: Request,
+    db: Session,
+    usuario_id: int,
+    endpoint: str,
+    periodo: Hashable,
+    calcular: Callable[[], Any]
+) -> Response:
+    """
+    Devuelve 304 si el ETag del cliente coincide, el valor cacheado si sigue vigente,
+    o ejecuta `calcular()` y guarda el resultado. Sin `calcular()` solo se consulta la versión.
+    """
+    version = version_usuario(db, usuario_id)
+    respuesta, clave, headers = _buscar(request, version, usuario_id, endpoint, periodo)
+    if respuesta is not None:
+        return respuesta
+    return _guardar(clave, version, headers, calcular())
+
+
+async def responder_cacheado_async(
+    request: Request,
+    db: AsyncSession,
+    usuario_id: int,
+    endpoint: str,
+    periodo: Hashable,
+    calcular: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Igual que responder_cacheado, pero `calcular()` es una corrutina."""
+    version = await db.run_sync(version_usuario, usuario_id)
+    respuesta, clave, headers = _buscar(request, version, usuario_id, endpoint, periodo)
+    if respuesta is not None:
+        return respuesta
+    return _guardar(clave, version, headers, await calcular())
@@ -0,0 +1,52 @@
+from typing import List
+from sqlalchemy import insert, func
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+from sqlmodel import Session, select
+
+# Inserción por lote con SQLAlchemy Core: un executemany en lugar de un INSERT por objeto
+# (el flush del ORM sólo agrupa filas cuando puede devolver los IDs en orden, algo que
+# ni pymysql ni sqlite ofrecen).
+
+
+def _returning_ordenado(db: Session) -> bool:
+    """True si el dialecto agrupa INSERT ... RETURNING conservando el orden de los parámetros."""
+    dialecto = db.get_bind().dialect
+    return bool(
+        dialecto.insert_executemany_returning_sort_by_parameter_order
+        and dialecto.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT
+    )
+
+
+def insertar_filas(db: Session, modelo, filas: List[dict], usuario_id: int) -> List[int]:
+    """
+    Inserta las filas (todas de usuario_id) en la transacción de db y devuelve sus IDs
+    en el mismo orden que filas.
+
+    Con RETURNING ordenado (PostgreSQL) los IDs vuelven del propio INSERT. En MySQL y SQLite
+    se vuelven a leer los IDs del usuario mayores que el máximo previo: la lectura del
+    máximo abre el snapshot de la transacción (REPEATABLE READ en InnoDB; SQLite serializa
+    las escrituras), así que sólo aparecen las filas insertadas aquí, en orden de inserción.
+    """
+    if not filas:
+        return []
+
+    tabla = modelo.__table__
+    conexion = db.connection()
+
+    if _returning_ordenado(db):
+        resultado = conexion.execute(
+            insert(tabla).returning(tabla.c.id, sort_by_parameter_order=True), filas
+        )
+        return list(resultado.scalars())
+
+    id_previo = db.exec(
+        select(func.coalesce(func.max(tabla.c.id), 0)).where(tabla.c.usuario_id == usuario_id)
+    ).one()
+    # executemany en una sola ida al servidor (pymysql lo reescribe como un INSERT multi-fila)
+    conexion.execute(insert(tabla), filas)
+    ids = db.exec(
+        select(tabla.c.id)
+        .where(tabla.c.usuario_id == usuario_id, tabla.c.id > id_previo)
+        .order_by(tabla.c.id)
+    ).all()
+    return list(ids)
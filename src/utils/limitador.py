@@ -0,0 +1,44 @@
+import threading
+from typing import Dict
+
+
+class LimitadorConcurrencia:
+    """
+    Cupos de ejecución simultánea: uno global y otro por clave (usuario o IP).
+    reservar() no espera: devuelve False si no hay cupo, para responder 429 de inmediato.
+    """
+
+    def __init__(self, max_global: int, max_por_clave: int):
+        self.max_global = max_global
+        self.max_por_clave = max_por_clave
+        self.en_curso = 0
+        self.rechazadas = 0
+        self._por_clave: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def reservar(self, clave: str) -> bool:
+        with self._lock:
+            if self.en_curso >= self.max_global or self._por_clave.get(clave, 0) >= self.max_por_clave:
+                self.rechazadas += 1
+                return False
+            self.en_curso += 1
+            self._por_clave[clave] = self._por_clave.get(clave, 0) + 1
+            return True
+
+    def liberar(self, clave: str) -> None:
+        with self._lock:
+            self.en_curso -= 1
+            restantes = self._por_clave.get(clave, 1) - 1
+            if restantes <= 0:
+                self._por_clave.pop(clave, None)
+            else:
+                self._por_clave[clave] = restantes
+
+    def estadisticas(self) -> dict:
+        return {
+            "en_curso": self.en_curso,
+            "max_global": self.max_global,
+            "max_por_clave": self.max_por_clave,
+            "claves_activas": len(self._por_clave),
+            "rechazadas": self.rechazadas
+        }
@@ -0,0 +1,293 @@
+import bisect
+from collections import Counter
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Métricas en memoria del proceso, expuestas en formato de texto de Prometheus (GET /metrics).
+# Con varios workers de uvicorn cada uno tiene las suyas: Prometheus las distingue por instancia.
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Rutas sin plantilla (404, archivos estáticos) comparten esta etiqueta para no crear
+# una serie por cada URL distinta
+RUTA_OTRAS = "otras"
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Tuple, extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _cabecera(self) -> list:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+
+    def inc(self, valores: Tuple = (), cantidad: float = 1) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exportar(self) -> list:
+        with self._lock:
+            valores = dict(self._valores)
+        return self._cabecera() + [
+            f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {valor}" for clave, valor in sorted(valores.items())
+        ]
+
+
+class Medidor(Contador):
+    """Valor que sube y baja (p. ej. requests en curso)."""
+    tipo = "gauge"
+
+    def dec(self, valores: Tuple = (), cantidad: float = 1) -> None:
+        self.inc(valores, -cantidad)
+
+    def establecer(self, valor: float, valores: Tuple = ()) -> None:
+        with self._lock:
+            self._valores[valores] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteos por bucket (+Inf al final), suma]
+        self._series: Dict[Tuple, list] = {}
+
+    def observar(self, valor: float, valores: Tuple = ()) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exportar(self) -> list:
+        with self._lock:
+            series = {clave: (list(conteos), suma) for clave, (conteos, suma) in self._series.items()}
+
+        lineas = self._cabecera()
+        for clave, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ("+Inf",), conteos):
+                acumulado += conteo
+                le = limite if limite == "+Inf" else repr(float(limite))
+                etiqueta_le = f'le="{le}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, etiqueta_le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {suma}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+# --- MÉTRICAS DE LA APP ---
+
+http_duracion = Histograma(
+    "finanzas_http_duracion_segundos", "Latencia de las requests por ruta", ("metodo", "ruta")
+)
+http_requests = Contador(
+    "finanzas_http_requests_total", "Requests atendidas por ruta y código de estado", ("metodo", "ruta", "estado")
+)
+http_en_curso = Medidor("finanzas_http_en_curso", "Requests en curso")
+arranque_segundos = Medidor("finanzas_arranque_segundos", "Duración de cada fase del arranque del worker", ("fase",))
+
+db_consultas = Contador("finanzas_db_consultas_total", "Sentencias SQL ejecutadas", ("ruta",))
+db_consultas_por_request = Histograma(
+    "finanzas_db_consultas_por_request", "Sentencias SQL por request", ("ruta",), BUCKETS_CONSULTAS
+)
+db_tiempo_consultas = Histograma(
+    "finanzas_db_tiempo_consultas_segundos", "Tiempo total en la base de datos por request", ("ruta",)
+)
+db_espera_pool = Histograma(
+    "finanzas_db_espera_pool_segundos", "Tiempo por request esperando una conexión del pool", ("ruta",)
+)
+
+METRICAS = (
+    http_duracion, http_requests, http_en_curso, db_consultas, db_consultas_por_request, db_tiempo_consultas, db_espera_pool,
+    arranque_segundos,
+)
+
+
+def exportar_prometheus() -> str:
+    lineas = []
+    for metrica in METRICAS:
+        lineas.extend(metrica.exportar())
+    return "\n".join(lineas) + "\n"
+
+
+# --- MEDICIÓN POR REQUEST ---
+
+@dataclass
+class MedicionDB:
+    consultas: int = 0
+    segundos_consultas: float = 0.0
+    segundos_espera_pool: float = 0.0
+    # Solo con un observador registrado: sentencia SQL -> veces ejecutada en la request
+    sentencias: Optional[Counter] = None
+
+
+# El middleware crea una medición por request; las rutas sync corren en el threadpool con
+# una copia del contexto, pero comparten este mismo objeto y lo van acumulando
+_medicion_actual: ContextVar[Optional[MedicionDB]] = ContextVar("medicion_db", default=None)
+
+
+def medicion_actual() -> Optional[MedicionDB]:
+    return _medicion_actual.get()
+
+
+# Recibe (metodo, ruta, medicion) al terminar cada request; lo usa el detector de N+1
+# (src/utils/presupuesto_consultas.py). Sin observador no se guardan las sentencias.
+_observador: Optional[Callable[[str, str, MedicionDB], None]] = None
+
+
+def registrar_observador(funcion: Optional[Callable[[str, str, MedicionDB], None]]) -> None:
+    global _observador
+    _observador = funcion
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("metricas_inicio")
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.consultas += 1
+        medicion.segundos_consultas += duracion
+        if medicion.sentencias is not None:
+            medicion.sentencias[statement] += 1
+
+
+def _error_al_ejecutar(contexto_excepcion):
+    # La sentencia falló: se descarta su inicio para no desalinear la pila
+    inicios = contexto_excepcion.connection.info.get("metricas_inicio") if contexto_excepcion.connection else None
+    if inicios:
+        inicios.pop()
+
+
+def instrumentar_engine(motor) -> None:
+    """Cuenta sentencias y mide su duración en la request en curso. Acepta engines sync o async."""
+    motor = getattr(motor, "sync_engine", motor)
+    if event.contains(motor, "before_cursor_execute", _antes_de_ejecutar):
+        return
+    event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+    event.listen(motor, "handle_error", _error_al_ejecutar)
+
+
+class _EsperaMedida:
+    """
+    Mide cuánto tarda el pool en entregar una conexión (incluida la espera cuando todas
+    están en uso). Los eventos del pool se disparan después de obtenerla, por eso se
+    mide en _do_get.
+    """
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            medicion = _medicion_actual.get()
+            if medicion is not None:
+                medicion.segundos_espera_pool += time.perf_counter() - inicio
+
+
+# Con el logger de los pools originales, los mensajes del pool siguen bajo "sqlalchemy"
+# (nivel WARNING por defecto) y no bajo este módulo
+
+class QueuePoolMedido(_EsperaMedida, QueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class AsyncQueuePoolMedido(_EsperaMedida, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+# --- MIDDLEWARE ---
+
+def _plantilla_ruta(scope) -> str:
+    ruta = scope.get("route")
+    if ruta is None:
+        return RUTA_OTRAS
+    # path_format quita los convertidores: /items/{item_id:int} -> /items/{item_id}
+    return getattr(ruta, "path_format", None) or getattr(ruta, "path", RUTA_OTRAS)
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI: latencia, código de estado y consultas a la base por plantilla de ruta.
+    La latencia incluye el envío del cuerpo completo (también en respuestas en streaming).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = {"codigo": 500}
+
+        async def send_medido(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["codigo"] = mensaje["status"]
+            await send(mensaje)
+
+        observador = _observador
+        medicion = MedicionDB(sentencias=Counter() if observador is not None else None)
+        token = _medicion_actual.set(medicion)
+        http_en_curso.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_medido)
+        finally:
+            duracion = time.perf_counter() - inicio
+            http_en_curso.dec()
+            _medicion_actual.reset(token)
+
+            # El router completa scope["route"] al resolver la ruta
+            ruta = _plantilla_ruta(scope)
+            metodo = scope["method"]
+            http_duracion.observar(duracion, (metodo, ruta))
+            http_requests.inc((metodo, ruta, str(estado["codigo"])))
+            if medicion.consultas:
+                db_consultas.inc((ruta,), medicion.consultas)
+                db_tiempo_consultas.observar(medicion.segundos_consultas, (ruta,))
+                db_espera_pool.observar(medicion.segundos_espera_pool, (ruta,))
+            db_consultas_por_request.observar(medicion.consultas, (ruta,))
+            if observador is not None:
+                observador(metodo, ruta, medicion)
@@ -0,0 +1,56 @@
+import base64
+from datetime import date
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlmodel import tuple_
+
+# Paginación por cursor (keyset) sobre (fecha, id), o (valor, id) con otra columna ordenable.
+# El cursor es opaco para el cliente: base64 de "AAAA-MM-DD:id" (o "valor:id") de la última fila entregada.
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+def codificar_cursor(valor: Any, id: int) -> str:
+    texto = valor.isoformat() if isinstance(valor, date) else str(valor)
+    return base64.urlsafe_b64encode(f"{texto}:{id}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, convertir: Callable[[str], Any] = date.fromisoformat) -> Tuple[Any, int]:
+    """Convierte el cursor en (valor, id); por defecto el valor es una fecha. Lanza 400 si está mal formado."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        # rsplit: el valor (p. ej. un correo) puede contener ":"
+        valor_str, id_str = base64.urlsafe_b64decode(cursor + relleno).decode().rsplit(":", 1)
+        return convertir(valor_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def paginar(
+    statement,
+    columna_fecha,
+    columna_id,
+    cursor: Optional[str],
+    limite: int,
+    orden: str,
+    convertir: Callable[[str], Any] = date.fromisoformat
+):
+    """
+    Aplica orden (fecha, id) y la condición de keyset a una consulta. Con `convertir`,
+    columna_fecha puede ser cualquier columna ordenable (p. ej. str para nombre o correo).
+    Pide limite + 1 filas para saber si existe una página siguiente.
+    """
+    if cursor is not None:
+        fecha, id = decodificar_cursor(cursor, convertir)
+        if orden == "asc":
+            statement = statement.where(tuple_(columna_fecha, columna_id) > (fecha, id))
+        else:
+            statement = statement.where(tuple_(columna_fecha, columna_id) < (fecha, id))
+
+    if orden == "asc":
+        statement = statement.order_by(columna_fecha.asc(), columna_id.asc())
+    else:
+        statement = statement.order_by(columna_fecha.desc(), columna_id.desc())
+
+    return statement.limit(limite + 1)
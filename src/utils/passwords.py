@@ -0,0 +1,70 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# PBKDF2-SHA256 de la librería estándar: con sal por contraseña y costo ajustable.
+# Subir PASSWORD_ITERACIONES hace que los hashes viejos se regeneren en el siguiente login.
+ALGORITMO = "pbkdf2_sha256"
+PASSWORD_ITERACIONES = int(os.getenv("PASSWORD_ITERACIONES", "600000"))
+
+# hashlib libera el GIL mientras calcula, así que los hilos sí corren en paralelo.
+# El pool acota cuántos hashes se calculan a la vez: una ráfaga de logins hace cola aquí
+# en lugar de ocupar todos los núcleos y el threadpool de las demás rutas.
+PASSWORD_HILOS = int(os.getenv("PASSWORD_HILOS", str(min(4, os.cpu_count() or 1))))
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HILOS, thread_name_prefix="password")
+
+
+def _b64(datos: bytes) -> str:
+    return base64.b64encode(datos).decode().rstrip("=")
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def hashear(contraseña: str, iteraciones: int = PASSWORD_ITERACIONES) -> str:
+    """Devuelve 'pbkdf2_sha256$iteraciones$sal$hash'."""
+    sal = secrets.token_bytes(16)
+    derivada = hashlib.pbkdf2_hmac("sha256", contraseña.encode(), sal, iteraciones)
+    return f"{ALGORITMO}${iteraciones}${_b64(sal)}${_b64(derivada)}"
+
+
+def es_hash(valor: str) -> bool:
+    return valor.startswith(f"{ALGORITMO}$")
+
+
+def verificar(contraseña: str, almacenada: str) -> Tuple[bool, bool]:
+    """
+    Compara la contraseña con lo guardado. Devuelve (coincide, hay_que_rehashear).
+    Acepta filas antiguas en texto plano: si coinciden, piden rehash.
+    """
+    if not es_hash(almacenada):
+        return hmac.compare_digest(contraseña.encode(), almacenada.encode()), True
+
+    try:
+        _, iteraciones, sal, esperado = almacenada.split("$")
+        iteraciones = int(iteraciones)
+        derivada = hashlib.pbkdf2_hmac("sha256", contraseña.encode(), _desde_b64(sal), iteraciones)
+    except ValueError:
+        return False, False
+
+    coincide = hmac.compare_digest(derivada, _desde_b64(esperado))
+    return coincide, coincide and iteraciones < PASSWORD_ITERACIONES
+
+
+# --- EJECUCIÓN EN EL POOL ---
+
+async def hashear_async(contraseña: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, hashear, contraseña)
+
+
+async def verificar_async(contraseña: str, almacenada: str) -> Tuple[bool, bool]:
+    return await asyncio.get_running_loop().run_in_executor(_executor, verificar, contraseña, almacenada)
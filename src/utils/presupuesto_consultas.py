@@ -0,0 +1,156 @@
+"""
+Detector de N+1 y presupuesto de consultas por request (opcional).
+
+Con DB_DETECTAR_N1=true cada request cuenta sus sentencias SQL y agrupa las que tienen la
+misma forma (misma sentencia con distintos parámetros). Se registra un WARNING cuando una
+forma se repite DB_N1_UMBRAL veces o más, o cuando una ruta supera su presupuesto
+declarado en DB_PRESUPUESTOS.
+
+En pruebas, presupuesto_consultas() hace fallar el bloque si alguna request lo excede:
+
+    with presupuesto_consultas(maximo=3):
+        client.get("/analisis/tendencia-mensual", headers=headers)
+"""
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from src.utils.metricas import MedicionDB, registrar_observador
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+DB_DETECTAR_N1 = os.getenv("DB_DETECTAR_N1", "false").strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+# Repeticiones de una misma forma en una request a partir de las cuales se avisa
+DB_N1_UMBRAL = int(os.getenv("DB_N1_UMBRAL", "3"))
+# Máximo de sentencias por ruta: "GET /analisis/tendencia-mensual=4,DELETE /items/{item_id}=6"
+DB_PRESUPUESTOS = os.getenv("DB_PRESUPUESTOS", "")
+
+log = logging.getLogger(__name__)
+
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+class PresupuestoExcedido(AssertionError):
+    """Una request superó el presupuesto de consultas (pensado para fallar una prueba)."""
+
+
+@dataclass
+class ReporteConsultas:
+    metodo: str
+    ruta: str
+    consultas: int
+    # forma de la sentencia -> repeticiones (solo las que alcanzan el umbral)
+    repetidas: Dict[str, int] = field(default_factory=dict)
+
+    def describir(self) -> str:
+        lineas = [f"{self.metodo} {self.ruta}: {self.consultas} consultas"]
+        for forma, veces in sorted(self.repetidas.items(), key=lambda par: -par[1]):
+            lineas.append(f"  {veces}x {forma[:200]}")
+        return "\n".join(lineas)
+
+
+def forma_sentencia(sql: str) -> str:
+    """Normaliza una sentencia: listas de parámetros IN (...) y literales numéricos se colapsan."""
+    forma = _ESPACIOS.sub(" ", sql).strip()
+    forma = _LISTA_PARAMETROS.sub("(?)", forma)
+    return _NUMERO.sub("?", forma)
+
+
+def _parsear_presupuestos(texto: str) -> Dict[str, int]:
+    presupuestos = {}
+    for parte in texto.split(","):
+        if "=" in parte:
+            ruta, maximo = parte.rsplit("=", 1)
+            presupuestos[" ".join(ruta.split())] = int(maximo)
+    return presupuestos
+
+
+_presupuestos_ruta = _parsear_presupuestos(DB_PRESUPUESTOS)
+
+
+def armar_reporte(metodo: str, ruta: str, medicion: MedicionDB, umbral: int = DB_N1_UMBRAL) -> ReporteConsultas:
+    formas: Dict[str, int] = {}
+    for sentencia, veces in (medicion.sentencias or {}).items():
+        forma = forma_sentencia(sentencia)
+        formas[forma] = formas.get(forma, 0) + veces
+    repetidas = {forma: veces for forma, veces in formas.items() if veces >= umbral}
+    return ReporteConsultas(metodo, ruta, medicion.consultas, repetidas)
+
+
+# --- PRESUPUESTOS ACTIVOS (pruebas) ---
+
+class _Presupuesto:
+    def __init__(self, maximo: Optional[int], max_repeticiones: Optional[int]):
+        self.maximo = maximo
+        self.max_repeticiones = max_repeticiones
+        self.reportes: List[ReporteConsultas] = []
+
+    def excedidos(self) -> List[ReporteConsultas]:
+        return [
+            reporte for reporte in self.reportes
+            if (self.maximo is not None and reporte.consultas > self.maximo)
+            or (self.max_repeticiones is not None and any(v > self.max_repeticiones for v in reporte.repetidas.values()))
+        ]
+
+
+_activos: List[_Presupuesto] = []
+_lock = threading.Lock()
+
+
+def _observar(metodo: str, ruta: str, medicion: MedicionDB) -> None:
+    with _lock:
+        activos = list(_activos)
+
+    umbral = min([DB_N1_UMBRAL] + [p.max_repeticiones + 1 for p in activos if p.max_repeticiones is not None])
+    reporte = armar_reporte(metodo, ruta, medicion, umbral)
+
+    for presupuesto in activos:
+        presupuesto.reportes.append(reporte)
+
+    if not DB_DETECTAR_N1:
+        return
+    if any(veces >= DB_N1_UMBRAL for veces in reporte.repetidas.values()):
+        log.warning("Posible N+1\n%s", reporte.describir(), extra={"ruta": ruta, "consultas": reporte.consultas})
+    maximo = _presupuestos_ruta.get(f"{metodo} {ruta}")
+    if maximo is not None and reporte.consultas > maximo:
+        log.warning(
+            "Presupuesto de consultas excedido (%s > %s)\n%s", reporte.consultas, maximo, reporte.describir(),
+            extra={"ruta": ruta, "consultas": reporte.consultas}
+        )
+
+
+@contextmanager
+def presupuesto_consultas(maximo: Optional[int] = None, max_repeticiones: Optional[int] = None) -> Iterator[_Presupuesto]:
+    """
+    Registra las requests atendidas dentro del bloque y lanza PresupuestoExcedido al salir
+    si alguna ejecutó más de `maximo` sentencias o repitió una misma forma más de
+    `max_repeticiones` veces. Funciona sin DB_DETECTAR_N1.
+    """
+    presupuesto = _Presupuesto(maximo, max_repeticiones)
+    with _lock:
+        _activos.append(presupuesto)
+        registrar_observador(_observar)
+    try:
+        yield presupuesto
+    finally:
+        with _lock:
+            _activos.remove(presupuesto)
+            if not _activos and not DB_DETECTAR_N1:
+                registrar_observador(None)
+
+    excedidos = presupuesto.excedidos()
+    if excedidos:
+        raise PresupuestoExcedido("Presupuesto de consultas excedido:\n" + "\n".join(r.describir() for r in excedidos))
+
+
+def configurar_detector() -> None:
+    """Con DB_DETECTAR_N1=true revisa todas las requests (staging); si no, no hace nada."""
+    if DB_DETECTAR_N1:
+        registrar_observador(_observar)
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = logging.getLogger(__name__)
+
+# CHAT_PROVEEDOR elige la implementación: "gemini" (por defecto) o "fake" (local, sin red)
+CHAT_PROVEEDOR = os.getenv("CHAT_PROVEEDOR", "gemini")
+CHAT_MODELO = os.getenv("CHAT_MODELO", "models/gemini-2.5-flash")
+
+# Latencia simulada del proveedor fake (segundos por respuesta)
+CHAT_FAKE_LATENCIA = float(os.getenv("CHAT_FAKE_LATENCIA", "0.5"))
+
+
+@dataclass(frozen=True)
+class ConfigGeneracion:
+    temperature: float = 0.7
+    max_output_tokens: int = 2048
+    top_p: float = 0.95
+    top_k: int = 40
+
+
+@dataclass
+class RespuestaChat:
+    texto: str
+    modelo: str
+    # True si el proveedor cortó la respuesta por max_output_tokens
+    cortada_por_limite: bool = False
+
+
+class ErrorProveedorChat(Exception):
+    """Error del proveedor con un mensaje y una sugerencia aptos para el usuario."""
+
+    def __init__(self, mensaje: str, sugerencia: Optional[str] = None):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.sugerencia = sugerencia
+
+
+class ProveedorChat(ABC):
+    """
+    Interfaz de los proveedores de chat. Los métodos son bloqueantes:
+    chat_router los ejecuta en un pool de hilos propio, nunca en el event loop.
+    """
+
+    nombre = "base"
+    modelo = ""
+
+    @abstractmethod
+    def generar(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> RespuestaChat:
+        ...
+
+    def generar_stream(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> Iterator[str]:
+        """Entrega la respuesta en fragmentos a medida que llegan. Por defecto, un único fragmento."""
+        yield self.generar(mensaje, config, timeout).texto
+
+    @abstractmethod
+    def listar_modelos(self) -> List[dict]:
+        ...
+
+
+# --- GEMINI ---
+
+class ProveedorGemini(ProveedorChat):
+    nombre = "gemini"
+
+    def __init__(self, api_key: Optional[str], modelo: str = CHAT_MODELO):
+        self.api_key = api_key
+        self.modelo = modelo
+        self._sdk = None
+        self._lock = threading.Lock()
+
+    def _genai(self):
+        """
+        google.generativeai se importa y configura en la primera llamada a /chat, no al importar
+        la app: el import tarda alrededor de un segundo y la mayoría de los workers no lo usa de inmediato.
+        """
+        if self._sdk is None:
+            with self._lock:
+                if self._sdk is None:
+                    inicio = time.perf_counter()
+                    import google.generativeai as genai
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._sdk = genai
+                    log.info("SDK de Gemini cargado", extra={"ms": round((time.perf_counter() - inicio) * 1000, 1)})
+        return self._sdk
+
+    def _verificar_api_key(self) -> None:
+        if not self.api_key:
+            raise ErrorProveedorChat("API key no configurada", "Define GEMINI_API_KEY en el archivo .env")
+
+    def _config(self, config: ConfigGeneracion):
+        return self._genai().GenerationConfig(
+            temperature=config.temperature,
+            max_output_tokens=config.max_output_tokens,
+            top_p=config.top_p,
+            top_k=config.top_k
+        )
+
+    def generar(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> RespuestaChat:
+        self._verificar_api_key()
+        model = self._genai().GenerativeModel(self.modelo)
+        response = model.generate_content(
+            mensaje,
+            generation_config=self._config(config),
+            request_options={"timeout": timeout}
+        )
+
+        candidato = response.candidates[0] if response.candidates else None
+        cortada = (
+            candidato is not None and
+            hasattr(candidato, "finish_reason") and
+            candidato.finish_reason.name == "MAX_TOKENS"
+        )
+        return RespuestaChat(texto=response.text, modelo=self.modelo.split("/")[-1], cortada_por_limite=cortada)
+
+    def generar_stream(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> Iterator[str]:
+        self._verificar_api_key()
+        model = self._genai().GenerativeModel(self.modelo)
+        response = model.generate_content(
+            mensaje,
+            generation_config=self._config(config),
+            request_options={"timeout": timeout},
+            stream=True
+        )
+        for fragmento in response:
+            if fragmento.text:
+                yield fragmento.text
+
+    def listar_modelos(self) -> List[dict]:
+        self._verificar_api_key()
+        return [
+            {"name": m.name, "display_name": m.display_name, "description": m.description}
+            for m in self._genai().list_models()
+            if "generateContent" in m.supported_generation_methods
+        ]
+
+
+# --- FAKE (pruebas y carga sin red) ---
+
+class ProveedorFake(ProveedorChat):
+    """Responde con un texto fijo tras CHAT_FAKE_LATENCIA segundos; el stream reparte esa latencia por palabra."""
+
+    nombre = "fake"
+    modelo = "fake"
+
+    def __init__(self, latencia: float = CHAT_FAKE_LATENCIA):
+        self.latencia = latencia
+
+    def _texto(self, mensaje: str) -> str:
+        pregunta = mensaje.rsplit("Usuario:", 1)[-1].strip()
+        return f"Respuesta de prueba a: {pregunta[:200]}. ¿Quieres más detalles?"
+
+    def generar(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> RespuestaChat:
+        time.sleep(self.latencia)
+        return RespuestaChat(texto=self._texto(mensaje), modelo="fake")
+
+    def generar_stream(self, mensaje: str, config: ConfigGeneracion, timeout: float) -> Iterator[str]:
+        palabras = self._texto(mensaje).split(" ")
+        pausa = self.latencia / len(palabras)
+        for i, palabra in enumerate(palabras):
+            time.sleep(pausa)
+            yield palabra if i == 0 else " " + palabra
+
+    def listar_modelos(self) -> List[dict]:
+        return [{"name": "models/fake", "display_name": "Fake", "description": "Proveedor local de pruebas"}]
+
+
+def crear_proveedor(nombre: str = CHAT_PROVEEDOR) -> ProveedorChat:
+    if nombre == "fake":
+        return ProveedorFake()
+    if nombre == "gemini":
+        return ProveedorGemini(os.getenv("GEMINI_API_KEY"))
+    raise ValueError(f"Proveedor de chat desconocido: {nombre}")
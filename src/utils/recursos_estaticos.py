@@ -0,0 +1,251 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo hay variantes gzip
+    brotli = None
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+# Releer plantillas y estáticos cuando cambian en disco (solo para desarrollo)
+ESTATICOS_RECARGAR = os.getenv("ESTATICOS_RECARGAR", "false").lower() in ("1", "true", "yes")
+
+# Variantes comprimidas generadas con `python -m src.utils.recursos_estaticos`,
+# nombradas por el hash del contenido: nunca se sirve una variante vieja
+COMPRIMIDOS_DIR = Path(os.getenv("ESTATICOS_COMPRIMIDOS_DIR", Path(__file__).resolve().parent.parent / ".comprimidos"))
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# Por debajo de este tamaño la compresión no compensa
+_MINIMO_COMPRIMIR = 256
+
+# href/src de las plantillas y url() de los CSS que apuntan a /static
+_REF_PLANTILLA = re.compile(r'''(href|src)=(["'])(?:\.\./|/)static/([^"'?#]+)\2''')
+_REF_CSS = re.compile(r'''url\((["']?)([^"')?#:]+)\1\)''')
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Recurso:
+    """Un archivo listo para servir: contenido, variantes comprimidas y ETag."""
+    contenido: bytes
+    media_type: str
+    huella: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    def variante(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        aceptadas = _codificaciones_aceptadas(accept_encoding)
+        if self.br is not None and "br" in aceptadas:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in aceptadas:
+            return self.gzip, "gzip"
+        return self.contenido, None
+
+
+def _codificaciones_aceptadas(accept_encoding: str) -> set:
+    aceptadas = set()
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if parametros.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if nombre:
+            aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+def _etag(huella: str, codificacion: Optional[str]) -> str:
+    # Cada variante lleva su propio ETag fuerte; un If-None-Match con cualquiera de ellos vale
+    return f'"{huella}-{codificacion}"' if codificacion else f'"{huella}"'
+
+
+def _coincide_etag(if_none_match: str, huella: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for etiqueta in if_none_match.split(","):
+        etiqueta = etiqueta.strip()
+        if etiqueta.startswith("W/"):
+            etiqueta = etiqueta[2:]
+        if etiqueta.strip('"').split("-")[0] == huella:
+            return True
+    return False
+
+
+def _comprimir(contenido: bytes, huella: str, maxima: bool) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """Devuelve (gzip, br). Usa las variantes del build si existen; si no, comprime en memoria."""
+    if len(contenido) < _MINIMO_COMPRIMIR:
+        return None, None
+
+    ruta_gz = COMPRIMIDOS_DIR / f"{huella}.gz"
+    ruta_br = COMPRIMIDOS_DIR / f"{huella}.br"
+    variante_gz = ruta_gz.read_bytes() if ruta_gz.is_file() else gzip.compress(contenido, compresslevel=9, mtime=0)
+    variante_br = None
+    if ruta_br.is_file():
+        variante_br = ruta_br.read_bytes()
+    elif brotli is not None:
+        # Calidad 11 solo en el build: en el arranque tarda demasiado
+        variante_br = brotli.compress(contenido, quality=11 if maxima else 5)
+
+    # Una variante que no achica el archivo no se ofrece
+    if len(variante_gz) >= len(contenido):
+        variante_gz = None
+    if variante_br is not None and len(variante_br) >= len(contenido):
+        variante_br = None
+    return variante_gz, variante_br
+
+
+class RecursosEstaticos:
+    """
+    Plantillas HTML y archivos de /static cargados en memoria al arrancar.
+    Cada estático se publica además con el hash del contenido en el nombre
+    (css/styles.3f2a9c1b0d4e.css), que se sirve con Cache-Control immutable; las
+    plantillas y los CSS se reescriben para apuntar a esos nombres.
+    """
+
+    def __init__(self, static_dir: Path, templates_dir: Path):
+        self.static_dir = static_dir
+        self.templates_dir = templates_dir
+        self.archivos: Dict[str, Recurso] = {}
+        self.con_hash: Dict[str, str] = {}  # ruta con hash -> ruta original
+        self.urls: Dict[str, str] = {}  # ruta original -> ruta con hash
+        self.plantillas: Dict[str, Recurso] = {}
+        self._firma: Optional[tuple] = None
+
+    # --- CARGA ---
+
+    def _firma_disco(self) -> tuple:
+        return tuple(
+            (str(ruta), ruta.stat().st_mtime_ns)
+            for directorio in (self.static_dir, self.templates_dir)
+            for ruta in sorted(directorio.rglob("*")) if ruta.is_file()
+        )
+
+    def _recurso(self, contenido: bytes, nombre: str, maxima: bool = False) -> Recurso:
+        huella = hashlib.sha256(contenido).hexdigest()[:16]
+        media_type = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            media_type += "; charset=utf-8"
+        variante_gz, variante_br = _comprimir(contenido, huella, maxima)
+        return Recurso(contenido=contenido, media_type=media_type, huella=huella, gzip=variante_gz, br=variante_br)
+
+    def _publicar(self, ruta: str, maxima: bool, en_curso: set) -> Optional[str]:
+        """Carga un estático (primero lo que referencia, si es CSS) y devuelve su ruta con hash."""
+        if ruta in self.urls:
+            return self.urls[ruta]
+        archivo = self.static_dir / ruta
+        if ruta in en_curso or not archivo.is_file():
+            return None
+        en_curso.add(ruta)
+
+        contenido = archivo.read_bytes()
+        if archivo.suffix == ".css":
+            carpeta = Path(ruta).parent
+
+            def reemplazar(coincidencia):
+                destino = os.path.normpath((carpeta / coincidencia.group(2)).as_posix())
+                if coincidencia.group(2).startswith("/") or destino.startswith(".."):
+                    return coincidencia.group(0)
+                publicada = self._publicar(destino, maxima, en_curso)
+                return coincidencia.group(0) if publicada is None else f"url('/static/{publicada}')"
+
+            contenido = _REF_CSS.sub(reemplazar, contenido.decode("utf-8")).encode("utf-8")
+
+        recurso = self._recurso(contenido, archivo.name, maxima)
+        publicada = (Path(ruta).parent / f"{archivo.stem}.{recurso.huella[:12]}{archivo.suffix}").as_posix()
+        self.archivos[ruta] = recurso
+        self.archivos[publicada] = recurso
+        self.urls[ruta] = publicada
+        self.con_hash[publicada] = ruta
+        return publicada
+
+    def cargar(self, maxima: bool = False) -> None:
+        self.archivos, self.con_hash, self.urls, self.plantillas = {}, {}, {}, {}
+        self._firma = self._firma_disco()
+
+        for archivo in sorted(self.static_dir.rglob("*")):
+            relativa = archivo.relative_to(self.static_dir)
+            if archivo.is_file() and not any(parte.startswith(".") for parte in relativa.parts):
+                self._publicar(relativa.as_posix(), maxima, set())
+
+        for archivo in sorted(self.templates_dir.glob("*.html")):
+            html = _REF_PLANTILLA.sub(
+                lambda c: f'{c.group(1)}={c.group(2)}/static/{self.urls.get(c.group(3), c.group(3))}{c.group(2)}',
+                archivo.read_text(encoding="utf-8")
+            )
+            self.plantillas[archivo.name] = self._recurso(html.encode("utf-8"), archivo.name, maxima)
+
+        log.info("Estáticos cargados", extra={"archivos": len(self.urls), "plantillas": len(self.plantillas)})
+
+    def _revisar_cambios(self) -> None:
+        if ESTATICOS_RECARGAR and self._firma_disco() != self._firma:
+            self.cargar()
+
+    # --- RESPUESTAS ---
+
+    def url(self, ruta: str) -> str:
+        """URL pública con hash de un estático (o la original si no existe)."""
+        return f"/static/{self.urls.get(ruta, ruta)}"
+
+    def _responder(self, recurso: Recurso, headers: Headers, cache_control: str) -> Response:
+        contenido, codificacion = recurso.variante(headers.get("accept-encoding", ""))
+        cabeceras = {"ETag": _etag(recurso.huella, codificacion), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if _coincide_etag(headers.get("if-none-match", ""), recurso.huella):
+            return Response(status_code=304, headers=cabeceras)
+        if codificacion:
+            cabeceras["Content-Encoding"] = codificacion
+        return Response(content=contenido, media_type=recurso.media_type, headers=cabeceras)
+
+    def pagina(self, nombre: str, headers: Headers) -> Optional[Response]:
+        """Plantilla HTML desde memoria; el navegador la revalida con ETag en cada visita."""
+        self._revisar_cambios()
+        recurso = self.plantillas.get(nombre)
+        if recurso is None:
+            return None
+        return self._responder(recurso, headers, CACHE_REVALIDAR)
+
+    def archivo(self, ruta: str, headers: Headers) -> Optional[Response]:
+        """Estático desde memoria: immutable si la ruta lleva hash, revalidación con ETag si no."""
+        self._revisar_cambios()
+        recurso = self.archivos.get(ruta)
+        if recurso is None:
+            return None
+        return self._responder(recurso, headers, CACHE_INMUTABLE if ruta in self.con_hash else CACHE_REVALIDAR)
+
+    # --- BUILD ---
+
+    def escribir_comprimidos(self) -> int:
+        """Guarda las variantes comprimidas en COMPRIMIDOS_DIR y borra las que ya no se usan."""
+        self.cargar(maxima=True)
+        COMPRIMIDOS_DIR.mkdir(parents=True, exist_ok=True)
+        vigentes = set()
+        for recurso in list(self.archivos.values()) + list(self.plantillas.values()):
+            for extension, variante in (("gz", recurso.gzip), ("br", recurso.br)):
+                if variante is not None:
+                    destino = COMPRIMIDOS_DIR / f"{recurso.huella}.{extension}"
+                    destino.write_bytes(variante)
+                    vigentes.add(destino.name)
+        for viejo in COMPRIMIDOS_DIR.iterdir():
+            if viejo.name not in vigentes:
+                viejo.unlink()
+        return len(vigentes)
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.utils.recursos_estaticos  (paso de build antes de desplegar)
+    base = Path(__file__).resolve().parent.parent
+    escritos = RecursosEstaticos(base / "static", base / "templates").escribir_comprimidos()
+    print(f"Variantes comprimidas escritas en {COMPRIMIDOS_DIR}: {escritos}" + ("" if brotli else " (sin brotli: solo gzip)"))
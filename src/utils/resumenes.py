@@ -0,0 +1,206 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete, func
+from src.models.gasto import Gasto
+from src.models.inversion import Inversion
+from src.models.resumen_mensual import ResumenMensual, CATEGORIA_GASTO, CATEGORIA_INVERSION
+
+
+# --- MANTENIMIENTO INCREMENTAL ---
+# Estas funciones NO hacen commit: se ejecutan dentro de la transacción de la ruta que escribe.
+
+_CLAVE = ("usuario_id", "anio", "mes", "categoria", "tipo")
+
+
+def _upsert(db: Session, valores: dict) -> None:
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite, PostgreSQL)
+    que suma total y cantidad sobre uq_resumen_mensual_clave. Es atómico: dos primeras escrituras
+    concurrentes del mismo grupo no chocan con el índice único como pasaba con SELECT ... FOR UPDATE,
+    que no bloquea una fila que todavía no existe.
+    """
+    tabla = ResumenMensual.__table__
+    dialecto = db.get_bind().dialect.name
+
+    if dialecto == "mysql":
+        statement = mysql_insert(tabla).values(**valores)
+        statement = statement.on_duplicate_key_update(
+            total=tabla.c.total + statement.inserted.total,
+            cantidad=tabla.c.cantidad + statement.inserted.cantidad
+        )
+    elif dialecto in ("sqlite", "postgresql"):
+        insertar = sqlite_insert if dialecto == "sqlite" else postgresql_insert
+        statement = insertar(tabla).values(**valores)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(_CLAVE),
+            set_={"total": tabla.c.total + statement.excluded.total, "cantidad": tabla.c.cantidad + statement.excluded.cantidad}
+        )
+    else:
+        # Otros motores: UPDATE y, si no había fila, INSERT dentro de un SAVEPOINT; si otra
+        # transacción la insertó entre medio, se reintenta el UPDATE
+        condicion = [getattr(tabla.c, campo) == valores[campo] for campo in _CLAVE]
+        sumar = update(tabla).where(*condicion).values(
+            total=tabla.c.total + valores["total"], cantidad=tabla.c.cantidad + valores["cantidad"]
+        )
+        if db.exec(sumar).rowcount:
+            return
+        try:
+            with db.begin_nested():
+                db.exec(insert(tabla).values(**valores))
+        except IntegrityError:
+            db.exec(sumar)
+        return
+
+    db.exec(statement)
+
+
+def _aplicar_movimiento(
+    db: Session,
+    usuario_id: int,
+    categoria: str,
+    tipo: str,
+    anio: int,
+    mes: int,
+    total: float,
+    cantidad: int
+) -> None:
+    """Suma (o resta, con valores negativos) un movimiento a la fila de resumen correspondiente."""
+    _upsert(db, {
+        "usuario_id": usuario_id, "anio": anio, "mes": mes, "categoria": categoria, "tipo": tipo,
+        "total": total, "cantidad": cantidad
+    })
+
+    # Si el grupo quedó vacío se elimina para no acumular filas en cero
+    if cantidad < 0:
+        db.exec(delete(ResumenMensual).where(
+            ResumenMensual.usuario_id == usuario_id,
+            ResumenMensual.anio == anio,
+            ResumenMensual.mes == mes,
+            ResumenMensual.categoria == categoria,
+            ResumenMensual.tipo == tipo,
+            ResumenMensual.cantidad <= 0
+        ))
+
+
+class DeltaResumen:
+    """
+    Acumula movimientos de gastos e inversiones y los aplica agrupados:
+    una lectura/escritura por (usuario, mes, categoría, tipo) sin importar cuántas filas cambien.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[int, str, str, int, int], List[float]] = {}
+
+    def _sumar(self, usuario_id: int, categoria: str, tipo: str, fecha: date, total: float, cantidad: int) -> None:
+        clave = (usuario_id, categoria, tipo, fecha.year, fecha.month)
+        delta = self._deltas.setdefault(clave, [0.0, 0])
+        delta[0] += total
+        delta[1] += cantidad
+
+    def gasto(self, gasto: Gasto, signo: int = 1) -> None:
+        self._sumar(
+            gasto.usuario_id, CATEGORIA_GASTO, gasto.tipo_gasto, gasto.fecha_gasto,
+            signo * gasto.cantidad_gasto, signo
+        )
+
+    def inversion(self, inversion: Inversion, signo: int = 1) -> None:
+        self._sumar(
+            inversion.usuario_id, CATEGORIA_INVERSION, inversion.tipo_inversion, inversion.fecha_inversion,
+            signo * inversion.cantidad_inversion, signo
+        )
+
+    def aplicar(self, db: Session) -> None:
+        for (usuario_id, categoria, tipo, anio, mes), (total, cantidad) in self._deltas.items():
+            # Un update que no cambia mes, tipo ni cantidad se anula solo
+            if total == 0 and cantidad == 0:
+                continue
+            _aplicar_movimiento(db, usuario_id, categoria, tipo, anio, mes, total, cantidad)
+        self._deltas.clear()
+
+
+def registrar_gasto(db: Session, gasto: Gasto, signo: int = 1) -> None:
+    """Suma (signo=1) o resta (signo=-1) un gasto del resumen mensual."""
+    delta = DeltaResumen()
+    delta.gasto(gasto, signo)
+    delta.aplicar(db)
+
+
+def registrar_inversion(db: Session, inversion: Inversion, signo: int = 1) -> None:
+    """Suma (signo=1) o resta (signo=-1) una inversión del resumen mensual."""
+    delta = DeltaResumen()
+    delta.inversion(inversion, signo)
+    delta.aplicar(db)
+
+
+def eliminar_resumenes_usuario(db: Session, usuario_id: int) -> None:
+    """Borra todas las filas de resumen de un usuario (sin commit)."""
+    db.exec(delete(ResumenMensual).where(ResumenMensual.usuario_id == usuario_id))
+
+
+# --- RECONSTRUCCIÓN ---
+
+def reconstruir_resumenes(db: Session, usuario_id: Optional[int] = None) -> int:
+    """
+    Recalcula el resumen mensual desde las tablas gasto e inversion.
+    Si se indica usuario_id solo reconstruye ese usuario. Devuelve las filas escritas.
+    """
+    borrar = delete(ResumenMensual)
+    if usuario_id is not None:
+        borrar = borrar.where(ResumenMensual.usuario_id == usuario_id)
+    db.exec(borrar)
+
+    anio_gasto = func.extract("year", Gasto.fecha_gasto)
+    mes_gasto = func.extract("month", Gasto.fecha_gasto)
+    statement_gasto = select(
+        Gasto.usuario_id, anio_gasto, mes_gasto, Gasto.tipo_gasto,
+        func.sum(Gasto.cantidad_gasto), func.count(Gasto.id)
+    ).group_by(Gasto.usuario_id, anio_gasto, mes_gasto, Gasto.tipo_gasto)
+
+    anio_inv = func.extract("year", Inversion.fecha_inversion)
+    mes_inv = func.extract("month", Inversion.fecha_inversion)
+    statement_inv = select(
+        Inversion.usuario_id, anio_inv, mes_inv, Inversion.tipo_inversion,
+        func.sum(Inversion.cantidad_inversion), func.count(Inversion.id)
+    ).group_by(Inversion.usuario_id, anio_inv, mes_inv, Inversion.tipo_inversion)
+
+    if usuario_id is not None:
+        statement_gasto = statement_gasto.where(Gasto.usuario_id == usuario_id)
+        statement_inv = statement_inv.where(Inversion.usuario_id == usuario_id)
+
+    filas = 0
+    for categoria, statement in ((CATEGORIA_GASTO, statement_gasto), (CATEGORIA_INVERSION, statement_inv)):
+        for uid, anio, mes, tipo, total, cantidad in db.exec(statement):
+            db.add(ResumenMensual(
+                usuario_id=uid,
+                anio=int(anio),
+                mes=int(mes),
+                categoria=categoria,
+                tipo=tipo,
+                total=float(total or 0),
+                cantidad=int(cantidad)
+            ))
+            filas += 1
+
+    db.commit()
+    return filas
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.utils.resumenes [--usuario ID]
+    import argparse
+    from sqlmodel import SQLModel
+    from src.config.db import engine
+
+    parser = argparse.ArgumentParser(description="Reconstruye la tabla resumen_mensual desde gasto e inversion.")
+    parser.add_argument("--usuario", type=int, default=None, help="Reconstruir solo este usuario")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine, tables=[ResumenMensual.__table__])
+    with Session(engine) as session:
+        escritas = reconstruir_resumenes(session, args.usuario)
+    print(f"resumen_mensual reconstruido: {escritas} filas")
@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, Sequence, Tuple
+from dotenv import load_dotenv
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+# Listados y análisis se serializan directo desde tuplas/dicts, sin validar cada fila
+# con el response_model. El esquema documentado no cambia.
+SERIALIZACION_RAPIDA = os.getenv("SERIALIZACION_RAPIDA", "false").lower() in ("1", "true", "yes")
+
+
+def _por_defecto(valor: Any) -> Any:
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"No se puede serializar {type(valor).__name__}")
+
+
+def a_json(contenido: Any) -> bytes:
+    """JSON compacto en UTF-8 con la misma forma que genera FastAPI (fechas ISO, modelos como dict)."""
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_por_defecto)
+    return json.dumps(contenido, default=_por_defecto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RespuestaJSONRapida(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
+
+
+def columnas_de(tabla, esquema) -> Tuple:
+    """Columnas de `tabla` en el orden de los campos de `esquema` (p. ej. Gasto y GastoRead)."""
+    return tuple(getattr(tabla, campo) for campo in esquema.model_fields)
+
+
+def respuesta_filas(filas: Iterable[Sequence], columnas: Tuple, response: Response) -> Response:
+    """
+    Convierte filas (tuplas de un select de columnas) en una respuesta JSON con las claves de
+    `columnas`. Conserva las cabeceras ya puestas en `response`, como X-Next-Cursor.
+    """
+    campos = tuple(columna.key for columna in columnas)
+    headers = {nombre: valor for nombre, valor in response.headers.items() if nombre != "content-length"}
+    return RespuestaJSONRapida([dict(zip(campos, fila)) for fila in filas], headers=headers)